@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from . import analytics_dashboard
+from . import dashboard_cache
 from . import analytics_kpi
 from . import analytics_report
 from . import employee_cost_center
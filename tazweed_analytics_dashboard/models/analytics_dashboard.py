@@ -3,7 +3,17 @@ from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+import copy
 import json
+import time
+
+from .dashboard_cache import (
+    DASHBOARD_CACHE, DASHBOARD_CACHE_MODELS,
+    DASHBOARD_CACHE_BASE_DEPENDENCIES, DASHBOARD_CACHE_TYPE_DEPENDENCIES,
+)
+
+DEFAULT_CACHE_TTL = 300
+DEFAULT_CACHE_SIZE = 256
 
 
 class AnalyticsDashboard(models.Model):
@@ -104,12 +114,42 @@ class AnalyticsDashboard(models.Model):
         data = self.get_dashboard_data()
         return data.get('charts', [])
 
+    def init(self):
+        """Create the generation counters of the payload cache."""
+        for sequence in DASHBOARD_CACHE_MODELS.values():
+            self.env.cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {sequence}")
+
     def get_dashboard_data(self):
-        """Get all data for the dashboard."""
+        """Get all data for the dashboard, served from the payload cache when fresh."""
         self.ensure_one()
         
         date_from, date_to = self._get_date_range()
-        
+        ttl, max_size = self._get_cache_settings()
+        if ttl <= 0:
+            data = self._compute_dashboard_data(date_from, date_to)
+            data['cache'] = {'hit': False, 'enabled': False}
+            return data
+        
+        key = self._get_cache_key(date_from, date_to)
+        generations = self._get_cache_generations()
+        entry = DASHBOARD_CACHE.get(key, generations)
+        if entry:
+            data = copy.deepcopy(entry['payload'])
+            data['cache'] = {
+                'hit': True,
+                'enabled': True,
+                'age': round(time.time() - entry['created_at'], 1),
+                'ttl': ttl,
+            }
+            return data
+        
+        data = self._compute_dashboard_data(date_from, date_to)
+        DASHBOARD_CACHE.set(key, generations, copy.deepcopy(data), ttl, max_size)
+        data['cache'] = {'hit': False, 'enabled': True, 'age': 0, 'ttl': ttl}
+        return data
+
+    def _compute_dashboard_data(self, date_from, date_to):
+        """Compute the dashboard payload for the given range."""
         data = {
             'dashboard': {
                 'id': self.id,
@@ -123,8 +163,9 @@ class AnalyticsDashboard(models.Model):
             'kpis': [],
             'charts': [],
             'summary': self._get_summary_data(date_from, date_to) or {},
-            'alerts': self._get_alerts() or [],
+            'alerts': [],
         }
+        data['alerts'] = self._get_alerts(data['summary']) or []
         
         # Get KPI data
         for kpi in self.kpi_ids:
@@ -159,25 +200,21 @@ class AnalyticsDashboard(models.Model):
         month_start = today.replace(day=1)
         year_start = today.replace(month=1, day=1)
         
-        summary = {
-            'total_employees': Employee.search_count([('active', '=', True)]),
-            'new_hires_month': Employee.search_count([
-                ('create_date', '>=', month_start)
-            ]),
-            'new_hires_year': Employee.search_count([
-                ('create_date', '>=', year_start)
-            ]),
+        queries = {
+            'total_employees': (Employee, [('active', '=', True)]),
+            'new_hires_month': (Employee, [('create_date', '>=', month_start)]),
+            'new_hires_year': (Employee, [('create_date', '>=', year_start)]),
         }
         
         # Add client request stats if model exists
         if 'client.request' in self.env:
             ClientRequest = self.env['client.request'].sudo()
-            summary.update({
-                'total_client_requests': ClientRequest.search_count([]),
-                'pending_client_requests': ClientRequest.search_count([
+            queries.update({
+                'total_client_requests': (ClientRequest, []),
+                'pending_client_requests': (ClientRequest, [
                     ('state', 'in', ['submitted', 'under_review', 'pending_info'])
                 ]),
-                'overdue_client_requests': ClientRequest.search_count([
+                'overdue_client_requests': (ClientRequest, [
                     ('sla_status', '=', 'overdue'),
                     ('state', 'not in', ['completed', 'rejected', 'cancelled'])
                 ]),
@@ -186,9 +223,9 @@ class AnalyticsDashboard(models.Model):
         # Add HR service request stats if model exists
         if 'hr.service.request' in self.env:
             HRRequest = self.env['hr.service.request'].sudo()
-            summary.update({
-                'total_hr_requests': HRRequest.search_count([]),
-                'pending_hr_requests': HRRequest.search_count([
+            queries.update({
+                'total_hr_requests': (HRRequest, []),
+                'pending_hr_requests': (HRRequest, [
                     ('state', 'in', ['submitted', 'manager_approval', 'hr_approval', 'processing'])
                 ]),
             })
@@ -196,24 +233,27 @@ class AnalyticsDashboard(models.Model):
         # Add placement stats if model exists
         if 'tazweed.placement' in self.env:
             Placement = self.env['tazweed.placement'].sudo()
-            summary.update({
-                'total_placements': Placement.search_count([]),
-                'active_placements': Placement.search_count([('state', '=', 'active')]),
+            queries.update({
+                'total_placements': (Placement, []),
+                'active_placements': (Placement, [('state', '=', 'active')]),
             })
         
-        return summary
+        return dict(zip(queries, self._count_many(list(queries.values()))))
 
-    def _get_alerts(self):
+    def _get_alerts(self, summary=None):
         """Get system alerts and notifications."""
         alerts = []
         today = fields.Date.today()
+        summary = summary or {}
         
         # Check for overdue client requests
         if 'client.request' in self.env:
-            overdue = self.env['client.request'].sudo().search_count([
-                ('sla_status', '=', 'overdue'),
-                ('state', 'not in', ['completed', 'rejected', 'cancelled'])
-            ])
+            overdue = summary.get('overdue_client_requests')
+            if overdue is None:
+                overdue = self.env['client.request'].sudo().search_count([
+                    ('sla_status', '=', 'overdue'),
+                    ('state', 'not in', ['completed', 'rejected', 'cancelled'])
+                ])
             if overdue > 0:
                 alerts.append({
                     'type': 'danger',
@@ -268,22 +308,17 @@ class AnalyticsDashboard(models.Model):
     def _get_headcount_trend_chart(self):
         """Get headcount trend over last 12 months."""
         Employee = self.env['hr.employee'].sudo()
+        periods = self._get_month_periods()
         
-        labels = []
-        data = []
-        today = fields.Date.today()
-        
-        for i in range(11, -1, -1):
-            date = today - relativedelta(months=i)
-            month_end = (date.replace(day=1) + relativedelta(months=1)) - timedelta(days=1)
-            
-            labels.append(date.strftime('%b %Y'))
-            count = Employee.search_count([
+        labels = [date.strftime('%b %Y') for date, __, __ in periods]
+        data = self._count_many([
+            (Employee, [
                 ('create_date', '<=', month_end),
                 '|', ('active', '=', True),
                 ('departure_date', '>', month_end)
             ])
-            data.append(count)
+            for __, __, month_end in periods
+        ])
         
         return {
             'id': 'headcount_trend',
@@ -303,16 +338,17 @@ class AnalyticsDashboard(models.Model):
         """Get employee distribution by department."""
         Employee = self.env['hr.employee'].sudo()
         
-        departments = self.env['hr.department'].sudo().search([])
+        departments = self.env['hr.department'].sudo().search([], limit=8)
+        counts = self._count_grouped(Employee, [
+            ('department_id', 'in', departments.ids),
+            ('active', '=', True)
+        ], 'department_id')
         labels = []
         data = []
         colors = ['#2196F3', '#4CAF50', '#FF9800', '#F44336', '#9C27B0', '#00BCD4', '#607D8B', '#795548']
         
-        for dept in departments[:8]:
-            count = Employee.search_count([
-                ('department_id', '=', dept.id),
-                ('active', '=', True)
-            ])
+        for dept in departments:
+            count = counts.get(dept.id, 0)
             if count > 0:
                 labels.append(dept.name)
                 data.append(count)
@@ -331,28 +367,19 @@ class AnalyticsDashboard(models.Model):
     def _get_turnover_chart(self):
         """Get turnover rate trend."""
         Employee = self.env['hr.employee'].sudo()
+        periods = self._get_month_periods()
         
-        labels = []
-        data = []
-        today = fields.Date.today()
+        labels = [date.strftime('%b') for date, __, __ in periods]
+        departed_data = self._count_by_month(Employee, 'departure_date', periods)
+        total_data = self._count_many([
+            (Employee, [('create_date', '<=', month_end)])
+            for __, __, month_end in periods
+        ])
         
-        for i in range(11, -1, -1):
-            date = today - relativedelta(months=i)
-            month_start = date.replace(day=1)
-            month_end = (month_start + relativedelta(months=1)) - timedelta(days=1)
-            
-            labels.append(date.strftime('%b'))
-            
-            departed = Employee.search_count([
-                ('departure_date', '>=', month_start),
-                ('departure_date', '<=', month_end)
-            ])
-            total = Employee.search_count([
-                ('create_date', '<=', month_end)
-            ]) or 1
-            
-            rate = (departed / total) * 100
-            data.append(round(rate, 1))
+        data = [
+            round(departed / (total or 1) * 100, 1)
+            for departed, total in zip(departed_data, total_data)
+        ]
         
         return {
             'id': 'turnover_trend',
@@ -368,30 +395,28 @@ class AnalyticsDashboard(models.Model):
 
     def _get_key_metrics_chart(self, date_from, date_to):
         """Get key metrics summary."""
-        metrics = []
-        
-        # Employee metrics
-        Employee = self.env['hr.employee'].sudo()
-        total_emp = Employee.search_count([('active', '=', True)])
-        metrics.append({'label': 'Total Employees', 'value': total_emp})
+        queries = [('Total Employees', self.env['hr.employee'].sudo(), [('active', '=', True)])]
         
         # Client metrics
         if 'tazweed.client' in self.env:
-            clients = self.env['tazweed.client'].sudo().search_count([('active', '=', True)])
-            metrics.append({'label': 'Active Clients', 'value': clients})
+            queries.append(('Active Clients', self.env['tazweed.client'].sudo(), [('active', '=', True)]))
         
         # Placement metrics
         if 'tazweed.placement' in self.env:
-            placements = self.env['tazweed.placement'].sudo().search_count([('state', '=', 'active')])
-            metrics.append({'label': 'Active Placements', 'value': placements})
+            queries.append(('Active Placements', self.env['tazweed.placement'].sudo(), [('state', '=', 'active')]))
         
         # Request metrics
         if 'client.request' in self.env:
-            requests = self.env['client.request'].sudo().search_count([
+            queries.append(('Client Requests', self.env['client.request'].sudo(), [
                 ('create_date', '>=', date_from),
                 ('create_date', '<=', date_to)
-            ])
-            metrics.append({'label': 'Client Requests', 'value': requests})
+            ]))
+        
+        counts = self._count_many([(model, domain) for __, model, domain in queries])
+        metrics = [
+            {'label': label, 'value': count}
+            for (label, __, __), count in zip(queries, counts)
+        ]
         
         return {
             'id': 'key_metrics',
@@ -434,20 +459,11 @@ class AnalyticsDashboard(models.Model):
             ('cancelled', 'Cancelled', '#607D8B'),
         ]
         
-        labels = []
-        data = []
-        colors = []
-        
-        for state, label, color in statuses:
-            count = ClientRequest.search_count([
-                ('state', '=', state),
-                ('create_date', '>=', date_from),
-                ('create_date', '<=', date_to)
-            ])
-            if count > 0:
-                labels.append(label)
-                data.append(count)
-                colors.append(color)
+        counts = self._count_grouped(ClientRequest, [
+            ('create_date', '>=', date_from),
+            ('create_date', '<=', date_to)
+        ], 'state')
+        labels, data, colors = self._series_from_counts(statuses, counts)
         
         return {
             'id': 'request_by_status',
@@ -476,20 +492,11 @@ class AnalyticsDashboard(models.Model):
             ('feedback', 'Feedback', '#607D8B'),
         ]
         
-        labels = []
-        data = []
-        colors = []
-        
-        for cat, label, color in categories:
-            count = ClientRequest.search_count([
-                ('category', '=', cat),
-                ('create_date', '>=', date_from),
-                ('create_date', '<=', date_to)
-            ])
-            if count > 0:
-                labels.append(label)
-                data.append(count)
-                colors.append(color)
+        counts = self._count_grouped(ClientRequest, [
+            ('create_date', '>=', date_from),
+            ('create_date', '<=', date_to)
+        ], 'category')
+        labels, data, colors = self._series_from_counts(categories, counts)
         
         return {
             'id': 'request_by_category',
@@ -509,31 +516,12 @@ class AnalyticsDashboard(models.Model):
             return self._empty_chart('request_trend', 'Request Trend')
         
         ClientRequest = self.env['client.request'].sudo()
+        periods = self._get_month_periods()
         
-        labels = []
-        submitted_data = []
-        completed_data = []
-        today = fields.Date.today()
-        
-        for i in range(11, -1, -1):
-            date = today - relativedelta(months=i)
-            month_start = date.replace(day=1)
-            month_end = (month_start + relativedelta(months=1)) - timedelta(days=1)
-            
-            labels.append(date.strftime('%b %Y'))
-            
-            submitted = ClientRequest.search_count([
-                ('create_date', '>=', month_start),
-                ('create_date', '<=', month_end)
-            ])
-            completed = ClientRequest.search_count([
-                ('completed_date', '>=', month_start),
-                ('completed_date', '<=', month_end),
-                ('state', '=', 'completed')
-            ])
-            
-            submitted_data.append(submitted)
-            completed_data.append(completed)
+        labels = [date.strftime('%b %Y') for date, __, __ in periods]
+        submitted_data = self._count_by_month(ClientRequest, 'create_date', periods)
+        completed_data = self._count_by_month(
+            ClientRequest, 'completed_date', periods, [('state', '=', 'completed')])
         
         return {
             'id': 'request_trend',
@@ -702,20 +690,11 @@ class AnalyticsDashboard(models.Model):
             ('cancelled', 'Cancelled', '#607D8B'),
         ]
         
-        labels = []
-        data = []
-        colors = []
-        
-        for state, label, color in statuses:
-            count = HRRequest.search_count([
-                ('state', '=', state),
-                ('create_date', '>=', date_from),
-                ('create_date', '<=', date_to)
-            ])
-            if count > 0:
-                labels.append(label)
-                data.append(count)
-                colors.append(color)
+        counts = self._count_grouped(HRRequest, [
+            ('create_date', '>=', date_from),
+            ('create_date', '<=', date_to)
+        ], 'state')
+        labels, data, colors = self._series_from_counts(statuses, counts)
         
         return {
             'id': 'hr_request_by_status',
@@ -769,23 +748,10 @@ class AnalyticsDashboard(models.Model):
             return self._empty_chart('hr_request_trend', 'HR Request Trend')
         
         HRRequest = self.env['hr.service.request'].sudo()
+        periods = self._get_month_periods()
         
-        labels = []
-        data = []
-        today = fields.Date.today()
-        
-        for i in range(11, -1, -1):
-            date = today - relativedelta(months=i)
-            month_start = date.replace(day=1)
-            month_end = (month_start + relativedelta(months=1)) - timedelta(days=1)
-            
-            labels.append(date.strftime('%b %Y'))
-            
-            count = HRRequest.search_count([
-                ('create_date', '>=', month_start),
-                ('create_date', '<=', month_end)
-            ])
-            data.append(count)
+        labels = [date.strftime('%b %Y') for date, __, __ in periods]
+        data = self._count_by_month(HRRequest, 'create_date', periods)
         
         return {
             'id': 'hr_request_trend',
@@ -885,17 +851,22 @@ class AnalyticsDashboard(models.Model):
         """Get employee status distribution."""
         Employee = self.env['hr.employee'].sudo()
         
-        active = Employee.search_count([('active', '=', True)])
-        inactive = Employee.search_count([('active', '=', False)])
+        queries = [
+            (Employee, [('active', '=', True)]),
+            (Employee, [('active', '=', False)]),
+        ]
         
         # Check for probation if field exists
-        probation = 0
         if 'probation_end_date' in Employee._fields:
             today = fields.Date.today()
-            probation = Employee.search_count([
+            queries.append((Employee, [
                 ('active', '=', True),
                 ('probation_end_date', '>=', today)
-            ])
+            ]))
+        
+        counts = self._count_many(queries)
+        active, inactive = counts[:2]
+        probation = counts[2] if len(counts) > 2 else 0
         
         return {
             'id': 'employee_status',
@@ -916,26 +887,25 @@ class AnalyticsDashboard(models.Model):
         Contract = self.env['hr.contract'].sudo()
         today = fields.Date.today()
         
-        expired = Contract.search_count([
-            ('state', '=', 'open'),
-            ('date_end', '<', today)
-        ])
-        
-        expiring_30 = Contract.search_count([
-            ('state', '=', 'open'),
-            ('date_end', '>=', today),
-            ('date_end', '<=', today + timedelta(days=30))
-        ])
-        
-        expiring_90 = Contract.search_count([
-            ('state', '=', 'open'),
-            ('date_end', '>', today + timedelta(days=30)),
-            ('date_end', '<=', today + timedelta(days=90))
-        ])
-        
-        valid = Contract.search_count([
-            ('state', '=', 'open'),
-            ('date_end', '>', today + timedelta(days=90))
+        expired, expiring_30, expiring_90, valid = self._count_many([
+            (Contract, [
+                ('state', '=', 'open'),
+                ('date_end', '<', today)
+            ]),
+            (Contract, [
+                ('state', '=', 'open'),
+                ('date_end', '>=', today),
+                ('date_end', '<=', today + timedelta(days=30))
+            ]),
+            (Contract, [
+                ('state', '=', 'open'),
+                ('date_end', '>', today + timedelta(days=30)),
+                ('date_end', '<=', today + timedelta(days=90))
+            ]),
+            (Contract, [
+                ('state', '=', 'open'),
+                ('date_end', '>', today + timedelta(days=90))
+            ]),
         ])
         
         return {
@@ -952,23 +922,10 @@ class AnalyticsDashboard(models.Model):
     def _get_new_hires_chart(self):
         """Get new hires trend."""
         Employee = self.env['hr.employee'].sudo()
+        periods = self._get_month_periods()
         
-        labels = []
-        data = []
-        today = fields.Date.today()
-        
-        for i in range(11, -1, -1):
-            date = today - relativedelta(months=i)
-            month_start = date.replace(day=1)
-            month_end = (month_start + relativedelta(months=1)) - timedelta(days=1)
-            
-            labels.append(date.strftime('%b'))
-            
-            count = Employee.search_count([
-                ('create_date', '>=', month_start),
-                ('create_date', '<=', month_end)
-            ])
-            data.append(count)
+        labels = [date.strftime('%b') for date, __, __ in periods]
+        data = self._count_by_month(Employee, 'create_date', periods)
         
         return {
             'id': 'new_hires',
@@ -996,30 +953,22 @@ class AnalyticsDashboard(models.Model):
 
     def _get_payroll_trend_chart(self):
         """Get payroll cost trend."""
-        labels = []
-        data = []
-        today = fields.Date.today()
+        periods = self._get_month_periods()
+        labels = [date.strftime('%b %Y') for date, __, __ in periods]
+        data = [0] * len(periods)
         
-        for i in range(11, -1, -1):
-            date = today - relativedelta(months=i)
-            labels.append(date.strftime('%b %Y'))
-            
-            # Try to get actual payroll data
-            if 'hr.payslip' in self.env:
-                month_start = date.replace(day=1)
-                month_end = (month_start + relativedelta(months=1)) - timedelta(days=1)
-                
-                self.env.cr.execute("""
-                    SELECT COALESCE(SUM(net_wage), 0)
-                    FROM hr_payslip
-                    WHERE state = 'done'
-                    AND date_from >= %s AND date_to <= %s
-                """, (month_start, month_end))
-                
-                result = self.env.cr.fetchone()
-                data.append(float(result[0]) if result else 0)
-            else:
-                data.append(0)
+        # Try to get actual payroll data
+        if 'hr.payslip' in self.env:
+            self.env.cr.execute("""
+                SELECT date_trunc('month', date_from)::date AS month, COALESCE(SUM(net_wage), 0)
+                FROM hr_payslip
+                WHERE state = 'done'
+                AND date_from >= %s AND date_to <= %s
+                AND date_trunc('month', date_from) = date_trunc('month', date_to)
+                GROUP BY 1
+            """, (periods[0][1], periods[-1][2]))
+            totals = dict(self.env.cr.fetchall())
+            data = [float(totals.get(month_start, 0)) for __, month_start, __ in periods]
         
         return {
             'id': 'payroll_trend',
@@ -1051,23 +1000,15 @@ class AnalyticsDashboard(models.Model):
             (50000, float('inf'), '50K+'),
         ]
         
-        labels = []
-        data = []
-        
+        queries = []
         for min_sal, max_sal, label in ranges:
-            if max_sal == float('inf'):
-                count = Contract.search_count([
-                    ('state', '=', 'open'),
-                    ('wage', '>=', min_sal)
-                ])
-            else:
-                count = Contract.search_count([
-                    ('state', '=', 'open'),
-                    ('wage', '>=', min_sal),
-                    ('wage', '<', max_sal)
-                ])
-            labels.append(label)
-            data.append(count)
+            domain = [('state', '=', 'open'), ('wage', '>=', min_sal)]
+            if max_sal != float('inf'):
+                domain.append(('wage', '<', max_sal))
+            queries.append((Contract, domain))
+        
+        labels = [label for __, __, label in ranges]
+        data = self._count_many(queries)
         
         return {
             'id': 'salary_distribution',
@@ -1141,16 +1082,8 @@ class AnalyticsDashboard(models.Model):
             ('cancelled', 'Cancelled', '#F44336'),
         ]
         
-        labels = []
-        data = []
-        colors = []
-        
-        for state, label, color in states:
-            count = Placement.search_count([('state', '=', state)])
-            if count > 0:
-                labels.append(label)
-                data.append(count)
-                colors.append(color)
+        counts = self._count_grouped(Placement, [], 'state')
+        labels, data, colors = self._series_from_counts(states, counts)
         
         return {
             'id': 'placement_pipeline',
@@ -1169,23 +1102,10 @@ class AnalyticsDashboard(models.Model):
             return self._empty_chart('job_applications', 'Job Applications')
         
         JobApp = self.env['job.application'].sudo()
+        periods = self._get_month_periods()
         
-        labels = []
-        data = []
-        today = fields.Date.today()
-        
-        for i in range(11, -1, -1):
-            date = today - relativedelta(months=i)
-            month_start = date.replace(day=1)
-            month_end = (month_start + relativedelta(months=1)) - timedelta(days=1)
-            
-            labels.append(date.strftime('%b'))
-            
-            count = JobApp.search_count([
-                ('create_date', '>=', month_start),
-                ('create_date', '<=', month_end)
-            ])
-            data.append(count)
+        labels = [date.strftime('%b') for date, __, __ in periods]
+        data = self._count_by_month(JobApp, 'create_date', periods)
         
         return {
             'id': 'job_applications',
@@ -1320,21 +1240,16 @@ class AnalyticsDashboard(models.Model):
             return self._empty_chart('client_growth', 'Client Growth')
         
         Client = self.env['tazweed.client'].sudo()
+        periods = self._get_month_periods()
         
-        labels = []
-        data = []
-        today = fields.Date.today()
-        
-        for i in range(11, -1, -1):
-            date = today - relativedelta(months=i)
-            month_end = (date.replace(day=1) + relativedelta(months=1)) - timedelta(days=1)
-            
-            labels.append(date.strftime('%b %Y'))
-            count = Client.search_count([
+        labels = [date.strftime('%b %Y') for date, __, __ in periods]
+        data = self._count_many([
+            (Client, [
                 ('create_date', '<=', month_end),
                 ('active', '=', True)
             ])
-            data.append(count)
+            for __, __, month_end in periods
+        ])
         
         return {
             'id': 'client_growth',
@@ -1367,17 +1282,20 @@ class AnalyticsDashboard(models.Model):
         """Get Emiratization statistics."""
         Employee = self.env['hr.employee'].sudo()
         
-        total = Employee.search_count([('active', '=', True)])
+        queries = [(Employee, [('active', '=', True)])]
         
         # Check for nationality field
-        uae_count = 0
         if 'country_id' in Employee._fields:
             uae = self.env['res.country'].sudo().search([('code', '=', 'AE')], limit=1)
             if uae:
-                uae_count = Employee.search_count([
+                queries.append((Employee, [
                     ('active', '=', True),
                     ('country_id', '=', uae.id)
-                ])
+                ]))
+        
+        counts = self._count_many(queries)
+        total = counts[0]
+        uae_count = counts[1] if len(counts) > 1 else 0
         
         non_uae = total - uae_count
         emiratization_rate = (uae_count / total * 100) if total > 0 else 0
@@ -1402,26 +1320,25 @@ class AnalyticsDashboard(models.Model):
         today = fields.Date.today()
         
         # Count visa documents by status
-        valid = Document.search_count([
-            ('document_type', 'ilike', 'visa'),
-            ('expiry_date', '>', today + timedelta(days=90))
-        ])
-        
-        expiring_90 = Document.search_count([
-            ('document_type', 'ilike', 'visa'),
-            ('expiry_date', '>', today + timedelta(days=30)),
-            ('expiry_date', '<=', today + timedelta(days=90))
-        ])
-        
-        expiring_30 = Document.search_count([
-            ('document_type', 'ilike', 'visa'),
-            ('expiry_date', '>', today),
-            ('expiry_date', '<=', today + timedelta(days=30))
-        ])
-        
-        expired = Document.search_count([
-            ('document_type', 'ilike', 'visa'),
-            ('expiry_date', '<=', today)
+        valid, expiring_90, expiring_30, expired = self._count_many([
+            (Document, [
+                ('document_type', 'ilike', 'visa'),
+                ('expiry_date', '>', today + timedelta(days=90))
+            ]),
+            (Document, [
+                ('document_type', 'ilike', 'visa'),
+                ('expiry_date', '>', today + timedelta(days=30)),
+                ('expiry_date', '<=', today + timedelta(days=90))
+            ]),
+            (Document, [
+                ('document_type', 'ilike', 'visa'),
+                ('expiry_date', '>', today),
+                ('expiry_date', '<=', today + timedelta(days=30))
+            ]),
+            (Document, [
+                ('document_type', 'ilike', 'visa'),
+                ('expiry_date', '<=', today)
+            ]),
         ])
         
         return {
@@ -1444,39 +1361,32 @@ class AnalyticsDashboard(models.Model):
         today = fields.Date.today()
         
         labels = ['Expired', 'This Week', 'This Month', '3 Months', '6 Months', 'Valid']
-        data = []
-        
-        # Expired
-        data.append(Document.search_count([('expiry_date', '<', today)]))
-        
-        # This week
-        data.append(Document.search_count([
-            ('expiry_date', '>=', today),
-            ('expiry_date', '<=', today + timedelta(days=7))
-        ]))
-        
-        # This month
-        data.append(Document.search_count([
-            ('expiry_date', '>', today + timedelta(days=7)),
-            ('expiry_date', '<=', today + timedelta(days=30))
-        ]))
-        
-        # 3 months
-        data.append(Document.search_count([
-            ('expiry_date', '>', today + timedelta(days=30)),
-            ('expiry_date', '<=', today + timedelta(days=90))
-        ]))
-        
-        # 6 months
-        data.append(Document.search_count([
-            ('expiry_date', '>', today + timedelta(days=90)),
-            ('expiry_date', '<=', today + timedelta(days=180))
-        ]))
-        
-        # Valid (more than 6 months)
-        data.append(Document.search_count([
-            ('expiry_date', '>', today + timedelta(days=180))
-        ]))
+        data = self._count_many([
+            # Expired
+            (Document, [('expiry_date', '<', today)]),
+            # This week
+            (Document, [
+                ('expiry_date', '>=', today),
+                ('expiry_date', '<=', today + timedelta(days=7))
+            ]),
+            # This month
+            (Document, [
+                ('expiry_date', '>', today + timedelta(days=7)),
+                ('expiry_date', '<=', today + timedelta(days=30))
+            ]),
+            # 3 months
+            (Document, [
+                ('expiry_date', '>', today + timedelta(days=30)),
+                ('expiry_date', '<=', today + timedelta(days=90))
+            ]),
+            # 6 months
+            (Document, [
+                ('expiry_date', '>', today + timedelta(days=90)),
+                ('expiry_date', '<=', today + timedelta(days=180))
+            ]),
+            # Valid (more than 6 months)
+            (Document, [('expiry_date', '>', today + timedelta(days=180))]),
+        ])
         
         return {
             'id': 'document_expiry',
@@ -1505,16 +1415,8 @@ class AnalyticsDashboard(models.Model):
             ('rejected', 'Rejected', '#F44336'),
         ]
         
-        labels = []
-        data = []
-        colors = []
-        
-        for state, label, color in states:
-            count = WPSFile.search_count([('state', '=', state)])
-            if count > 0:
-                labels.append(label)
-                data.append(count)
-                colors.append(color)
+        counts = self._count_grouped(WPSFile, [], 'state')
+        labels, data, colors = self._series_from_counts(states, counts)
         
         return {
             'id': 'wps_compliance',
@@ -1554,20 +1456,11 @@ class AnalyticsDashboard(models.Model):
             ('cancelled', 'Cancelled', '#F44336'),
         ]
         
-        labels = []
-        data = []
-        colors = []
-        
-        for state, label, color in states:
-            count = WorkflowInstance.search_count([
-                ('state', '=', state),
-                ('create_date', '>=', date_from),
-                ('create_date', '<=', date_to)
-            ])
-            if count > 0:
-                labels.append(label)
-                data.append(count)
-                colors.append(color)
+        counts = self._count_grouped(WorkflowInstance, [
+            ('create_date', '>=', date_from),
+            ('create_date', '<=', date_to)
+        ], 'state')
+        labels, data, colors = self._series_from_counts(states, counts)
         
         return {
             'id': 'workflow_instances',
@@ -1621,31 +1514,12 @@ class AnalyticsDashboard(models.Model):
             return self._empty_chart('workflow_completion', 'Workflow Completion')
         
         WorkflowInstance = self.env['tazweed.workflow.instance'].sudo()
+        periods = self._get_month_periods()
         
-        labels = []
-        started_data = []
-        completed_data = []
-        today = fields.Date.today()
-        
-        for i in range(11, -1, -1):
-            date = today - relativedelta(months=i)
-            month_start = date.replace(day=1)
-            month_end = (month_start + relativedelta(months=1)) - timedelta(days=1)
-            
-            labels.append(date.strftime('%b'))
-            
-            started = WorkflowInstance.search_count([
-                ('create_date', '>=', month_start),
-                ('create_date', '<=', month_end)
-            ])
-            completed = WorkflowInstance.search_count([
-                ('state', '=', 'completed'),
-                ('write_date', '>=', month_start),
-                ('write_date', '<=', month_end)
-            ])
-            
-            started_data.append(started)
-            completed_data.append(completed)
+        labels = [date.strftime('%b') for date, __, __ in periods]
+        started_data = self._count_by_month(WorkflowInstance, 'create_date', periods)
+        completed_data = self._count_by_month(
+            WorkflowInstance, 'write_date', periods, [('state', '=', 'completed')])
         
         return {
             'id': 'workflow_completion',
@@ -1668,6 +1542,132 @@ class AnalyticsDashboard(models.Model):
             ]
         }
 
+    # ==========================================
+    # PAYLOAD CACHE
+    # ==========================================
+    
+    def _get_cache_settings(self):
+        """Return the cache TTL in seconds (0 disables it) and its maximum size."""
+        ICP = self.env['ir.config_parameter'].sudo()
+        ttl = int(ICP.get_param('tazweed_analytics_dashboard.cache_ttl', DEFAULT_CACHE_TTL))
+        max_size = int(ICP.get_param('tazweed_analytics_dashboard.cache_size', DEFAULT_CACHE_SIZE))
+        return ttl, max(max_size, 1)
+
+    def _get_cache_key(self, date_from, date_to):
+        """Key a payload by dashboard, type, date range, companies and access scope."""
+        return (
+            self.env.cr.dbname,
+            self.id,
+            self.write_date,
+            self.dashboard_type,
+            date_from,
+            date_to,
+            self.company_id.id,
+            tuple(self.env.companies.ids),
+            tuple(sorted(self.env.user.groups_id.ids)),
+        )
+
+    def _get_cache_dependencies(self):
+        """Return the cache-watched models the payload of this dashboard reads."""
+        names = DASHBOARD_CACHE_BASE_DEPENDENCIES + DASHBOARD_CACHE_TYPE_DEPENDENCIES.get(self.dashboard_type, ())
+        return sorted(set(name for name in names if name in self.env))
+
+    def _get_cache_generations(self):
+        """Read the current generation of every dependency in one query."""
+        names = self._get_cache_dependencies()
+        if not names:
+            return {}
+        self.env.cr.execute(' UNION ALL '.join(
+            f"SELECT %s, CASE WHEN is_called THEN last_value ELSE 0 END FROM {DASHBOARD_CACHE_MODELS[name]}"
+            for name in names
+        ), names)
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def action_clear_cache(self):
+        """Drop every cached payload of this database in the current worker."""
+        DASHBOARD_CACHE.clear(self.env.cr.dbname)
+        return True
+
+    # ==========================================
+    # AGGREGATION LAYER
+    # ==========================================
+    
+    def _get_month_periods(self, months=12):
+        """Return (date, month_start, month_end) of the last months, oldest first."""
+        today = fields.Date.today()
+        periods = []
+        for i in range(months - 1, -1, -1):
+            date = today - relativedelta(months=i)
+            month_start = date.replace(day=1)
+            month_end = (month_start + relativedelta(months=1)) - timedelta(days=1)
+            periods.append((date, month_start, month_end))
+        return periods
+
+    def _get_count_query(self, model, domain):
+        """Return the FROM/WHERE SQL and params matching ``model.search_count(domain)``."""
+        model._flush_search(domain)
+        query = model._where_calc(domain)
+        if not model.env.su:
+            model._apply_ir_rules(query, 'read')
+        from_clause, where_clause, params = query.get_sql()
+        return from_clause, where_clause or 'TRUE', params
+
+    def _count_many(self, queries):
+        """Count several (model, domain) pairs with a single query.
+        
+        Each count keeps the exact search_count semantics (active test,
+        access rules) and is returned in the order of ``queries``.
+        """
+        if not queries:
+            return []
+        selects = []
+        params = []
+        for model, domain in queries:
+            from_clause, where_clause, where_params = self._get_count_query(model, domain)
+            selects.append(f'(SELECT COUNT(*) FROM {from_clause} WHERE {where_clause})')
+            params.extend(where_params)
+        self.env.cr.execute('SELECT ' + ', '.join(selects), params)
+        return list(self.env.cr.fetchone())
+
+    def _count_grouped(self, model, domain, groupby):
+        """Count records per value of ``groupby`` with a single GROUP BY."""
+        counts = {}
+        for group in model.read_group(domain, [groupby], [groupby], lazy=False):
+            value = group[groupby]
+            counts[value[0] if isinstance(value, tuple) else value] = group['__count']
+        return counts
+
+    def _count_by_month(self, model, date_field, periods, domain=None):
+        """Count records per month of ``date_field`` over the given periods,
+        bucketing the dates in the database."""
+        domain = list(domain or []) + [
+            (date_field, '>=', periods[0][1]),
+            (date_field, '<', periods[-1][1] + relativedelta(months=1)),
+        ]
+        from_clause, where_clause, params = self._get_count_query(model, domain)
+        self.env.cr.execute(f"""
+            SELECT date_trunc('month', "{model._table}"."{date_field}")::date, COUNT(*)
+            FROM {from_clause}
+            WHERE {where_clause}
+            GROUP BY 1
+        """, params)
+        counts = dict(self.env.cr.fetchall())
+        return [counts.get(month_start, 0) for __, month_start, __ in periods]
+
+    def _series_from_counts(self, items, counts):
+        """Build labels, data and colors of the non-empty (key, label, color) items."""
+        labels = []
+        data = []
+        colors = []
+        for key, label, color in items:
+            count = counts.get(key, 0)
+            if count > 0:
+                labels.append(label)
+                data.append(count)
+                colors.append(color)
+        return labels, data, colors
+
     # ==========================================
     # UTILITY METHODS
     # ==========================================
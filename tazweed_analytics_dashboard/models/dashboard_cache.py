@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from odoo import models, api
+
+# Models whose writes invalidate cached dashboard payloads, with the
+# sequence used as their cross-worker generation counter.
+DASHBOARD_CACHE_MODELS = {
+    'hr.employee': 'analytics_dashboard_cache_hr_employee',
+    'hr.payslip': 'analytics_dashboard_cache_hr_payslip',
+    'client.request': 'analytics_dashboard_cache_client_request',
+    'hr.service.request': 'analytics_dashboard_cache_hr_service_request',
+    'tazweed.placement': 'analytics_dashboard_cache_tazweed_placement',
+}
+
+# Every dashboard shows the summary and alerts, which read these models.
+DASHBOARD_CACHE_BASE_DEPENDENCIES = (
+    'hr.employee', 'client.request', 'hr.service.request', 'tazweed.placement',
+)
+
+# Additional models read by the charts of a dashboard type.
+DASHBOARD_CACHE_TYPE_DEPENDENCIES = {
+    'payroll': ('hr.payslip',),
+    'custom': tuple(DASHBOARD_CACHE_MODELS),
+}
+
+
+class DashboardCache(object):
+    """Process-wide LRU cache of dashboard payloads with a time to live.
+
+    Entries remember the generations of the models they were computed
+    from; a lookup with different generations is a miss.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, generations):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['expires_at'] > now and entry['generations'] == generations:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, generations, payload, ttl, max_size):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {
+                'payload': payload,
+                'generations': generations,
+                'models': frozenset(generations),
+                'created_at': now,
+                'expires_at': now + ttl,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def evict_models(self, dbname, model_names):
+        """Drop the entries of ``dbname`` depending on any of ``model_names``."""
+        model_names = set(model_names)
+        with self._lock:
+            for key in [
+                key for key, entry in self._entries.items()
+                if key[0] == dbname and entry['models'] & model_names
+            ]:
+                del self._entries[key]
+
+    def clear(self, dbname=None):
+        with self._lock:
+            if dbname is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == dbname]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+DASHBOARD_CACHE = DashboardCache()
+
+
+def _bump_cache_generations(registry, model_names):
+    """Post-commit hook: publish the new generations to all workers."""
+    sequences = [DASHBOARD_CACHE_MODELS[name] for name in model_names]
+    with registry.cursor() as cr:
+        cr.execute("SELECT nextval(seq::regclass) FROM unnest(%s::text[]) AS seq", [sequences])
+    DASHBOARD_CACHE.evict_models(registry.db_name, model_names)
+
+
+class Base(models.AbstractModel):
+    _inherit = 'base'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if self._name in DASHBOARD_CACHE_MODELS:
+            records._invalidate_dashboard_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._name in DASHBOARD_CACHE_MODELS:
+            self._invalidate_dashboard_cache()
+        return res
+
+    def unlink(self):
+        if self._name in DASHBOARD_CACHE_MODELS:
+            self._invalidate_dashboard_cache()
+        return super().unlink()
+
+    def _invalidate_dashboard_cache(self):
+        """Invalidate the dashboards reading this model once the transaction commits."""
+        changed = self.env.cr.postcommit.data.setdefault('analytics_dashboard.cache_models', set())
+        if not changed:
+            self.env.cr.postcommit.add(partial(_bump_cache_generations, self.pool, changed))
+        changed.add(self._name)
+
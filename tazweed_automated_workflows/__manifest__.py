@@ -167,6 +167,7 @@ NEW FEATURES (v3.0.0)
         'views/conditional_logic_views.xml',
         'views/email_templates_views.xml',
         'views/webhook_integration_views.xml',
+        'views/workflow_job_views.xml',
         # Menu
         'views/menu.xml',
     ],
@@ -7,6 +7,9 @@ from .automation_engine import AutomationEngine, WorkflowTriggerEngine, Approval
 from .task_scheduler import TaskScheduler
 from .workflow_engine import WorkflowEngine, WorkflowApproval
 from .notification_dispatcher import NotificationDispatcher
+from .expression_cache import CompiledExpressionCache, EXPRESSION_CACHE
+from .payload_template import PayloadTemplate, compile_template
+from .webhook_delivery import WebhookDeliveryPool, WEBHOOK_DELIVERY_POOL
 
 __all__ = [
     'AutomationEngine',
@@ -16,4 +19,10 @@ __all__ = [
     'WorkflowEngine',
     'WorkflowApproval',
     'NotificationDispatcher',
+    'CompiledExpressionCache',
+    'EXPRESSION_CACHE',
+    'PayloadTemplate',
+    'compile_template',
+    'WebhookDeliveryPool',
+    'WEBHOOK_DELIVERY_POOL',
 ]
@@ -18,7 +18,6 @@ class AutomationEngine:
         """Initialize automation engine"""
         self.env = env
         self.rules = []
-        self.execution_queue = []
         self.running = False
     
     def load_rules(self):
@@ -29,8 +28,12 @@ class AutomationEngine:
         ])
         _logger.info(f'Loaded {len(self.rules)} automation rules')
     
-    def execute_rule(self, rule, record=None):
-        """Execute a single automation rule"""
+    def execute_rule(self, rule, record=None, raise_on_error=False):
+        """Execute a single automation rule.
+        
+        With ``raise_on_error``, condition and action errors are raised
+        instead of being logged, so the caller can roll back and retry.
+        """
         try:
             # Check if rule is active
             if not rule.is_active or rule.state != 'active':
@@ -42,21 +45,23 @@ class AutomationEngine:
                 return False
             
             # Check trigger condition
-            if rule.trigger_condition:
-                try:
-                    if not eval(rule.trigger_condition):
-                        return False
-                except Exception as e:
-                    _logger.error(f'Error evaluating trigger condition: {str(e)}')
+            try:
+                if not rule._check_trigger_condition(record):
                     return False
+            except Exception as e:
+                _logger.error(f'Error evaluating trigger condition: {str(e)}')
+                if raise_on_error:
+                    raise
+                return False
             
             # Execute action
-            if rule.action_code:
-                try:
-                    exec(rule.action_code)
-                except Exception as e:
-                    _logger.error(f'Error executing action code: {str(e)}')
-                    return False
+            try:
+                rule._run_action_code(record)
+            except Exception as e:
+                _logger.error(f'Error executing action code: {str(e)}')
+                if raise_on_error:
+                    raise
+                return False
             
             # Update execution count
             rule.execution_count += 1
@@ -74,6 +79,8 @@ class AutomationEngine:
             return True
         
         except Exception as e:
+            if raise_on_error:
+                raise
             _logger.error(f'Error executing rule {rule.code}: {str(e)}')
             
             rule.last_execution = datetime.now()
@@ -90,11 +97,11 @@ class AutomationEngine:
     
     def execute_rules_for_model(self, model_name, trigger_event, record=None):
         """Execute all rules for a specific model and trigger event"""
-        matching_rules = self.rules.filtered(
-            lambda r: r.trigger_model == model_name and r.trigger_event == trigger_event
-        )
+        rule_ids = self.env['tazweed.workflow.dispatch']._get_rule_ids(model_name, trigger_event)
+        if not rule_ids:
+            return
         
-        for rule in matching_rules:
+        for rule in self.env['tazweed.automation.rule'].browse(rule_ids):
             self.execute_rule(rule, record)
     
     def execute_all_rules(self):
@@ -106,29 +113,20 @@ class AutomationEngine:
     
     def queue_rule_execution(self, rule, record=None, delay_minutes=0):
         """Queue a rule for execution"""
-        execution_time = datetime.now() + timedelta(minutes=delay_minutes)
-        
-        self.execution_queue.append({
-            'rule': rule,
-            'record': record,
-            'execution_time': execution_time,
-            'status': 'queued'
-        })
+        job = self.env['tazweed.workflow.job'].enqueue(
+            'automation_rule',
+            f'Rule {rule.code}',
+            record=record,
+            delay_minutes=delay_minutes,
+            rule_id=rule.id,
+        )
         
-        _logger.info(f'Rule {rule.code} queued for execution at {execution_time}')
+        _logger.info(f'Rule {rule.code} queued for execution at {job.eta}')
+        return job
     
-    def process_queue(self):
+    def process_queue(self, limit=100):
         """Process queued rule executions"""
-        now = datetime.now()
-        
-        for item in self.execution_queue:
-            if item['execution_time'] <= now and item['status'] == 'queued':
-                item['status'] = 'executing'
-                self.execute_rule(item['rule'], item['record'])
-                item['status'] = 'completed'
-        
-        # Remove completed items
-        self.execution_queue = [item for item in self.execution_queue if item['status'] != 'completed']
+        return self.env['tazweed.workflow.job'].process_queue(limit=limit, job_type='automation_rule')
     
     def start(self):
         """Start automation engine"""
@@ -167,11 +165,11 @@ class WorkflowTriggerEngine:
     
     def execute_triggers_for_model(self, model_name, trigger_type, record=None):
         """Execute all triggers for a specific model and trigger type"""
-        matching_triggers = self.triggers.filtered(
-            lambda t: t.trigger_model == model_name and t.trigger_type == trigger_type
-        )
+        trigger_ids = self.env['tazweed.workflow.dispatch']._get_trigger_ids(model_name, trigger_type)
+        if not trigger_ids:
+            return
         
-        for trigger in matching_triggers:
+        for trigger in self.env['tazweed.workflow.trigger'].browse(trigger_ids):
             self.execute_trigger(trigger, record)
     
     def execute_all_triggers(self):
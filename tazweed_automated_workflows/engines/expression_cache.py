@@ -0,0 +1,119 @@
+"""
+Tazweed Automated Workflows - Expression Cache
+Compiled, sandboxed trigger conditions, domains and action code
+"""
+
+from odoo.tools.safe_eval import test_expr, _SAFE_OPCODES, _BUILTINS
+from collections import defaultdict
+import ast
+import threading
+import time
+
+
+class CompiledExpressionCache:
+    """Process-wide cache of compiled rule and trigger expressions.
+
+    Entries are keyed by (database, model, record id, field) and stamped with
+    the record's write_date and source, so a rule edited in another worker is
+    recompiled on its next evaluation. Evaluation timings are counted per
+    record.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._stats = defaultdict(lambda: {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0})
+        self._lock = threading.RLock()
+
+    def _get_entry(self, record, field_name, mode):
+        """Return the (code, literal, error) entry of a field, compiling it if needed."""
+        key = (record.env.cr.dbname, record._name, record.id, field_name)
+        stamp = record.write_date
+        source = (record[field_name] or '').strip()
+        entry = self._entries.get(key)
+        if entry and entry[0] == stamp and entry[1] == source:
+            return entry[2]
+
+        compiled = (None, None, None)
+        if source:
+            try:
+                code = test_expr(source, _SAFE_OPCODES, mode=mode)
+                literal = None
+                if mode == 'eval':
+                    # Constant expressions (most domains) are evaluated once
+                    try:
+                        literal = ast.literal_eval(source)
+                        code = None
+                    except (ValueError, SyntaxError):
+                        pass
+                compiled = (code, literal, None)
+            except Exception as e:
+                compiled = (None, None, e)
+
+        with self._lock:
+            self._entries[key] = (stamp, source, compiled)
+        return compiled
+
+    def evaluate(self, record, field_name, localdict, mode='eval'):
+        """Evaluate an expression field of ``record`` in a sandbox.
+
+        In ``exec`` mode the local dictionary is returned, so the code can
+        publish results through it. An empty field evaluates to None.
+        """
+        code, literal, error = self._get_entry(record, field_name, mode)
+        stats_key = (record.env.cr.dbname, record._name, record.id)
+        start = time.perf_counter()
+        try:
+            if error:
+                raise error
+            if code is None:
+                return literal
+            localdict['__builtins__'] = _BUILTINS
+            result = eval(code, localdict)  # pylint: disable=eval-used
+            return localdict if mode == 'exec' else result
+        except Exception:
+            with self._lock:
+                self._stats[stats_key]['errors'] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self._stats[stats_key]
+                stats['count'] += 1
+                stats['total'] += elapsed
+                stats['max'] = max(stats['max'], elapsed)
+
+    def invalidate(self, records):
+        """Drop the compiled expressions of ``records``."""
+        if not records:
+            return
+        dbname = records.env.cr.dbname
+        ids = set(records.ids)
+        with self._lock:
+            for key in [
+                key for key in self._entries
+                if key[0] == dbname and key[1] == records._name and key[2] in ids
+            ]:
+                del self._entries[key]
+
+    def get_stats(self, record):
+        """Return the evaluation counters of ``record``, times in microseconds."""
+        with self._lock:
+            stats = dict(self._stats.get((record.env.cr.dbname, record._name, record.id)) or {})
+        if not stats:
+            return {'count': 0, 'errors': 0, 'avg_us': 0.0, 'max_us': 0.0}
+        return {
+            'count': stats['count'],
+            'errors': stats['errors'],
+            'avg_us': stats['total'] / stats['count'] * 1e6 if stats['count'] else 0.0,
+            'max_us': stats['max'] * 1e6,
+        }
+
+    def reset_stats(self, records):
+        """Reset the evaluation counters of ``records``."""
+        dbname = records.env.cr.dbname
+        with self._lock:
+            for record_id in records.ids:
+                self._stats.pop((dbname, records._name, record_id), None)
+
+
+EXPRESSION_CACHE = CompiledExpressionCache()
@@ -4,7 +4,7 @@ Manages notification sending and distribution
 """
 
 from odoo import models, fields, api
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 import requests
 import json
@@ -18,7 +18,6 @@ class NotificationDispatcher:
     def __init__(self, env):
         """Initialize notification dispatcher"""
         self.env = env
-        self.notification_queue = []
     
     def send_notification(self, template, record=None, recipients=None, is_async=False):
         """Send notification"""
@@ -43,51 +42,26 @@ class NotificationDispatcher:
     def queue_notification(self, template, variables, recipients=None, delay_minutes=0):
         """Queue notification for later sending"""
         try:
-            send_time = datetime.now() + timedelta(minutes=delay_minutes)
-            
-            notification_item = {
-                'template': template,
-                'variables': variables,
-                'recipients': recipients,
-                'send_time': send_time,
-                'status': 'queued',
-                'attempts': 0
-            }
-            
-            self.notification_queue.append(notification_item)
+            job = self.env['tazweed.workflow.job'].enqueue(
+                'notification',
+                f'Notification {template.name}',
+                delay_minutes=delay_minutes,
+                template_id=template.id,
+                payload={'variables': variables, 'recipients': recipients},
+            )
             
-            _logger.info(f'Notification queued for sending at {send_time}')
+            _logger.info(f'Notification queued for sending at {job.eta}')
             return True
         
         except Exception as e:
             _logger.error(f'Error queuing notification: {str(e)}')
             return False
     
-    def process_queue(self):
+    def process_queue(self, limit=100):
         """Process queued notifications"""
         try:
-            now = datetime.now()
-            
-            for item in self.notification_queue:
-                if item['send_time'] <= now and item['status'] == 'queued':
-                    item['status'] = 'sending'
-                    
-                    # Send notification
-                    if self._send_notification_internal(item):
-                        item['status'] = 'sent'
-                    else:
-                        item['attempts'] += 1
-                        if item['attempts'] < 3:
-                            item['status'] = 'queued'
-                            item['send_time'] = now + timedelta(minutes=5)
-                        else:
-                            item['status'] = 'failed'
-            
-            # Remove sent/failed items
-            self.notification_queue = [item for item in self.notification_queue 
-                                      if item['status'] in ['queued', 'sending']]
-            
-            _logger.info(f'Processed {len(self.notification_queue)} queued notifications')
+            processed = self.env['tazweed.workflow.job'].process_queue(limit=limit, job_type='notification')
+            _logger.info(f'Processed {processed} queued jobs')
             return True
         
         except Exception as e:
@@ -0,0 +1,99 @@
+"""
+Tazweed Automated Workflows - Payload Templates
+Compiled ``${field.path}`` templates rendered for whole record sets
+"""
+
+from collections import defaultdict
+from functools import lru_cache
+import json
+import re
+
+# ${field} or ${relation.relation.field}
+PLACEHOLDER_RE = re.compile(r'\$\{\s*([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*)\s*\}')
+
+
+def _format_value(field, value):
+    """Text of a value returned by ``read``, escaped for a JSON string"""
+    if field.type == 'many2one':
+        text = value[1] if value else ''
+    elif field.type in ('one2many', 'many2many'):
+        text = ','.join(str(item) for item in value)
+    elif field.type == 'boolean':
+        text = str(bool(value))
+    elif value is False or value is None:
+        text = ''
+    else:
+        text = str(value)
+    return json.dumps(text)[1:-1]
+
+
+class PayloadTemplate:
+    """A payload template parsed once into literal text and field paths.
+
+    Values are read with one ``read`` per model along the paths, for all
+    the records at once, so rendering a record set costs a handful of
+    queries whatever its size. Placeholders that are not fields are kept
+    as they are.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        # Literal text at even positions, field paths at odd positions
+        self._parts = PLACEHOLDER_RE.split(source)
+        self.paths = tuple(dict.fromkeys(self._parts[1::2]))
+
+    def read_values(self, records):
+        """Return {record id: {path: text}} for the paths of the template."""
+        return self._read_paths(records, self.paths)
+
+    def _read_paths(self, records, paths):
+        heads = defaultdict(set)
+        for path in paths:
+            head, _, rest = path.partition('.')
+            heads[head].add(rest)
+
+        field_names = [name for name in heads if name in records._fields]
+        rows = records.read(field_names) if records else []
+        values = {row['id']: {} for row in rows}
+
+        for name in field_names:
+            field = records._fields[name]
+            rests = heads[name]
+            if '' in rests:
+                for row in rows:
+                    values[row['id']][name] = _format_value(field, row[name])
+
+            subpaths = rests - {''}
+            if not subpaths or field.type != 'many2one':
+                continue
+            related = records.env[field.comodel_name].browse({row[name][0] for row in rows if row[name]})
+            related_values = self._read_paths(related, subpaths)
+            for row in rows:
+                target = related_values.get(row[name][0], {}) if row[name] else {}
+                for subpath in subpaths:
+                    values[row['id']][f'{name}.{subpath}'] = target.get(subpath, '')
+
+        return values
+
+    def render(self, values=None):
+        """Render the template text with {path: text} values."""
+        values = values or {}
+        parts = list(self._parts)
+        for index in range(1, len(parts), 2):
+            path = parts[index]
+            parts[index] = values[path] if path in values else '${%s}' % path
+        return ''.join(parts)
+
+    def render_many(self, records):
+        """Return {record id: payload} for every record of ``records``."""
+        values = self.read_values(records)
+        return {
+            record_id: json.loads(self.render(values.get(record_id)))
+            for record_id in records.ids
+        }
+
+
+@lru_cache(maxsize=256)
+def compile_template(source):
+    """Return the PayloadTemplate of ``source``, parsed once per process."""
+    return PayloadTemplate(source)
@@ -0,0 +1,191 @@
+"""
+Tazweed Automated Workflows - Webhook Delivery Pool
+Sends outgoing webhook requests with pooled connections and per-endpoint limits
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Threads sending requests in parallel within one delivery batch
+DEFAULT_MAX_WORKERS = 8
+
+# Characters of a response body kept for logging
+MAX_RESPONSE_BODY = 10000
+
+
+@dataclass
+class DeliveryRequest:
+    """One outgoing webhook request, prepared outside the delivery threads"""
+
+    endpoint: tuple
+    method: str
+    url: str
+    headers: dict = field(default_factory=dict)
+    auth: tuple = None
+    params: dict = None
+    json: object = None
+    data: object = None
+    timeout: float = 30
+    expected_status_codes: tuple = (200, 201, 202)
+    max_concurrency: int = 4
+    rate_limit: float = 0.0
+
+
+@dataclass
+class DeliveryResult:
+    """Outcome of a delivery, usable where a ``requests`` response was expected"""
+
+    status_code: int = None
+    text: str = None
+    headers: dict = None
+    response_time: float = 0.0
+    error: str = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def json(self):
+        return json.loads(self.text or 'null')
+
+
+class EndpointLimiter:
+    """Concurrency slots and a token bucket shared by the requests of one endpoint"""
+
+    def __init__(self, max_concurrency, rate_limit):
+        self.max_concurrency = max(max_concurrency or 1, 1)
+        self.rate_limit = rate_limit or 0.0
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._tokens = max(self.rate_limit, 1.0)
+        self._updated = time.monotonic()
+
+    def acquire(self):
+        """Wait for a free slot, then for a token when the endpoint is rate limited."""
+        self._slots.acquire()
+        if not self.rate_limit:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                capacity = max(self.rate_limit, 1.0)
+                self._tokens = min(capacity, self._tokens + (now - self._updated) * self.rate_limit)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate_limit
+            time.sleep(wait)
+
+    def release(self):
+        self._slots.release()
+
+
+class WebhookDeliveryPool:
+    """Process-wide pool of HTTP sessions and endpoint limiters.
+
+    Each endpoint keeps a ``requests.Session`` whose connections stay alive
+    between batches. ``deliver`` sends a batch on a bounded thread pool and
+    never touches the database, so it can run without holding a transaction.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_process(self):
+        """Drop the sessions inherited from a parent process after a fork."""
+        if self._pid != os.getpid():
+            self._sessions = {}
+            self._limiters = {}
+            self._pid = os.getpid()
+
+    def _get_session(self, request):
+        with self._lock:
+            self._check_process()
+            session = self._sessions.get(request.endpoint)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=max(request.max_concurrency or 1, 1),
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[request.endpoint] = session
+            return session
+
+    def _get_limiter(self, request):
+        with self._lock:
+            self._check_process()
+            limiter = self._limiters.get(request.endpoint)
+            if (
+                limiter is None
+                or limiter.max_concurrency != max(request.max_concurrency or 1, 1)
+                or limiter.rate_limit != (request.rate_limit or 0.0)
+            ):
+                limiter = EndpointLimiter(request.max_concurrency, request.rate_limit)
+                self._limiters[request.endpoint] = limiter
+            return limiter
+
+    def send(self, request):
+        """Send one request and return its DeliveryResult, never raising."""
+        session = self._get_session(request)
+        limiter = self._get_limiter(request)
+        limiter.acquire()
+        start = time.perf_counter()
+        try:
+            response = session.request(
+                method=request.method,
+                url=request.url,
+                headers=request.headers,
+                auth=request.auth,
+                params=request.params,
+                json=request.json,
+                data=request.data,
+                timeout=request.timeout,
+            )
+            result = DeliveryResult(
+                status_code=response.status_code,
+                text=response.text[:MAX_RESPONSE_BODY],
+                headers=dict(response.headers),
+            )
+            if response.status_code not in request.expected_status_codes:
+                result.error = f'Unexpected status code: {response.status_code}'
+        except Exception as e:
+            result = DeliveryResult(error=str(e))
+        finally:
+            limiter.release()
+        result.response_time = (time.perf_counter() - start) * 1000
+        return result
+
+    def deliver(self, delivery_requests, max_workers=DEFAULT_MAX_WORKERS):
+        """Send a batch of requests in parallel and return the results in order."""
+        if not delivery_requests:
+            return []
+        if len(delivery_requests) == 1:
+            return [self.send(delivery_requests[0])]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(delivery_requests))) as executor:
+            return list(executor.map(self.send, delivery_requests))
+
+    def close(self, endpoint=None):
+        """Close the pooled connections of one endpoint, or of all of them."""
+        with self._lock:
+            endpoints = [endpoint] if endpoint else list(self._sessions)
+            for key in endpoints:
+                session = self._sessions.pop(key, None)
+                if session:
+                    session.close()
+                self._limiters.pop(key, None)
+
+
+WEBHOOK_DELIVERY_POOL = WebhookDeliveryPool()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from . import workflow_dispatch
 from . import workflow_definition
 from . import workflow_instance
 from . import workflow_trigger
@@ -13,3 +14,4 @@ from . import visual_workflow_designer
 from . import conditional_logic
 from . import email_templates
 from . import webhook_integration
+from . import workflow_job_queue
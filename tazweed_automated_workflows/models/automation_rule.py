@@ -4,10 +4,13 @@ Defines automated actions and rules
 """
 
 from odoo import models, fields, api
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import logging
 
+from ..engines.expression_cache import EXPRESSION_CACHE
+from .workflow_dispatch import RULE_DISPATCH_FIELDS
+
 _logger = logging.getLogger(__name__)
 
 
@@ -118,6 +121,12 @@ class AutomationRule(models.Model):
         readonly=True
     )
     
+    # Evaluation counters of the compiled condition and action (current worker)
+    evaluation_count = fields.Integer('Evaluations', compute='_compute_evaluation_stats')
+    evaluation_errors = fields.Integer('Evaluation Errors', compute='_compute_evaluation_stats')
+    evaluation_avg_time = fields.Float('Avg Evaluation Time (µs)', compute='_compute_evaluation_stats')
+    evaluation_max_time = fields.Float('Max Evaluation Time (µs)', compute='_compute_evaluation_stats')
+    
     # ============================================================
     # Audit Trail
     # ============================================================
@@ -133,7 +142,57 @@ class AutomationRule(models.Model):
     def create(self, vals):
         """Create automation rule"""
         vals['created_by'] = self.env.user.id
-        return super().create(vals)
+        rule = super().create(vals)
+        self.env['tazweed.workflow.dispatch']._invalidate_dispatch_table()
+        return rule
+    
+    def write(self, vals):
+        """Update automation rule"""
+        res = super().write(vals)
+        if 'trigger_condition' in vals or 'action_code' in vals:
+            EXPRESSION_CACHE.invalidate(self)
+        if RULE_DISPATCH_FIELDS.intersection(vals):
+            self.env['tazweed.workflow.dispatch']._invalidate_dispatch_table()
+        return res
+    
+    def unlink(self):
+        """Delete automation rule"""
+        EXPRESSION_CACHE.invalidate(self)
+        EXPRESSION_CACHE.reset_stats(self)
+        res = super().unlink()
+        self.env['tazweed.workflow.dispatch']._invalidate_dispatch_table()
+        return res
+    
+    def _compute_evaluation_stats(self):
+        for rule in self:
+            stats = EXPRESSION_CACHE.get_stats(rule)
+            rule.evaluation_count = stats['count']
+            rule.evaluation_errors = stats['errors']
+            rule.evaluation_avg_time = stats['avg_us']
+            rule.evaluation_max_time = stats['max_us']
+    
+    def _get_eval_context(self, record=None):
+        """Variables available to the trigger condition and action code"""
+        return {
+            'env': self.env,
+            'rule': self,
+            'record': record,
+            'datetime': datetime,
+            'timedelta': timedelta,
+        }
+    
+    def _check_trigger_condition(self, record=None):
+        """Evaluate the compiled trigger condition (True when empty)"""
+        self.ensure_one()
+        if not self.trigger_condition:
+            return True
+        return bool(EXPRESSION_CACHE.evaluate(self, 'trigger_condition', self._get_eval_context(record)))
+    
+    def _run_action_code(self, record=None):
+        """Run the compiled action code in a sandbox"""
+        self.ensure_one()
+        if self.action_code:
+            EXPRESSION_CACHE.evaluate(self, 'action_code', self._get_eval_context(record), mode='exec')
     
     def action_activate(self):
         """Activate rule"""
@@ -173,8 +232,7 @@ class AutomationRule(models.Model):
         """Test rule execution"""
         try:
             # Execute action code
-            if self.action_code:
-                exec(self.action_code)
+            self._run_action_code()
             
             # Log execution
             self.env['tazweed.automation.execution.log'].create({
@@ -223,13 +281,11 @@ class AutomationRule(models.Model):
                 return False
             
             # Check trigger condition
-            if self.trigger_condition:
-                if not eval(self.trigger_condition):
-                    return False
+            if not self._check_trigger_condition(record):
+                return False
             
             # Execute action
-            if self.action_code:
-                exec(self.action_code)
+            self._run_action_code(record)
             
             # Update execution count
             self.execution_count += 1
@@ -1,12 +1,17 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api
 from odoo.exceptions import UserError, ValidationError
+from collections import defaultdict
 import json
 import hashlib
 import hmac
-import requests
 import logging
 
+from ..engines.payload_template import compile_template
+from ..engines.webhook_delivery import (
+    DeliveryRequest, DeliveryResult, WEBHOOK_DELIVERY_POOL, DEFAULT_MAX_WORKERS,
+)
+
 _logger = logging.getLogger(__name__)
 
 
@@ -117,6 +122,12 @@ class WorkflowWebhook(models.Model):
     # Timeout
     timeout = fields.Integer(string='Timeout (seconds)', default=30)
     
+    # Delivery Limits
+    max_concurrency = fields.Integer(string='Max Concurrent Requests', default=4,
+                                     help='Requests sent to this endpoint at the same time')
+    rate_limit = fields.Float(string='Rate Limit (requests/second)', default=0,
+                              help='Leave 0 for no limit')
+    
     # Response Handling
     expected_status_codes = fields.Char(string='Expected Status Codes', default='200,201,202')
     response_handling = fields.Selection([
@@ -170,29 +181,36 @@ class WorkflowWebhook(models.Model):
         test_payload = {'test': True, 'message': 'Webhook test from Tazweed'}
         
         try:
-            response = self._send_request(test_payload)
+            result = self._send_request(test_payload)
+        except Exception as e:
+            result = DeliveryResult(error=str(e))
+        
+        if result.ok:
             return {
                 'type': 'ir.actions.client',
                 'tag': 'display_notification',
                 'params': {
                     'title': 'Webhook Test',
-                    'message': f'Test successful! Status: {response.status_code}',
+                    'message': f'Test successful! Status: {result.status_code}',
                     'type': 'success',
                 }
             }
-        except Exception as e:
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': 'Webhook Test Failed',
-                    'message': str(e),
-                    'type': 'danger',
-                }
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Webhook Test Failed',
+                'message': result.error,
+                'type': 'danger',
             }
+        }
     
     def execute(self, record=None, context=None):
-        """Execute the webhook"""
+        """Queue the webhook for delivery.
+        
+        The request is sent by the job queue once the current transaction
+        commits, so a slow receiver never delays the triggering save.
+        """
         self.ensure_one()
         
         if self.state != 'active':
@@ -202,63 +220,103 @@ class WorkflowWebhook(models.Model):
         # Build payload
         payload = self._build_payload(record, context)
         
-        # Send request
-        try:
-            response = self._send_request(payload)
-            self._log_call(payload, response, 'success')
-            
-            # Process response if needed
-            if self.response_handling == 'process':
-                self._process_response(response, record)
-            
-            return True
-        except Exception as e:
-            self._log_call(payload, None, 'error', str(e))
-            
-            if self.retry_enabled:
-                self._schedule_retry(payload, 1)
-            
+        self.env['tazweed.workflow.job'].enqueue(
+            'webhook',
+            f'Webhook: {self.name}',
+            record=record if isinstance(record, models.BaseModel) else None,
+            webhook_id=self.id,
+            payload={'body': json.loads(json.dumps(payload, default=str))},
+            max_attempts=self.max_retries + 1 if self.retry_enabled else 1,
+        )
+        self._trigger_delivery()
+        
+        return True
+    
+    def execute_many(self, records, context=None):
+        """Queue one delivery per record, rendering all the payloads at once"""
+        self.ensure_one()
+        
+        if self.state != 'active':
+            _logger.warning(f"Webhook {self.name} is not active")
             return False
+        
+        payloads = self._build_payloads(records, context)
+        max_attempts = self.max_retries + 1 if self.retry_enabled else 1
+        self.env['tazweed.workflow.job'].sudo().create([{
+            'name': f'Webhook: {self.name}',
+            'job_type': 'webhook',
+            'webhook_id': self.id,
+            'res_model': records._name,
+            'res_id': record_id,
+            'payload': {'body': json.loads(json.dumps(payloads[record_id], default=str))},
+            'max_attempts': max_attempts,
+        } for record_id in records.ids])
+        self._trigger_delivery()
+        
+        return True
+    
+    def _trigger_delivery(self):
+        """Wake up the job queue cron when the transaction commits"""
+        cron = self.env.ref('tazweed_automated_workflows.cron_process_job_queue', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
     
     def _build_payload(self, record, context=None):
         """Build the webhook payload"""
-        context = context or {}
+        if isinstance(record, models.BaseModel) and record:
+            return self._build_payloads(record, context)[record.id]
         
-        if self.payload_type == 'full_record' and record:
-            return record.read()[0] if hasattr(record, 'read') else {}
-        elif self.payload_type == 'selected_fields' and record:
-            field_names = self.selected_field_ids.mapped('name')
-            return record.read(field_names)[0] if hasattr(record, 'read') else {}
-        elif self.payload_type == 'custom':
+        if self.payload_type == 'custom':
             return json.loads(self.custom_payload or '{}')
         elif self.payload_type == 'template':
-            return self._render_template(record, context)
+            return self._render_template(None, context)
         
         return {}
     
+    def _build_payloads(self, records, context=None):
+        """Build the payloads of a record set, as {record id: payload}"""
+        if self.payload_type == 'full_record':
+            return {row['id']: row for row in records.read()}
+        elif self.payload_type == 'selected_fields':
+            field_names = self.selected_field_ids.mapped('name')
+            return {row['id']: row for row in records.read(field_names)}
+        elif self.payload_type == 'custom':
+            payload = json.loads(self.custom_payload or '{}')
+            return {record_id: dict(payload) for record_id in records.ids}
+        elif self.payload_type == 'template':
+            return self._render_templates(records, context)
+        
+        return {record_id: {} for record_id in records.ids}
+    
     def _render_template(self, record, context):
         """Render payload template"""
         if not self.payload_template:
             return {}
         
-        # Simple template rendering
-        template = self.payload_template
         if record:
-            for field_name in dir(record):
-                if not field_name.startswith('_'):
-                    try:
-                        value = getattr(record, field_name)
-                        if not callable(value):
-                            template = template.replace(f'${{{field_name}}}', str(value))
-                    except:
-                        pass
+            return self._render_templates(record, context)[record.id]
+        return json.loads(compile_template(self.payload_template).render())
+    
+    def _render_templates(self, records, context=None):
+        """Render the payload template for a record set.
         
-        return json.loads(template)
+        Only the fields referenced by ``${field.path}`` placeholders are
+        read, in one batched read per model along the paths.
+        """
+        if not self.payload_template:
+            return {record_id: {} for record_id in records.ids}
+        return compile_template(self.payload_template).render_many(records)
     
     def _send_request(self, payload):
-        """Send the HTTP request"""
-        headers = self._build_headers(payload)
-        auth = self._build_auth()
+        """Send the HTTP request right away through the delivery pool"""
+        self.ensure_one()
+        result = WEBHOOK_DELIVERY_POOL.send(self._prepare_delivery(payload))
+        self._add_call_stats({self.id: [result]})
+        return result
+    
+    def _prepare_delivery(self, payload):
+        """Build the delivery request sending ``payload`` to this webhook"""
+        self.ensure_one()
         
         # Prepare payload
         if self.content_type == 'application/json':
@@ -268,30 +326,120 @@ class WorkflowWebhook(models.Model):
             data = payload
             json_data = None
         
-        response = requests.request(
+        params = None
+        if self.auth_type == 'api_key' and self.api_key_location == 'query':
+            params = {self.api_key_name: self.api_key_value}
+        
+        return DeliveryRequest(
+            endpoint=(self.env.cr.dbname, self.id),
             method=self.method,
             url=self.url,
-            headers=headers,
-            auth=auth,
+            headers=self._build_headers(payload),
+            auth=self._build_auth(),
+            params=params,
             json=json_data,
             data=data,
-            timeout=self.timeout
+            timeout=self.timeout or 30,
+            expected_status_codes=tuple(
+                int(c.strip()) for c in (self.expected_status_codes or '200').split(',') if c.strip()
+            ),
+            max_concurrency=self.max_concurrency,
+            rate_limit=self.rate_limit,
+        )
+    
+    @api.model
+    def _deliver_jobs(self, jobs):
+        """Send claimed webhook jobs and record their outcome.
+        
+        Requests are prepared first and then sent in parallel by the delivery
+        pool, which does not touch the database. Logs, job states and
+        statistics are written in bulk afterwards.
+        """
+        pending = []
+        for job in jobs:
+            webhook = job.webhook_id
+            if not webhook:
+                job._handle_failure('Webhook no longer exists')
+                continue
+            if webhook.state != 'active':
+                job._handle_failure(f'Webhook {webhook.name} is not active')
+                continue
+            try:
+                pending.append((job, webhook._prepare_delivery((job.payload or {}).get('body') or {})))
+            except Exception as e:
+                job._handle_failure(str(e))
+        
+        results = WEBHOOK_DELIVERY_POOL.deliver(
+            [request for job, request in pending], max_workers=DEFAULT_MAX_WORKERS,
         )
         
-        # Check status code
-        expected_codes = [int(c.strip()) for c in self.expected_status_codes.split(',')]
-        if response.status_code not in expected_codes:
-            raise Exception(f"Unexpected status code: {response.status_code}")
-        
-        # Update statistics
-        self.sudo().write({
-            'total_calls': self.total_calls + 1,
-            'successful_calls': self.successful_calls + 1,
-            'last_call_date': fields.Datetime.now(),
-            'last_status_code': response.status_code,
+        log_vals = []
+        stats = defaultdict(list)
+        done_jobs = jobs.browse()
+        for (job, request), result in zip(pending, results):
+            webhook = job.webhook_id
+            stats[webhook.id].append(result)
+            body = (job.payload or {}).get('body')
+            
+            if result.ok:
+                vals = webhook._prepare_log_vals(body, result, 'success', job.attempts - 1)
+                log_vals.append(vals)
+                done_jobs |= job
+                
+                # Process response if needed; the call went out, so a failure
+                # here is only logged and must not cause a second delivery
+                if webhook.response_handling == 'process' and job.res_model in self.env:
+                    record = self.env[job.res_model].browse(job.res_id).exists()
+                    try:
+                        with self.env.cr.savepoint():
+                            webhook._process_response(result, record)
+                    except Exception as e:
+                        _logger.exception(f'Webhook {webhook.name}: response processing failed for job {job.id}')
+                        vals['error_message'] = f'Response processing failed: {e}'
+            else:
+                status = 'error' if job.attempts >= job.max_attempts else 'retry'
+                log_vals.append(webhook._prepare_log_vals(body, result, status, job.attempts - 1))
+                job._handle_failure(result.error)
+        
+        done_jobs.write({
+            'state': 'done',
+            'done_date': fields.Datetime.now(),
+            'last_error': False,
         })
+        self.env['workflow.webhook.log'].create(log_vals)
+        self._add_call_stats(stats)
+        return len(done_jobs)
+    
+    @api.model
+    def _add_call_stats(self, results_by_webhook):
+        """Add delivery results to the webhook statistics in a single query"""
+        if not results_by_webhook:
+            return
         
-        return response
+        stats_fields = ['total_calls', 'successful_calls', 'failed_calls', 'last_call_date', 'last_status_code']
+        self.flush_model(stats_fields)
+        
+        webhook_ids = list(results_by_webhook)
+        results = [results_by_webhook[webhook_id] for webhook_id in webhook_ids]
+        self.env.cr.execute("""
+            UPDATE workflow_webhook AS w
+            SET total_calls = COALESCE(w.total_calls, 0) + v.total,
+                successful_calls = COALESCE(w.successful_calls, 0) + v.success,
+                failed_calls = COALESCE(w.failed_calls, 0) + v.failed,
+                last_call_date = %s,
+                last_status_code = v.status_code
+            FROM unnest(%s::int[], %s::int[], %s::int[], %s::int[], %s::int[])
+                AS v(id, total, success, failed, status_code)
+            WHERE w.id = v.id
+        """, (
+            fields.Datetime.now(),
+            webhook_ids,
+            [len(items) for items in results],
+            [sum(1 for r in items if r.ok) for items in results],
+            [sum(1 for r in items if not r.ok) for items in results],
+            [items[-1].status_code for items in results],
+        ))
+        self.invalidate_model(stats_fields)
     
     def _build_headers(self, payload):
         """Build request headers"""
@@ -356,28 +504,25 @@ class WorkflowWebhook(models.Model):
         except:
             pass
     
-    def _log_call(self, payload, response, status, error_message=None):
-        """Log the webhook call"""
-        self.env['workflow.webhook.log'].create({
+    def _prepare_log_vals(self, payload, result, status, retry_attempt=0):
+        """Values of the log of one webhook call"""
+        return {
             'webhook_id': self.id,
             'request_payload': json.dumps(payload, default=str),
-            'response_body': response.text if response else None,
-            'status_code': response.status_code if response else None,
+            'response_body': result.text if result else None,
+            'status_code': result.status_code if result else None,
             'status': status,
-            'error_message': error_message,
-        })
+            'error_message': result.error if result else None,
+            'response_time': result.response_time if result else 0.0,
+            'retry_attempt': retry_attempt,
+        }
     
-    def _schedule_retry(self, payload, attempt):
-        """Schedule a retry"""
-        if attempt > self.max_retries:
-            return
-        
+    def _get_retry_delay(self, attempt):
+        """Seconds to wait before retrying after failed attempt number ``attempt``"""
         delay = self.retry_delay
         if self.retry_backoff == 'exponential':
             delay = self.retry_delay * (2 ** (attempt - 1))
-        
-        # Schedule retry using ir.cron or queue job
-        # Implementation depends on available job queue system
+        return delay
 
 
 class WorkflowWebhookHeader(models.Model):
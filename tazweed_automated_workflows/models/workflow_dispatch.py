@@ -0,0 +1,81 @@
+"""
+Tazweed Automated Workflows - Event Dispatch Index
+Maps (model, event) to the automation rules and workflow triggers to run
+"""
+
+from odoo import models, api, tools
+from odoo.tools import frozendict
+from collections import defaultdict
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Fields whose change alters the dispatch table
+RULE_DISPATCH_FIELDS = {'is_active', 'state', 'trigger_model', 'trigger_event'}
+TRIGGER_DISPATCH_FIELDS = {'is_active', 'trigger_model', 'model_id', 'trigger_type', 'sequence', 'name'}
+
+
+class WorkflowDispatch(models.AbstractModel):
+    """Workflow Event Dispatch Index"""
+
+    _name = 'tazweed.workflow.dispatch'
+    _description = 'Workflow Event Dispatch'
+
+    def _register_hook(self):
+        """Build the dispatch table when the registry loads."""
+        super()._register_hook()
+        self._get_dispatch_table()
+
+    @api.model
+    @tools.ormcache()
+    def _get_dispatch_table(self):
+        """Return the dispatch table and the set of models having any entry.
+
+        The table maps (model, event) to a tuple of pre-sorted rule ids and a
+        tuple of pre-sorted trigger ids. It lives in the registry cache, so
+        clearing it signals every worker to rebuild it.
+        """
+        rule_ids = defaultdict(list)
+        trigger_ids = defaultdict(list)
+
+        rules = self.env['tazweed.automation.rule'].sudo().search_read([
+            ('is_active', '=', True),
+            ('state', '=', 'active'),
+            ('trigger_model', '!=', False),
+        ], ['trigger_model', 'trigger_event'], order='id')
+        for rule in rules:
+            rule_ids[(rule['trigger_model'], rule['trigger_event'])].append(rule['id'])
+
+        triggers = self.env['tazweed.workflow.trigger'].sudo().search_read([
+            ('is_active', '=', True),
+        ], ['model_name', 'trigger_model', 'trigger_type'])
+        for trigger in triggers:
+            for model_name in {trigger['model_name'], trigger['trigger_model']} - {False}:
+                trigger_ids[(model_name, trigger['trigger_type'])].append(trigger['id'])
+
+        table = frozendict({
+            key: (tuple(rule_ids.get(key, ())), tuple(trigger_ids.get(key, ())))
+            for key in set(rule_ids) | set(trigger_ids)
+        })
+        _logger.info(f'Built workflow dispatch table: {len(rules)} rules, {len(triggers)} triggers')
+        return table, frozenset(model_name for model_name, event in table)
+
+    @api.model
+    def _has_dispatch(self, model_name):
+        """Whether any rule or trigger listens to ``model_name``."""
+        return model_name in self._get_dispatch_table()[1]
+
+    @api.model
+    def _get_rule_ids(self, model_name, event):
+        """Return the ids of the active rules for (model, event), in execution order."""
+        return self._get_dispatch_table()[0].get((model_name, event), ((), ()))[0]
+
+    @api.model
+    def _get_trigger_ids(self, model_name, event):
+        """Return the ids of the active triggers for (model, event), in execution order."""
+        return self._get_dispatch_table()[0].get((model_name, event), ((), ()))[1]
+
+    @api.model
+    def _invalidate_dispatch_table(self):
+        """Drop the dispatch table in every worker."""
+        self.clear_caches()
@@ -74,8 +74,9 @@ class WorkflowExecutionLog(models.Model):
     # Methods
     # ============================================================
     
-    @api.model
-    def create(self, vals):
-        """Create execution log"""
-        vals['executed_by'] = self.env.user.id
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Create execution logs"""
+        for vals in vals_list:
+            vals['executed_by'] = self.env.user.id
+        return super().create(vals_list)
@@ -6,11 +6,15 @@ Runtime instances of workflow definitions with SLA and escalation
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
-from datetime import datetime, timedelta
+from collections import defaultdict
+from datetime import timedelta
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# States whose SLA status moves with time
+SLA_TRACKED_STATES = ('pending', 'in_progress', 'escalated')
+
 
 class WorkflowInstance(models.Model):
     """Workflow Instance - Runtime execution of a workflow"""
@@ -175,6 +179,36 @@ class WorkflowInstance(models.Model):
     )
     escalation_date = fields.Datetime(string='Escalation Date')
     
+    # ============================================================
+    # Deadline Index
+    # ============================================================
+    
+    sla_deadline = fields.Datetime(
+        string='Next SLA Check',
+        compute='_compute_deadlines',
+        store=True,
+        index=True,
+        help='When the SLA status changes next'
+    )
+    escalation_deadline = fields.Datetime(
+        string='Escalation Deadline',
+        compute='_compute_deadlines',
+        store=True,
+        index=True
+    )
+    auto_approve_deadline = fields.Datetime(
+        string='Auto Approve Deadline',
+        compute='_compute_deadlines',
+        store=True,
+        index=True
+    )
+    timeout_deadline = fields.Datetime(
+        string='Timeout Deadline',
+        compute='_compute_deadlines',
+        store=True,
+        index=True
+    )
+    
     # ============================================================
     # Comments & Notes
     # ============================================================
@@ -266,25 +300,59 @@ class WorkflowInstance(models.Model):
     def _compute_sla_status(self):
         now = fields.Datetime.now()
         for record in self:
-            if not record.workflow_id or not record.workflow_id.sla_enabled:
-                record.sla_status = 'not_applicable'
-            elif record.state in ('approved', 'rejected', 'cancelled'):
-                if record.completion_date and record.due_date:
-                    if record.completion_date <= record.due_date:
-                        record.sla_status = 'compliant'
-                    else:
-                        record.sla_status = 'breached'
-                else:
-                    record.sla_status = 'compliant'
-            elif record.due_date:
-                if now > record.due_date:
-                    record.sla_status = 'breached'
-                elif record.workflow_id.response_time_hours and now > record.due_date - timedelta(hours=record.workflow_id.response_time_hours / 2):
-                    record.sla_status = 'at_risk'
-                else:
-                    record.sla_status = 'compliant'
-            else:
-                record.sla_status = 'not_applicable'
+            record.sla_status = record._get_sla_status(now)
+    
+    def _get_sla_status(self, now):
+        """SLA status of the instance at ``now``"""
+        self.ensure_one()
+        if not self.workflow_id or not self.workflow_id.sla_enabled:
+            return 'not_applicable'
+        elif self.state in ('approved', 'rejected', 'cancelled'):
+            if self.completion_date and self.due_date:
+                if self.completion_date <= self.due_date:
+                    return 'compliant'
+                return 'breached'
+            return 'compliant'
+        elif self.due_date:
+            if now > self.due_date:
+                return 'breached'
+            elif self.workflow_id.response_time_hours and now > self.due_date - timedelta(hours=self.workflow_id.response_time_hours / 2):
+                return 'at_risk'
+            return 'compliant'
+        return 'not_applicable'
+    
+    @api.depends(
+        'state', 'create_date', 'due_date', 'sla_status', 'is_escalated',
+        'workflow_id.sla_enabled', 'workflow_id.response_time_hours',
+        'workflow_id.escalation_enabled', 'workflow_id.auto_approve_days',
+        'workflow_id.timeout_days', 'workflow_id.allow_cancellation',
+    )
+    def _compute_deadlines(self):
+        """Store when each cron has work to do on the instance"""
+        for record in self:
+            workflow = record.workflow_id
+            sla_deadline = escalation_deadline = auto_approve_deadline = timeout_deadline = False
+            
+            if record.state in SLA_TRACKED_STATES and workflow.sla_enabled and record.due_date:
+                # Next SLA status change: at risk, then breached
+                if record.sla_status == 'at_risk' or not workflow.response_time_hours:
+                    sla_deadline = record.due_date
+                elif record.sla_status != 'breached':
+                    sla_deadline = record.due_date - timedelta(hours=workflow.response_time_hours / 2)
+                
+                if record.state != 'escalated' and not record.is_escalated and workflow.escalation_enabled:
+                    escalation_deadline = record.due_date
+            
+            if record.create_date:
+                if record.state == 'pending' and workflow.auto_approve_days:
+                    auto_approve_deadline = record.create_date + timedelta(days=workflow.auto_approve_days)
+                if record.state in ('draft', 'pending', 'in_progress') and workflow.timeout_days and workflow.allow_cancellation:
+                    timeout_deadline = record.create_date + timedelta(days=workflow.timeout_days)
+            
+            record.sla_deadline = sla_deadline
+            record.escalation_deadline = escalation_deadline
+            record.auto_approve_deadline = auto_approve_deadline
+            record.timeout_deadline = timeout_deadline
     
     @api.depends('first_response_date', 'create_date')
     def _compute_response_time(self):
@@ -352,8 +420,7 @@ class WorkflowInstance(models.Model):
                     'tazweed.workflow.instance'
                 ) or _('New')
         records = super().create(vals_list)
-        for record in records:
-            record._log_action('created', 'Workflow instance created')
+        records._log_action('created', 'Workflow instance created')
         return records
     
     # ============================================================
@@ -362,15 +429,15 @@ class WorkflowInstance(models.Model):
     
     def action_start(self):
         """Start the workflow"""
+        if any(record.state != 'draft' for record in self):
+            raise UserError(_('Only draft workflows can be started.'))
+        
+        self.write({
+            'state': 'pending',
+            'start_date': fields.Datetime.now(),
+        })
+        
         for record in self:
-            if record.state != 'draft':
-                raise UserError(_('Only draft workflows can be started.'))
-            
-            record.write({
-                'state': 'pending',
-                'start_date': fields.Datetime.now(),
-            })
-            
             # Set first step
             first_step = record.workflow_id.step_ids.filtered(
                 lambda s: s.is_start or s.step_type == 'start'
@@ -384,8 +451,8 @@ class WorkflowInstance(models.Model):
             # Send notifications
             if record.workflow_id.notify_on_start:
                 record._send_notification('start')
-            
-            record._log_action('started', 'Workflow started')
+        
+        self._log_action('started', 'Workflow started')
         
         return True
     
@@ -473,6 +540,12 @@ class WorkflowInstance(models.Model):
         if self.state in ('approved', 'rejected', 'cancelled'):
             raise UserError(_('Cannot cancel a completed workflow.'))
         
+        self._cancel(reason)
+        
+        return True
+    
+    def _cancel(self, reason=None):
+        """Cancel a set of instances with bulk writes"""
         self.write({
             'state': 'cancelled',
             'cancellation_reason': reason,
@@ -484,8 +557,6 @@ class WorkflowInstance(models.Model):
         ).write({'state': 'cancelled'})
         
         self._log_action('cancelled', 'Workflow cancelled', reason)
-        
-        return True
     
     def action_hold(self):
         """Put workflow on hold"""
@@ -518,32 +589,47 @@ class WorkflowInstance(models.Model):
         if not self.workflow_id.escalation_enabled:
             raise UserError(_('Escalation is not enabled for this workflow.'))
         
-        self.escalation_level += 1
-        self.is_escalated = True
-        self.escalation_date = fields.Datetime.now()
-        self.state = 'escalated'
+        self._escalate()
         
-        rule = self.workflow_id.escalation_rule_ids.filtered(
-            lambda r: r.level == self.escalation_level
-        )[:1]
+        return True
+    
+    def _escalate(self):
+        """Escalate a set of instances, with one write per escalation level"""
+        now = fields.Datetime.now()
+        by_level = defaultdict(lambda: self.browse())
+        for record in self:
+            by_level[record.escalation_level + 1] |= record
+        
+        for level, instances in by_level.items():
+            instances.write({
+                'escalation_level': level,
+                'is_escalated': True,
+                'escalation_date': now,
+                'state': 'escalated',
+            })
         
-        if rule:
-            self.escalated_to_ids = rule.escalate_to_ids
+        approval_vals = []
+        for record in self:
+            rule = record.workflow_id.escalation_rule_ids.filtered(
+                lambda r: r.level == record.escalation_level
+            )[:1]
             
-            for user in rule.escalate_to_ids:
-                self.env['tazweed.workflow.approval'].create({
-                    'instance_id': self.id,
+            if rule:
+                record.escalated_to_ids = rule.escalate_to_ids
+                approval_vals += [{
+                    'instance_id': record.id,
                     'approver_id': user.id,
-                    'level': self.current_approval_level,
+                    'level': record.current_approval_level,
                     'is_escalation': True,
-                })
-        
-        if self.workflow_id.notify_on_escalation:
-            self._send_notification('escalation')
+                } for user in rule.escalate_to_ids]
+            
+            if record.workflow_id.notify_on_escalation:
+                record._send_notification('escalation')
         
-        self._log_action('escalated', f'Escalated to level {self.escalation_level}')
+        self.env['tazweed.workflow.approval'].create(approval_vals)
         
-        return True
+        for level, instances in by_level.items():
+            instances._log_action('escalated', f'Escalated to level {level}')
     
     # ============================================================
     # Helper Methods
@@ -597,8 +683,6 @@ class WorkflowInstance(models.Model):
     
     def _complete_workflow(self, final_state, reason=None):
         """Complete the workflow"""
-        self.ensure_one()
-        
         vals = {
             'state': final_state,
             'completion_date': fields.Datetime.now(),
@@ -609,8 +693,8 @@ class WorkflowInstance(models.Model):
         
         self.write(vals)
         
-        if self.workflow_id.notify_on_completion:
-            self._send_notification('completion')
+        for record in self.filtered(lambda r: r.workflow_id.notify_on_completion):
+            record._send_notification('completion')
     
     def _send_notification(self, event_type):
         """Send notification for workflow event"""
@@ -624,19 +708,20 @@ class WorkflowInstance(models.Model):
             template.send_notification(self)
     
     def _log_action(self, action, description, comment=None):
-        """Log workflow action"""
-        self.ensure_one()
-        
-        log_vals = {
-            'instance_id': self.id,
-            'action': action,
-            'description': description,
-            'executed_by': self.env.user.id,
-        }
-        if comment:
-            log_vals['additional_data'] = {'comment': comment}
+        """Log workflow action, with one log per instance"""
+        vals_list = []
+        for record in self:
+            log_vals = {
+                'instance_id': record.id,
+                'action': action,
+                'description': description,
+                'executed_by': self.env.user.id,
+            }
+            if comment:
+                log_vals['additional_data'] = {'comment': comment}
+            vals_list.append(log_vals)
         
-        self.env['tazweed.workflow.execution.log'].create(log_vals)
+        self.env['tazweed.workflow.execution.log'].create(vals_list)
     
     # ============================================================
     # CRON METHODS
@@ -644,51 +729,39 @@ class WorkflowInstance(models.Model):
     
     @api.model
     def cron_check_sla_status(self):
-        """Cron job to check and update SLA status for active instances"""
-        instances = self.search([
-            ('state', 'in', ['pending', 'in_progress', 'escalated']),
-        ])
-        for instance in instances:
-            instance._compute_sla_status()
+        """Cron job to update the SLA status of the instances due for a change"""
+        instances = self.search([('sla_deadline', '<=', fields.Datetime.now())])
+        instances._refresh_sla_status()
     
     @api.model
     def cron_process_escalations(self):
-        """Cron job to process escalations"""
-        instances = self.search([
-            ('state', 'in', ['pending', 'in_progress']),
-            ('is_escalated', '=', False),
-        ])
-        for instance in instances:
-            if instance.sla_status == 'breached':
-                instance.action_escalate()
+        """Cron job to escalate the instances past their SLA"""
+        instances = self.search([('escalation_deadline', '<=', fields.Datetime.now())])
+        instances._refresh_sla_status()
+        instances.filtered(lambda i: i.sla_status == 'breached')._escalate()
     
     @api.model
     def cron_auto_approve_timeout(self):
         """Cron job to auto-approve workflows that have exceeded timeout"""
-        from datetime import datetime
-        instances = self.search([
-            ('state', '=', 'pending'),
-        ])
-        now = datetime.now()
-        for instance in instances:
-            if instance.workflow_id.auto_approve_days and instance.create_date:
-                days_elapsed = (now - instance.create_date).days
-                if days_elapsed >= instance.workflow_id.auto_approve_days:
-                    instance.sudo()._complete_workflow('approved')
+        instances = self.search([('auto_approve_deadline', '<=', fields.Datetime.now())])
+        instances.sudo()._complete_workflow('approved')
     
     @api.model
     def cron_cancel_timeout(self):
         """Cron job to cancel workflows that have exceeded timeout"""
-        from datetime import datetime
-        instances = self.search([
-            ('state', 'in', ['draft', 'pending', 'in_progress']),
-        ])
-        now = datetime.now()
-        for instance in instances:
-            if instance.workflow_id.timeout_days and instance.create_date:
-                days_elapsed = (now - instance.create_date).days
-                if days_elapsed >= instance.workflow_id.timeout_days:
-                    instance.sudo().action_cancel('Auto-cancelled due to timeout')
+        instances = self.search([('timeout_deadline', '<=', fields.Datetime.now())])
+        instances.sudo()._cancel('Auto-cancelled due to timeout')
+    
+    def _refresh_sla_status(self):
+        """Write the current SLA status, with one write per status"""
+        now = fields.Datetime.now()
+        by_status = defaultdict(lambda: self.browse())
+        for record in self:
+            status = record._get_sla_status(now)
+            if status != record.sla_status:
+                by_status[status] |= record
+        for status, instances in by_status.items():
+            instances.write({'sla_status': status})
 
 
 class WorkflowApproval(models.Model):
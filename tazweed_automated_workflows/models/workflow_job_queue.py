@@ -0,0 +1,266 @@
+"""
+Tazweed Automated Workflows - Job Queue Model
+Durable queue for delayed rule executions and asynchronous notifications
+"""
+
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+
+from ..engines.automation_engine import AutomationEngine
+from ..engines.notification_dispatcher import NotificationDispatcher
+
+_logger = logging.getLogger(__name__)
+
+# Seconds to wait before the first retry, doubled on every further attempt
+RETRY_BASE_DELAY = 60
+RETRY_MAX_DELAY = 6 * 3600
+
+# Running jobs not finished after this many minutes belong to a dead worker
+STALE_JOB_MINUTES = 30
+
+
+class _JobFailed(Exception):
+    """A job that reported an error, raised to roll back its savepoint"""
+
+
+class WorkflowJob(models.Model):
+    """Workflow Job Queue Model"""
+
+    _name = 'tazweed.workflow.job'
+    _description = 'Workflow Job'
+    _order = 'priority, eta, id'
+
+    # ============================================================
+    # Job Definition
+    # ============================================================
+
+    name = fields.Char('Description', required=True)
+
+    job_type = fields.Selection([
+        ('automation_rule', 'Automation Rule'),
+        ('notification', 'Notification'),
+        ('webhook', 'Webhook'),
+    ], string='Job Type', required=True)
+
+    rule_id = fields.Many2one(
+        'tazweed.automation.rule',
+        string='Automation Rule',
+        ondelete='cascade'
+    )
+
+    template_id = fields.Many2one(
+        'tazweed.notification.template',
+        string='Notification Template',
+        ondelete='cascade'
+    )
+
+    webhook_id = fields.Many2one(
+        'workflow.webhook',
+        string='Webhook',
+        ondelete='cascade'
+    )
+
+    res_model = fields.Char('Record Model')
+    res_id = fields.Integer('Record ID')
+    payload = fields.Json('Payload', help='Variables and recipients of a notification')
+
+    # ============================================================
+    # Scheduling
+    # ============================================================
+
+    priority = fields.Integer('Priority', default=10, help='Lower values run first')
+    eta = fields.Datetime('Due Date', required=True, default=fields.Datetime.now)
+
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Dead Letter'),
+    ], string='State', default='pending', required=True)
+
+    # ============================================================
+    # Retry State
+    # ============================================================
+
+    attempts = fields.Integer('Attempts', default=0, readonly=True)
+    max_attempts = fields.Integer('Max Attempts', default=5)
+    claimed_date = fields.Datetime('Claimed Date', readonly=True)
+    done_date = fields.Datetime('Done Date', readonly=True)
+    last_error = fields.Text('Last Error', readonly=True)
+
+    # ============================================================
+    # Methods
+    # ============================================================
+
+    def init(self):
+        """Index the pending jobs in claiming order."""
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS tazweed_workflow_job_pending_idx
+            ON tazweed_workflow_job (priority, eta, id)
+            WHERE state = 'pending'
+        """)
+
+    @api.model
+    def enqueue(self, job_type, name, record=None, delay_minutes=0, priority=10, **values):
+        """Add a job to the queue, due in ``delay_minutes``."""
+        values.update({
+            'name': name,
+            'job_type': job_type,
+            'eta': fields.Datetime.now() + timedelta(minutes=delay_minutes),
+            'priority': priority,
+        })
+        if record:
+            values.update({'res_model': record._name, 'res_id': record.id})
+        return self.sudo().create(values)
+
+    @api.model
+    def process_queue(self, limit=100, job_type=None):
+        """Cron job: claim and run the due jobs, optionally of one type only.
+
+        Jobs are claimed with ``FOR UPDATE SKIP LOCKED`` and committed as
+        running, so several workers can drain the queue without running a
+        job twice. Each job then runs and commits on its own, except webhooks
+        which are sent together by the delivery pool.
+        """
+        self._requeue_stale_jobs()
+        processed = 0
+        while processed < limit:
+            job_ids = self._claim_jobs(min(limit - processed, 20), job_type)
+            if not job_ids:
+                break
+            self.env.cr.commit()
+            jobs = self.search([('id', 'in', job_ids)])
+            webhook_jobs = jobs.filtered(lambda j: j.job_type == 'webhook')
+            if webhook_jobs:
+                self.env['workflow.webhook']._deliver_jobs(webhook_jobs)
+                self.env.cr.commit()
+            for job in jobs - webhook_jobs:
+                job._run()
+                self.env.cr.commit()
+            processed += len(job_ids)
+        return processed
+
+    @api.model
+    def _claim_jobs(self, limit, job_type=None):
+        """Mark up to ``limit`` due pending jobs as running and return their ids."""
+        self.flush_model()
+        now = fields.Datetime.now()
+        self.env.cr.execute("""
+            UPDATE tazweed_workflow_job
+            SET state = 'running', attempts = attempts + 1, claimed_date = %s
+            WHERE id IN (
+                SELECT id FROM tazweed_workflow_job
+                WHERE state = 'pending' AND eta <= %s
+                AND (%s IS NULL OR job_type = %s)
+                ORDER BY priority, eta, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id
+        """, (now, now, job_type, job_type, limit))
+        job_ids = [row[0] for row in self.env.cr.fetchall()]
+        self.invalidate_model(['state', 'attempts', 'claimed_date'])
+        return job_ids
+
+    @api.model
+    def _requeue_stale_jobs(self):
+        """Put back jobs left running by a worker that died."""
+        stale = self.search([
+            ('state', '=', 'running'),
+            ('claimed_date', '<', fields.Datetime.now() - timedelta(minutes=STALE_JOB_MINUTES)),
+        ])
+        for job in stale:
+            job._handle_failure('Job interrupted before completion')
+
+    def _run(self):
+        """Run a claimed job, retrying it later on failure."""
+        self.ensure_one()
+        error = None
+        try:
+            with self.env.cr.savepoint():
+                failure = self._execute()
+                if failure:
+                    raise _JobFailed(failure)
+        except _JobFailed as e:
+            _logger.warning(f'Workflow job {self.id} failed: {e}')
+            error = str(e)
+        except Exception as e:
+            _logger.exception(f'Workflow job {self.id} failed')
+            error = str(e)
+
+        if error:
+            self._handle_failure(error)
+        else:
+            self.write({
+                'state': 'done',
+                'done_date': fields.Datetime.now(),
+                'last_error': False,
+            })
+
+    def _execute(self):
+        """Run the job and return an error message, or None on success."""
+        record = None
+        if self.res_model and self.res_id and self.res_model in self.env:
+            record = self.env[self.res_model].browse(self.res_id).exists()
+
+        if self.job_type == 'automation_rule':
+            if not self.rule_id:
+                return 'Automation rule no longer exists'
+            AutomationEngine(self.env).execute_rule(self.rule_id, record, raise_on_error=True)
+
+        elif self.job_type == 'notification':
+            if not self.template_id:
+                return 'Notification template no longer exists'
+            payload = self.payload or {}
+            sent = NotificationDispatcher(self.env)._send_notification_internal({
+                'template': self.template_id,
+                'variables': payload.get('variables') or {},
+                'recipients': payload.get('recipients'),
+            })
+            if not sent:
+                return 'Notification could not be sent'
+
+        return None
+
+    def _handle_failure(self, error):
+        """Schedule a retry with exponential backoff, or dead-letter the job."""
+        self._log_rule_failures(error)
+        for job in self:
+            if job.attempts >= job.max_attempts:
+                job.write({'state': 'dead', 'last_error': error})
+                _logger.warning(f'Workflow job {job.id} moved to dead letter after {job.attempts} attempts')
+                continue
+            job.write({
+                'state': 'pending',
+                'eta': fields.Datetime.now() + timedelta(seconds=job._get_retry_delay()),
+                'last_error': error,
+            })
+
+    def _log_rule_failures(self, error):
+        """Record failed rule executions, outside the rolled back attempt."""
+        for job in self.filtered(lambda j: j.job_type == 'automation_rule' and j.rule_id):
+            job.rule_id.write({
+                'last_execution': fields.Datetime.now(),
+                'last_execution_status': 'error',
+            })
+            self.env['tazweed.automation.execution.log'].create({
+                'rule_id': job.rule_id.id,
+                'status': 'error',
+                'description': f'Error: {error}',
+            })
+
+    def _get_retry_delay(self):
+        """Seconds to wait before the next attempt of a failed job."""
+        if self.job_type == 'webhook' and self.webhook_id:
+            return min(self.webhook_id._get_retry_delay(self.attempts), RETRY_MAX_DELAY)
+        return min(RETRY_BASE_DELAY * 2 ** max(self.attempts - 1, 0), RETRY_MAX_DELAY)
+
+    def action_requeue(self):
+        """Requeue dead-letter jobs for a fresh series of attempts"""
+        self.filtered(lambda j: j.state == 'dead').write({
+            'state': 'pending',
+            'attempts': 0,
+            'eta': fields.Datetime.now(),
+        })
+        return True
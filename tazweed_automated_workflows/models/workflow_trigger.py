@@ -6,11 +6,18 @@ Event-based, time-based, and condition-based triggers
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.tools import split_every
 from datetime import datetime, timedelta
 import logging
 
+from ..engines.expression_cache import EXPRESSION_CACHE
+from .workflow_dispatch import TRIGGER_DISPATCH_FIELDS
+
 _logger = logging.getLogger(__name__)
 
+# Records started per batch by set-based trigger processing
+TRIGGER_BATCH_SIZE = 500
+
 
 class WorkflowTrigger(models.Model):
     """Smart Workflow Trigger"""
@@ -216,10 +223,54 @@ class WorkflowTrigger(models.Model):
         readonly=True
     )
     
+    # Evaluation counters of the compiled domain and condition (current worker)
+    evaluation_count = fields.Integer(string='Evaluations', compute='_compute_evaluation_stats')
+    evaluation_errors = fields.Integer(string='Evaluation Errors', compute='_compute_evaluation_stats')
+    evaluation_avg_time = fields.Float(string='Avg Evaluation Time (µs)', compute='_compute_evaluation_stats')
+    evaluation_max_time = fields.Float(string='Max Evaluation Time (µs)', compute='_compute_evaluation_stats')
+    
     # ============================================================
     # Methods
     # ============================================================
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        triggers = super().create(vals_list)
+        self.env['tazweed.workflow.dispatch']._invalidate_dispatch_table()
+        return triggers
+    
+    def write(self, vals):
+        res = super().write(vals)
+        if 'domain_filter' in vals or 'trigger_condition' in vals:
+            EXPRESSION_CACHE.invalidate(self)
+        if TRIGGER_DISPATCH_FIELDS.intersection(vals):
+            self.env['tazweed.workflow.dispatch']._invalidate_dispatch_table()
+        return res
+    
+    def unlink(self):
+        EXPRESSION_CACHE.invalidate(self)
+        EXPRESSION_CACHE.reset_stats(self)
+        res = super().unlink()
+        self.env['tazweed.workflow.dispatch']._invalidate_dispatch_table()
+        return res
+    
+    def _compute_evaluation_stats(self):
+        for trigger in self:
+            stats = EXPRESSION_CACHE.get_stats(trigger)
+            trigger.evaluation_count = stats['count']
+            trigger.evaluation_errors = stats['errors']
+            trigger.evaluation_avg_time = stats['avg_us']
+            trigger.evaluation_max_time = stats['max_us']
+    
+    def _get_eval_context(self, record=None):
+        """Variables available to the domain filter and trigger condition"""
+        return {
+            'record': record,
+            'env': self.env,
+            'datetime': datetime,
+            'timedelta': timedelta,
+        }
+    
     def check_trigger(self, record=None):
         """Check if trigger condition is met"""
         self.ensure_one()
@@ -227,53 +278,131 @@ class WorkflowTrigger(models.Model):
         if not self.is_active:
             return False
         
+        if record:
+            return bool(self._filter_trigger_records(record))
+        
         try:
-            # Check domain filter
-            if self.domain_filter and self.domain_filter != '[]' and record:
-                domain = eval(self.domain_filter)
-                if not record.filtered_domain(domain):
-                    return False
-            
             # Check python condition
             if self.trigger_condition:
-                local_dict = {
-                    'record': record,
-                    'env': self.env,
-                    'datetime': datetime,
-                    'timedelta': timedelta,
-                }
-                if not eval(self.trigger_condition, local_dict):
+                local_dict = self._get_eval_context(record)
+                if not EXPRESSION_CACHE.evaluate(self, 'trigger_condition', local_dict):
                     return False
-            
-            # Check employee filter
-            if record and self.employee_filter != 'all':
-                employee = getattr(record, self.employee_field, None) if self.employee_field else None
-                
-                if self.employee_filter == 'department' and self.department_ids:
-                    if employee and employee.department_id not in self.department_ids:
-                        return False
-                
-                elif self.employee_filter == 'job' and self.job_ids:
-                    if employee and employee.job_id not in self.job_ids:
-                        return False
-                
-                elif self.employee_filter == 'probation':
-                    if employee:
-                        contract = self.env['hr.contract'].search([
-                            ('employee_id', '=', employee.id),
-                            ('state', '=', 'open'),
-                        ], limit=1)
-                        if not contract or not contract.trial_date_end:
-                            return False
-                        if contract.trial_date_end < fields.Date.today():
-                            return False
-            
             return True
         
         except Exception as e:
             _logger.error(f'Error checking trigger condition: {str(e)}')
             return False
     
+    def _get_domain_filter(self, record=None):
+        """Evaluate the domain filter, or return an empty domain"""
+        if not self.domain_filter or self.domain_filter == '[]':
+            return []
+        return EXPRESSION_CACHE.evaluate(self, 'domain_filter', self._get_eval_context(record))
+    
+    def _get_employee_filter_domain(self, model_name):
+        """Translate the department/job filter into a domain on ``model_name``.
+        
+        Records without an employee pass the filter, as in check_trigger.
+        Returns None when the filter cannot be expressed as a domain.
+        """
+        if self.employee_filter == 'department' and self.department_ids:
+            path, ids = 'department_id', self.department_ids.ids
+        elif self.employee_filter == 'job' and self.job_ids:
+            path, ids = 'job_id', self.job_ids.ids
+        else:
+            return []
+        
+        field = self.env[model_name]._fields.get(self.employee_field or '')
+        if not field or field.type != 'many2one' or field.comodel_name != 'hr.employee':
+            return None
+        return ['|', (self.employee_field, '=', False), (f'{self.employee_field}.{path}', 'in', ids)]
+    
+    def _filter_trigger_records(self, records, domain_applied=False):
+        """Return the records meeting the domain, condition and employee filters.
+        
+        Works on a whole record set: the domain and the department/job filters
+        run as one search, probation contracts are read in one query and the
+        compiled condition is evaluated per record.
+        """
+        self.ensure_one()
+        
+        try:
+            domain = []
+            if not domain_applied:
+                if len(records) == 1:
+                    domain = self._get_domain_filter(records)
+                else:
+                    try:
+                        domain = self._get_domain_filter()
+                    except Exception:
+                        # Domain depending on the record: evaluated one by one
+                        records = records.filtered(
+                            lambda r: r.filtered_domain(self._get_domain_filter(r))
+                        )
+            employee_domain = self._get_employee_filter_domain(records._name)
+            if employee_domain:
+                domain = domain + employee_domain
+            if domain:
+                records = records.search([('id', 'in', records.ids)] + domain)
+        except Exception as e:
+            _logger.error(f'Error checking trigger condition: {str(e)}')
+            return records.browse()
+        
+        # Check python condition
+        if self.trigger_condition:
+            passed_ids = []
+            for record in records:
+                try:
+                    if EXPRESSION_CACHE.evaluate(self, 'trigger_condition', self._get_eval_context(record)):
+                        passed_ids.append(record.id)
+                except Exception as e:
+                    _logger.error(f'Error checking trigger condition: {str(e)}')
+            records = records.browse(passed_ids)
+        
+        # Check employee filter
+        if records and self.employee_filter != 'all':
+            if employee_domain is None:
+                records = records.filtered(self._check_employee_filter)
+            elif self.employee_filter == 'probation':
+                records = self._filter_probation_records(records)
+        
+        return records
+    
+    def _get_record_employee(self, record):
+        """Return the employee of a record, through the employee field"""
+        return getattr(record, self.employee_field, None) if self.employee_field else None
+    
+    def _check_employee_filter(self, record):
+        """Department/job filter for records whose employee field is not a relation"""
+        employee = self._get_record_employee(record)
+        if self.employee_filter == 'department' and self.department_ids:
+            if employee and employee.department_id not in self.department_ids:
+                return False
+        elif self.employee_filter == 'job' and self.job_ids:
+            if employee and employee.job_id not in self.job_ids:
+                return False
+        return True
+    
+    def _filter_probation_records(self, records):
+        """Keep the records whose employee is still on probation"""
+        employees = {record.id: self._get_record_employee(record) for record in records}
+        employee_ids = {employee.id for employee in employees.values() if employee}
+        
+        # Current contract per employee, read in one query
+        trial_ends = {}
+        contracts = self.env['hr.contract'].search_read([
+            ('employee_id', 'in', list(employee_ids)),
+            ('state', '=', 'open'),
+        ], ['employee_id', 'trial_date_end'], load=False)
+        for contract in contracts:
+            trial_ends.setdefault(contract['employee_id'], contract['trial_date_end'])
+        
+        today = fields.Date.today()
+        return records.filtered(
+            lambda r: not employees[r.id]
+            or (trial_ends.get(employees[r.id].id) and trial_ends[employees[r.id].id] >= today)
+        )
+    
     def execute_trigger(self, record=None):
         """Execute trigger"""
         self.ensure_one()
@@ -291,43 +420,12 @@ class WorkflowTrigger(models.Model):
         
         # Create workflow instance
         if self.auto_start and self.action_type in ('create_instance', 'both'):
-            instance_vals = {
-                'workflow_id': self.workflow_id.id,
-                'priority': self.priority,
-            }
-            
-            if record:
-                instance_vals.update({
-                    'res_model': record._name,
-                    'res_id': record.id,
-                })
-                
-                # Set employee
-                if self.set_employee and self.employee_field:
-                    employee = getattr(record, self.employee_field, None)
-                    if employee:
-                        instance_vals['employee_id'] = employee.id
-            
-            if self.pass_context:
-                instance_vals['description'] = f'Triggered by: {self.name}'
-            
-            instance = self.env['tazweed.workflow.instance'].create(instance_vals)
+            instance = self.env['tazweed.workflow.instance'].create(self._prepare_instance_vals(record))
             instance.action_start()
         
         # Execute server action
         if self.action_type in ('server_action', 'both') and self.server_action_id:
-            try:
-                ctx = {}
-                if record:
-                    ctx = {
-                        'active_model': record._name,
-                        'active_id': record.id,
-                        'active_ids': [record.id],
-                    }
-                self.server_action_id.with_context(**ctx).run()
-            except Exception as e:
-                _logger.error(f'Error executing server action: {e}')
-                result = False
+            result = self._run_server_action(record)
         
         # Update statistics
         self.write({
@@ -337,6 +435,82 @@ class WorkflowTrigger(models.Model):
         
         return result
     
+    def execute_trigger_batch(self, records, domain_applied=False):
+        """Execute the trigger for a whole record set.
+        
+        Filters the records in bulk, creates and starts their workflow
+        instances in batches and updates the statistics once.
+        Returns the number of records the trigger fired for.
+        """
+        self.ensure_one()
+        
+        if not self.is_active or self.workflow_id.state != 'active' or not records:
+            return 0
+        
+        records = self._filter_trigger_records(records, domain_applied=domain_applied)
+        if not records:
+            return 0
+        
+        Instance = self.env['tazweed.workflow.instance']
+        for batch in split_every(TRIGGER_BATCH_SIZE, records.ids, records.browse):
+            # Create workflow instances
+            if self.auto_start and self.action_type in ('create_instance', 'both'):
+                instances = Instance.create([self._prepare_instance_vals(record) for record in batch])
+                instances.action_start()
+            
+            # Execute server action
+            if self.action_type in ('server_action', 'both') and self.server_action_id:
+                for record in batch:
+                    self._run_server_action(record)
+        
+        # Update statistics
+        self.write({
+            'trigger_count': self.trigger_count + len(records),
+            'last_triggered': fields.Datetime.now(),
+        })
+        
+        return len(records)
+    
+    def _prepare_instance_vals(self, record=None):
+        """Values of the workflow instance started for ``record``"""
+        instance_vals = {
+            'workflow_id': self.workflow_id.id,
+            'priority': self.priority,
+        }
+        
+        if record:
+            instance_vals.update({
+                'res_model': record._name,
+                'res_id': record.id,
+            })
+            
+            # Set employee
+            if self.set_employee and self.employee_field:
+                employee = self._get_record_employee(record)
+                if employee:
+                    instance_vals['employee_id'] = employee.id
+        
+        if self.pass_context:
+            instance_vals['description'] = f'Triggered by: {self.name}'
+        
+        return instance_vals
+    
+    def _run_server_action(self, record=None):
+        """Run the server action for ``record``"""
+        try:
+            ctx = {}
+            if record:
+                ctx = {
+                    'active_model': record._name,
+                    'active_id': record.id,
+                    'active_ids': [record.id],
+                }
+            self.server_action_id.with_context(**ctx).run()
+            return True
+        except Exception as e:
+            _logger.error(f'Error executing server action: {e}')
+            return False
+    
     @api.model
     def process_scheduled_triggers(self):
         """Process all scheduled triggers (called by cron)"""
@@ -375,9 +549,15 @@ class WorkflowTrigger(models.Model):
         if not model_name:
             return
         
-        records = self.env[model_name].search([
-            (self.relative_field_id.name, '=', target_date),
-        ])
+        # One search for the due records; the domain filter joins it when it
+        # does not depend on the record
+        domain = [(self.relative_field_id.name, '=', target_date)]
+        try:
+            domain += self._get_domain_filter()
+            domain_applied = True
+        except Exception:
+            domain_applied = False
         
-        for record in records:
-            self.execute_trigger(record)
+        records = self.env[model_name].search(domain)
+        return self.execute_trigger_batch(records, domain_applied=domain_applied)
+
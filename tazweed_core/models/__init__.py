@@ -11,3 +11,4 @@ from . import employee_onboarding
 from . import employee_skills
 from . import organization_chart
 from . import employee_timeline
+from . import ir_attachment
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import logging
+import os
+import tempfile
+from collections import defaultdict
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Size of the blocks read when hashing or copying files
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class IrAttachment(models.Model):
+    """Streaming helpers for large generated and uploaded files"""
+    _inherit = 'ir.attachment'
+
+    content_sha256 = fields.Char(
+        string='SHA-256',
+        index=True,
+        readonly=True,
+        help='SHA-256 digest of the content, computed on first use'
+    )
+
+    def write(self, vals):
+        if 'datas' in vals or 'raw' in vals:
+            vals = dict(vals, content_sha256=False)
+        return super().write(vals)
+
+    @api.model
+    def _create_from_file(self, path, vals):
+        """Create an attachment from a file on disk without loading it in memory."""
+        with open(path, 'rb') as f:
+            return self._create_from_stream(f, vals)
+
+    @api.model
+    def _create_from_stream(self, stream, vals):
+        """Create an attachment from a binary file object, read in fixed-size chunks.
+
+        With the file storage, the content is hashed while it is written to a
+        temporary file of the filestore, which is then moved in place and
+        linked to the new attachment; the database storage falls back to a
+        regular create.
+        """
+        if self._storage() != 'file':
+            return self.create(dict(vals, raw=stream.read()))
+
+        sha1 = hashlib.sha1()
+        sha256 = hashlib.sha256()
+        size = 0
+        root = self._filestore()
+        os.makedirs(root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=root)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: stream.read(STREAM_CHUNK_SIZE), b''):
+                    sha1.update(chunk)
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            checksum = sha1.hexdigest()
+
+            fname = checksum[:2] + '/' + checksum
+            full_path = self._full_path(fname)
+            if not os.path.isfile(full_path):
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(tmp_path, full_path)
+                # add fname to checklist, in case the transaction aborts
+                self._mark_for_gc(fname)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        # create() drops store_fname, checksum and file_size: the attachment
+        # is created empty and pointed at the stored file afterwards
+        values = {key: value for key, value in vals.items() if key not in ('raw', 'datas', 'db_datas')}
+        values.setdefault('mimetype', 'application/octet-stream')
+        attachment = self.create(values)
+        attachment.flush_recordset()
+        self.env.cr.execute("""
+            UPDATE ir_attachment
+            SET store_fname = %s, checksum = %s, file_size = %s, mimetype = %s,
+                content_sha256 = %s, db_datas = NULL
+            WHERE id = %s
+        """, (
+            fname, checksum, size, attachment.mimetype or values['mimetype'],
+            sha256.hexdigest(), attachment.id,
+        ))
+        attachment.invalidate_recordset()
+        return attachment
+
+    def _hash_content(self):
+        """Return the SHA-256 digest of the content, read in fixed-size chunks."""
+        self.ensure_one()
+        sha256 = hashlib.sha256()
+        if self.store_fname:
+            try:
+                with open(self._full_path(self.store_fname), 'rb') as f:
+                    for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b''):
+                        sha256.update(chunk)
+                return sha256.hexdigest()
+            except OSError:
+                _logger.info("Cannot stream attachment %s, hashing its content in memory", self.id)
+                sha256 = hashlib.sha256()
+        sha256.update(self.sudo().raw or b'')
+        return sha256.hexdigest()
+
+    def _get_content_digests(self):
+        """Return {attachment id: SHA-256 digest} of the attachments' content.
+
+        Digests are stored on the attachments and shared between attachments
+        having the same checksum, so an identical content is hashed once,
+        whatever the number of records it is attached to.
+        """
+        digests = {att.id: att.content_sha256 for att in self if att.content_sha256}
+        todo = self.filtered(lambda att: not att.content_sha256)
+        if not todo:
+            return digests
+
+        known = {}
+        checksums = list(set(todo.mapped('checksum')) - {False})
+        if checksums:
+            for row in self.sudo().search_read([
+                '|', ('res_field', '=', False), ('res_field', '!=', False),
+                ('checksum', 'in', checksums),
+                ('content_sha256', '!=', False),
+            ], ['checksum', 'content_sha256']):
+                known[row['checksum']] = row['content_sha256']
+
+        by_digest = defaultdict(list)
+        for att in todo:
+            digest = att.checksum and known.get(att.checksum)
+            if not digest:
+                digest = att._hash_content()
+                if att.checksum:
+                    known[att.checksum] = digest
+            digests[att.id] = digest
+            by_digest[digest].append(att.id)
+
+        for digest, ids in by_digest.items():
+            self.browse(ids).sudo().write({'content_sha256': digest})
+        return digests
+
+    @api.model
+    def _get_field_digests(self, records, field_name):
+        """Return {record id: (SHA-256 digest, size)} of a binary field stored as attachments."""
+        record_ids = [record_id for record_id in records.ids if isinstance(record_id, int)]
+        if not record_ids:
+            return {}
+        attachments = self.sudo().search([
+            ('res_model', '=', records._name),
+            ('res_field', '=', field_name),
+            ('res_id', 'in', record_ids),
+        ])
+        digests = attachments._get_content_digests()
+        return {att.res_id: (digests[att.id], att.file_size) for att in attachments}
@@ -8,6 +8,7 @@ department hierarchy, and employee positioning.
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from collections import defaultdict
 import json
 import logging
 
@@ -56,6 +57,14 @@ class OrganizationChart(models.Model):
     node_color = fields.Char(string='Node Color', default='#875A7B')
     connector_color = fields.Char(string='Connector Color', default='#cccccc')
     
+    # Large organizations
+    expand_depth = fields.Integer(
+        string='Expanded Levels',
+        default=0,
+        help='Reporting levels loaded below each employee, deeper levels '
+             'being expanded on demand. 0 loads the whole tree.'
+    )
+    
     # Statistics
     employee_count = fields.Integer(
         string='Employees',
@@ -79,11 +88,8 @@ class OrganizationChart(models.Model):
                 chart.employee_count = self.env['hr.employee'].search_count([])
     
     def _get_child_departments(self, department):
-        """Get all child departments recursively"""
-        result = [department.id]
-        for child in department.child_ids:
-            result.extend(self._get_child_departments(child))
-        return result
+        """Get the department and all its sub-departments"""
+        return self.env['hr.department'].search([('id', 'child_of', department.id)]).ids
     
     def get_chart_data(self):
         """Get organization chart data in JSON format for visualization"""
@@ -97,30 +103,42 @@ class OrganizationChart(models.Model):
             return self._get_flat_data()
     
     def _get_hierarchical_data(self):
-        """Generate hierarchical chart data"""
+        """Generate hierarchical chart data.
+        
+        Departments, their employees and the reporting lines below them
+        are each read with one query and assembled in memory; employee
+        subtrees stop at ``expand_depth`` levels for lazy expansion.
+        """
         self.ensure_one()
+        Employee = self.env['hr.employee']
+        depth = self.expand_depth or None
         
-        def build_employee_node(employee):
-            """Build node data for an employee"""
-            subordinates = self.env['hr.employee'].search([
-                ('parent_id', '=', employee.id)
+        if self.root_employee_id:
+            return self.root_employee_id.get_org_chart_data(depth=depth)
+        
+        if self.root_department_id:
+            departments = self.env['hr.department'].search([
+                ('id', 'child_of', self.root_department_id.id)
             ])
-            
-            node = {
-                'id': employee.id,
-                'name': employee.name,
-                'title': employee.job_id.name if employee.job_id else '',
-                'department': employee.department_id.name if employee.department_id else '',
-                'email': employee.work_email or '',
-                'phone': employee.work_phone or '',
-                'image': f'/web/image/hr.employee/{employee.id}/image_128' if employee.image_128 else '',
-                'children': [],
-            }
-            
-            for sub in subordinates:
-                node['children'].append(build_employee_node(sub))
-            
-            return node
+            roots = self.root_department_id
+        else:
+            departments = self.env['hr.department'].search([])
+            roots = departments.filtered(lambda d: not d.parent_id)
+        
+        child_departments = defaultdict(list)
+        for department in departments:
+            if department.parent_id and department not in roots:
+                child_departments[department.parent_id.id].append(department)
+        
+        # Employees shown under each department: those reporting to its manager
+        department_employees = defaultdict(list)
+        for employee in Employee.search([('department_id', 'in', departments.ids)]):
+            manager = employee.department_id.manager_id
+            if employee != manager and employee.parent_id == manager:
+                department_employees[employee.department_id.id].append(employee)
+        employee_nodes = Employee.browse([
+            employee.id for employees in department_employees.values() for employee in employees
+        ])._get_org_chart_nodes(depth)
         
         def build_department_node(department):
             """Build node data for a department"""
@@ -140,38 +158,26 @@ class OrganizationChart(models.Model):
             }
             
             # Add child departments
-            for child_dept in department.child_ids:
+            for child_dept in child_departments[department.id]:
                 node['children'].append(build_department_node(child_dept))
             
             # Add employees in this department (excluding manager)
-            employees = self.env['hr.employee'].search([
-                ('department_id', '=', department.id),
-                ('id', '!=', manager.id if manager else 0),
-                ('parent_id', '=', manager.id if manager else False),
-            ])
-            
-            for emp in employees:
-                emp_node = build_employee_node(emp)
+            for emp in department_employees[department.id]:
+                emp_node = employee_nodes[emp.id]
                 emp_node['type'] = 'employee'
                 node['children'].append(emp_node)
             
             return node
         
         # Build chart starting from root
-        if self.root_employee_id:
-            return build_employee_node(self.root_employee_id)
-        elif self.root_department_id:
+        if self.root_department_id:
             return build_department_node(self.root_department_id)
         else:
-            # Find top-level departments
-            top_depts = self.env['hr.department'].search([
-                ('parent_id', '=', False)
-            ])
             return {
                 'id': 'root',
                 'name': 'Organization',
                 'type': 'root',
-                'children': [build_department_node(d) for d in top_depts]
+                'children': [build_department_node(d) for d in roots]
             }
     
     def _get_matrix_data(self):
@@ -312,11 +318,36 @@ class HrDepartment(models.Model):
             else:
                 dept.full_path = dept.name
     
-    def get_org_chart_data(self):
-        """Get org chart data for this department and its children"""
+    def get_org_chart_data(self, depth=None):
+        """Get org chart data for this department and its children.
+        
+        The sub-departments are read with one parent_path search and the
+        employee counts with one grouped query. Below ``depth`` levels the
+        children are left out and the node is flagged ``lazy``.
+        """
         self.ensure_one()
         
-        def build_node(department):
+        departments = self.search([('id', 'child_of', self.id)])
+        children = defaultdict(list)
+        for department in departments:
+            if department != self and department.parent_id:
+                children[department.parent_id.id].append(department)
+        employee_counts = {
+            group['department_id'][0]: group['department_id_count']
+            for group in self.env['hr.employee'].read_group(
+                [('department_id', 'in', departments.ids)], ['department_id'], ['department_id'])
+        }
+        
+        totals = {}
+        
+        def count_employees(department):
+            if department.id not in totals:
+                totals[department.id] = employee_counts.get(department.id, 0) + sum(
+                    count_employees(child) for child in children[department.id])
+            return totals[department.id]
+        
+        def build_node(department, level):
+            expanded = not depth or level < depth
             return {
                 'id': department.id,
                 'name': department.name,
@@ -326,18 +357,21 @@ class HrDepartment(models.Model):
                     'name': department.manager_id.name,
                     'image': f'/web/image/hr.employee/{department.manager_id.id}/image_128',
                 } if department.manager_id else None,
-                'employee_count': self.env['hr.employee'].search_count([
-                    ('department_id', '=', department.id)
-                ]),
-                'children': [build_node(child) for child in department.child_ids],
+                'employee_count': employee_counts.get(department.id, 0),
+                'total_employee_count': count_employees(department),
+                'children': [
+                    build_node(child, level + 1) for child in children[department.id]
+                ] if expanded else [],
+                'lazy': not expanded and bool(children[department.id]),
             }
         
-        return build_node(self)
+        return build_node(self, 0)
 
 
 class HrEmployee(models.Model):
     """Extend HR Employee for org chart"""
     _inherit = 'hr.employee'
+    _parent_store = True
     
     org_chart_position = fields.Char(
         string='Org Chart Position',
@@ -352,6 +386,52 @@ class HrEmployee(models.Model):
         help='For matrix organizations with multiple reporting lines'
     )
     
+    # Reporting line hierarchy, maintained by the ORM on explicit parent_id
+    # writes and by _sync_parent_path when parent_id follows the department
+    parent_path = fields.Char(index=True, unaccent=False)
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        employees = super().create(vals_list)
+        employees._sync_parent_path()
+        return employees
+    
+    def write(self, vals):
+        res = super().write(vals)
+        if 'department_id' in vals:
+            self._sync_parent_path()
+        return res
+    
+    def _sync_parent_path(self):
+        """Update parent_path of employees whose manager was recomputed.
+        
+        parent_id is computed from the department, and the ORM only updates
+        parent_path for parent_id values written explicitly. Employees whose
+        path does not end under their manager's are moved, grouped by
+        manager, until the paths are consistent.
+        """
+        employee_ids = [employee_id for employee_id in self.ids if isinstance(employee_id, int)]
+        if not employee_ids:
+            return
+        self.flush_model(['parent_id', 'parent_path'])
+        for _attempt in range(len(employee_ids) + 1):
+            self.env.cr.execute("""
+                SELECT e.id, e.parent_id
+                FROM hr_employee e
+                LEFT JOIN hr_employee p ON p.id = e.parent_id
+                WHERE e.id = ANY(%s)
+                  AND e.parent_path IS DISTINCT FROM COALESCE(p.parent_path, '') || e.id || '/'
+            """, (employee_ids,))
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            by_parent = defaultdict(list)
+            for employee_id, parent_id in rows:
+                by_parent[parent_id].append(employee_id)
+            for ids in by_parent.values():
+                self.browse(ids)._parent_store_update()
+            self.invalidate_model(['parent_path'])
+    
     # Computed fields for org chart
     direct_reports_count = fields.Integer(
         string='Direct Reports',
@@ -363,26 +443,83 @@ class HrEmployee(models.Model):
     )
     
     def _compute_direct_reports(self):
+        """Count the direct and indirect reports with one parent_path query"""
+        employee_ids = [employee_id for employee_id in self._origin.ids if employee_id]
+        counts = {}
+        if employee_ids:
+            self.flush_model(['parent_id', 'parent_path', 'active', 'company_id'])
+            self.env.cr.execute("""
+                SELECT m.id,
+                       COUNT(*) FILTER (WHERE e.parent_id = m.id),
+                       COUNT(*)
+                FROM hr_employee m
+                JOIN hr_employee e
+                  ON e.parent_path LIKE m.parent_path || '%%'
+                 AND e.id != m.id
+                WHERE m.id = ANY(%s)
+                  AND e.active
+                  AND e.company_id = ANY(%s)
+                GROUP BY m.id
+            """, (employee_ids, self.env.companies.ids))
+            counts = {row[0]: row[1:] for row in self.env.cr.fetchall()}
+        
         for employee in self:
-            direct = self.search([('parent_id', '=', employee.id)])
-            employee.direct_reports_count = len(direct)
-            
-            # Calculate total reports recursively
-            def count_all_reports(emp):
-                reports = self.search([('parent_id', '=', emp.id)])
-                total = len(reports)
-                for report in reports:
-                    total += count_all_reports(report)
-                return total
-            
-            employee.total_reports_count = count_all_reports(employee)
+            direct, total = counts.get(employee._origin.id, (0, 0))
+            employee.direct_reports_count = direct
+            employee.total_reports_count = total
     
-    def get_org_chart_data(self):
-        """Get org chart data for this employee and their reports"""
-        self.ensure_one()
+    def _get_reports_tree(self, depth=None):
+        """Return {manager id: [report ids]} for the reporting lines below the employees.
+        
+        The subtrees are read with one query on parent_path, limited to
+        ``depth`` levels below each employee when given.
+        """
+        paths = [path for path in self.mapped('parent_path') if path]
+        if not paths:
+            return {}
+        self.flush_model(['parent_id', 'parent_path', 'active', 'company_id', 'name'])
+        query = """
+            SELECT e.id, e.parent_id
+            FROM hr_employee e
+            JOIN unnest(%s::varchar[]) AS r(path)
+              ON e.parent_path LIKE r.path || '%%'
+             AND e.parent_path != r.path
+            WHERE e.active
+              AND e.company_id = ANY(%s)
+        """
+        params = [paths, self.env.companies.ids]
+        if depth:
+            query += """
+              AND length(e.parent_path) - length(replace(e.parent_path, '/', ''))
+                  <= length(r.path) - length(replace(r.path, '/', '')) + %s
+            """
+            params.append(depth)
+        self.env.cr.execute(query + " ORDER BY e.name, e.id", params)
         
-        def build_node(employee):
-            subordinates = self.search([('parent_id', '=', employee.id)])
+        reports = defaultdict(list)
+        seen = set()
+        for employee_id, parent_id in self.env.cr.fetchall():
+            if employee_id not in seen:
+                seen.add(employee_id)
+                reports[parent_id].append(employee_id)
+        return reports
+    
+    def _get_org_chart_nodes(self, depth=None):
+        """Return {employee id: chart node} of the employees with their reports.
+        
+        One more level than ``depth`` is read so that the employees at
+        the limit know whether they have reports; their ``children`` are
+        left out and the node is flagged ``lazy``.
+        """
+        reports = self._get_reports_tree(depth + 1 if depth else None)
+        employees = self.browse(
+            set(self.ids) | {report_id for report_ids in reports.values() for report_id in report_ids}
+        ).with_context(bin_size=True)
+        employees_by_id = {employee.id: employee for employee in employees}
+        
+        def build_node(employee, level):
+            expanded = not depth or level < depth
+            report_ids = reports.get(employee.id, [])
             return {
                 'id': employee.id,
                 'name': employee.name,
@@ -391,10 +528,23 @@ class HrEmployee(models.Model):
                 'image': f'/web/image/hr.employee/{employee.id}/image_128' if employee.image_128 else '',
                 'email': employee.work_email or '',
                 'phone': employee.work_phone or '',
-                'children': [build_node(sub) for sub in subordinates],
+                'direct_reports_count': len(report_ids),
+                'children': [
+                    build_node(employees_by_id[report_id], level + 1) for report_id in report_ids
+                ] if expanded else [],
+                'lazy': not expanded and bool(report_ids),
             }
         
-        return build_node(self)
+        return {employee.id: build_node(employees_by_id[employee.id], 0) for employee in self}
+    
+    def get_org_chart_data(self, depth=None):
+        """Get org chart data for this employee and their reports.
+        
+        With a ``depth``, only that many levels of reports are returned;
+        nodes flagged ``lazy`` are expanded by calling this method on them.
+        """
+        self.ensure_one()
+        return self._get_org_chart_nodes(depth)[self.id]
     
     def action_view_org_chart(self):
         """View org chart centered on this employee"""
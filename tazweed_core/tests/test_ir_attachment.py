@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import io
+import os
+import tempfile
+
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.tazweed_core.models.ir_attachment import STREAM_CHUNK_SIZE
+
+
+@tagged('post_install', '-at_install')
+class TestAttachmentStreaming(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.env['ir.config_parameter'].sudo().set_param('ir_attachment.location', 'file')
+        self.Attachment = self.env['ir.attachment']
+        # Spans several read chunks, the last one partial
+        self.content = os.urandom(STREAM_CHUNK_SIZE * 2 + 123)
+
+    def _check_attachment(self, attachment):
+        attachment.invalidate_recordset()
+        self.assertTrue(attachment.store_fname)
+        self.assertEqual(attachment.raw, self.content)
+        self.assertEqual(attachment.file_size, len(self.content))
+        self.assertEqual(attachment.checksum, hashlib.sha1(self.content).hexdigest())
+        self.assertEqual(attachment.content_sha256, hashlib.sha256(self.content).hexdigest())
+
+    def test_create_from_stream(self):
+        attachment = self.Attachment._create_from_stream(io.BytesIO(self.content), {
+            'name': 'stream.bin',
+            'res_model': 'res.partner',
+            'res_id': self.env.user.partner_id.id,
+        })
+        self._check_attachment(attachment)
+        self.assertEqual(attachment.mimetype, 'application/octet-stream')
+
+    def test_create_from_file(self):
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.content)
+            attachment = self.Attachment._create_from_file(path, {
+                'name': 'file.txt',
+                'mimetype': 'text/plain',
+            })
+        finally:
+            os.unlink(path)
+        self._check_attachment(attachment)
+        self.assertEqual(attachment.mimetype, 'text/plain')
+
+    def test_create_from_stream_database_storage(self):
+        self.env['ir.config_parameter'].sudo().set_param('ir_attachment.location', 'db')
+        attachment = self.Attachment._create_from_stream(io.BytesIO(self.content), {'name': 'db.bin'})
+        attachment.invalidate_recordset()
+        self.assertEqual(attachment.raw, self.content)
@@ -6,11 +6,30 @@ Upload multiple documents at once with batch processing
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import split_every
 import base64
-import zipfile
-import io
+import logging
 import os
-from datetime import datetime
+import tempfile
+import time
+import zipfile
+
+_logger = logging.getLogger(__name__)
+
+# Files created, validated or processed per batch
+BULK_UPLOAD_CHUNK_SIZE = 100
+
+# Sessions with more files are validated and processed in the background
+BULK_UPLOAD_BACKGROUND_THRESHOLD = 200
+
+# ZIP archives larger than this are extracted in the background
+BULK_UPLOAD_BACKGROUND_ZIP_SIZE = 100 * 1024 * 1024
+
+# Seconds a background cron run may spend before handing over to the next run
+BULK_UPLOAD_TIME_LIMIT = 240
+
+# Base64 characters decoded at once when spooling an upload to disk
+SPOOL_CHUNK_SIZE = 4 * 256 * 1024
 
 
 class DocumentBulkUpload(models.Model):
@@ -47,7 +66,7 @@ class DocumentBulkUpload(models.Model):
     ], string='Source Type', default='files')
     
     # ZIP Upload
-    zip_file = fields.Binary(string='ZIP File')
+    zip_file = fields.Binary(string='ZIP File', attachment=True)
     zip_filename = fields.Char(string='ZIP Filename')
     
     # Files
@@ -81,6 +100,27 @@ class DocumentBulkUpload(models.Model):
     send_notifications = fields.Boolean(string='Send Notifications', default=False)
     run_ocr = fields.Boolean(string='Run OCR Processing', default=False)
     
+    # Background Job
+    processing_mode = fields.Selection([
+        ('auto', 'Automatic'),
+        ('immediate', 'Immediate'),
+        ('background', 'Background'),
+    ], string='Processing Mode', default='auto', required=True,
+        help='Automatic runs large archives and sessions in the background')
+    job_type = fields.Selection([
+        ('extract', 'Extraction'),
+        ('validate', 'Validation'),
+        ('process', 'Processing'),
+    ], string='Background Job', readonly=True, copy=False)
+    job_total = fields.Integer(string='Job Total', readonly=True, copy=False)
+    job_done = fields.Integer(string='Job Done', readonly=True, copy=False)
+    job_cursor = fields.Integer(string='Job Cursor', readonly=True, copy=False,
+                                help='Last file line handled by the background job')
+    job_progress = fields.Float(string='Job Progress (%)', compute='_compute_job_progress')
+    process_after_validation = fields.Boolean(
+        string='Process After Validation', readonly=True, copy=False,
+        help='Start processing the files once the background validation is done')
+    
     # Notes
     notes = fields.Text(string='Notes')
     error_log = fields.Text(string='Error Log')
@@ -100,75 +140,270 @@ class DocumentBulkUpload(models.Model):
         for record in self:
             record.document_count = len(record.document_ids)
     
-    @api.model
-    def create(self, vals):
-        if vals.get('name', 'New') == 'New':
-            vals['name'] = self.env['ir.sequence'].next_by_code('document.bulk.upload') or 'BULK-0001'
-        return super().create(vals)
-    
-    @api.onchange('zip_file')
-    def _onchange_zip_file(self):
-        """Extract files from ZIP when uploaded"""
-        if self.zip_file and self.source_type == 'zip':
-            self._extract_zip_contents()
-    
-    def _extract_zip_contents(self):
-        """Extract contents from ZIP file"""
-        if not self.zip_file:
-            return
+    @api.depends('job_total', 'job_done')
+    def _compute_job_progress(self):
+        for record in self:
+            record.job_progress = (record.job_done / record.job_total * 100) if record.job_total else 0
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('name', 'New') == 'New':
+                vals['name'] = self.env['ir.sequence'].next_by_code('document.bulk.upload') or 'BULK-0001'
+        records = super().create(vals_list)
+        records.filtered(lambda r: r.source_type == 'zip' and r.zip_file)._start_extraction()
+        return records
+    
+    def write(self, vals):
+        res = super().write(vals)
+        if vals.get('zip_file'):
+            self.filtered(lambda r: r.source_type == 'zip')._start_extraction()
+        return res
+    
+    # ==================== ZIP Extraction ====================
+    
+    def _get_zip_attachment(self):
+        """Return the attachment holding the ZIP file"""
+        self.ensure_one()
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'zip_file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+    
+    def _start_extraction(self):
+        """Replace the files of the sessions by the content of their ZIP file"""
+        for upload in self:
+            upload.upload_line_ids.unlink()
+            zip_size = upload._get_zip_attachment().file_size
+            if upload._use_background(zip_size > BULK_UPLOAD_BACKGROUND_ZIP_SIZE):
+                upload._start_job('extract')
+            else:
+                upload._extract_zip_contents()
+    
+    def _spool_zip_file(self):
+        """Return (path, temporary) of the ZIP file on disk.
+        
+        A ZIP in the filestore is read in place; otherwise it is decoded
+        by chunks into a temporary file, which the caller must remove.
+        """
+        attachment = self._get_zip_attachment()
+        if attachment.store_fname:
+            path = attachment._full_path(attachment.store_fname)
+            if os.path.isfile(path):
+                return path, False
+        
+        data = self.zip_file
+        if not data:
+            return None, False
+        with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as spool:
+            for start in range(0, len(data), SPOOL_CHUNK_SIZE):
+                spool.write(base64.b64decode(data[start:start + SPOOL_CHUNK_SIZE]))
+        return spool.name, True
+    
+    def _extract_zip_contents(self, deadline=None):
+        """Extract the ZIP file into upload lines, streaming every file to the filestore.
+        
+        Files already extracted are skipped, so an extraction stopped at
+        ``deadline`` resumes where it stopped. Returns False in that case.
+        """
+        self.ensure_one()
+        path, temporary = self._spool_zip_file()
+        if not path:
+            return True
         
         try:
-            zip_data = base64.b64decode(self.zip_file)
-            zip_buffer = io.BytesIO(zip_data)
-            
-            with zipfile.ZipFile(zip_buffer, 'r') as zip_ref:
-                # Clear existing lines
-                self.upload_line_ids.unlink()
+            with zipfile.ZipFile(path, 'r') as zip_ref:
+                extracted = set(self.upload_line_ids.mapped('file_path'))
+                members = [
+                    info for info in zip_ref.infolist()
+                    # Skip directories and hidden files
+                    if not info.is_dir()
+                    and not os.path.basename(info.filename).startswith('.')
+                ]
+                if deadline:
+                    self.job_total = len(members)
                 
-                for file_info in zip_ref.infolist():
-                    # Skip directories
-                    if file_info.is_dir():
-                        continue
-                    
-                    # Skip hidden files
-                    filename = os.path.basename(file_info.filename)
-                    if filename.startswith('.'):
-                        continue
-                    
-                    # Read file content
-                    file_content = zip_ref.read(file_info.filename)
-                    
-                    # Create upload line
-                    self.env['document.bulk.upload.line'].create({
-                        'upload_id': self.id,
-                        'filename': filename,
-                        'file_content': base64.b64encode(file_content),
-                        'file_size': len(file_content),
-                        'file_path': file_info.filename,
-                    })
+                todo = [info for info in members if info.filename not in extracted]
+                done = len(members) - len(todo)
+                for batch in split_every(BULK_UPLOAD_CHUNK_SIZE, todo):
+                    if deadline and time.monotonic() > deadline:
+                        return False
+                    self._extract_zip_members(zip_ref, batch)
+                    done += len(batch)
+                    if deadline:
+                        self.job_done = done
+                        self.env.cr.commit()
         
         except zipfile.BadZipFile:
             raise UserError(_('Invalid ZIP file. Please upload a valid ZIP archive.'))
+        finally:
+            if temporary:
+                os.unlink(path)
+        return True
+    
+    def _extract_zip_members(self, zip_ref, members):
+        """Create the upload lines of ZIP members, copying each file with a bounded buffer"""
+        lines = self.env['document.bulk.upload.line'].create([{
+            'upload_id': self.id,
+            'filename': os.path.basename(info.filename),
+            'file_size': info.file_size,
+            'file_path': info.filename,
+        } for info in members])
+        
+        Attachment = self.env['ir.attachment'].sudo()
+        for line, info in zip(lines, members):
+            with zip_ref.open(info) as member:
+                Attachment._create_from_stream(member, {
+                    'name': 'file_content',
+                    'res_model': line._name,
+                    'res_field': 'file_content',
+                    'res_id': line.id,
+                })
+        return lines
     
-    def action_validate(self):
-        """Validate all uploaded files"""
+    # ==================== Background Jobs ====================
+    
+    def _use_background(self, large):
+        """Whether a job of this session runs in the background"""
         self.ensure_one()
-        self.write({'state': 'validating'})
-        
-        errors = []
-        for line in self.upload_line_ids:
+        return self.processing_mode == 'background' or (self.processing_mode == 'auto' and large)
+    
+    def _start_job(self, job_type, total=0):
+        """Hand a job of the session over to the background cron"""
+        self.write({
+            'job_type': job_type,
+            'job_total': total,
+            'job_done': 0,
+            'job_cursor': 0,
+        })
+        self._trigger_jobs()
+    
+    @api.model
+    def _trigger_jobs(self):
+        """Wake up the background jobs cron"""
+        cron = self.env.ref('tazweed_document_center.cron_bulk_upload_jobs', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+    
+    def _job_notification(self):
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Upload Queued'),
+                'message': _('%d files will be handled in the background.') % self.job_total,
+                'type': 'info',
+                'sticky': False,
+            }
+        }
+    
+    @api.model
+    def cron_run_bulk_upload_jobs(self):
+        """Cron job: run the background jobs of upload sessions in committed chunks.
+        
+        Progress is committed after every chunk, so the session form shows it
+        live. Work left when the time budget runs out is picked up by a new
+        run of the cron.
+        """
+        deadline = time.monotonic() + BULK_UPLOAD_TIME_LIMIT
+        for upload in self.search([('job_type', '!=', False)]):
             try:
-                line.action_validate()
+                done = upload._run_job(deadline)
             except Exception as e:
-                errors.append(f"{line.filename}: {str(e)}")
-        
-        if errors:
+                self.env.cr.rollback()
+                _logger.exception(f'Bulk upload {upload.name}: background job failed')
+                upload.write({
+                    'job_type': False,
+                    'process_after_validation': False,
+                    'state': 'failed',
+                    'error_log': str(e),
+                })
+                self.env.cr.commit()
+                continue
+            if not done:
+                self._trigger_jobs()
+                return
+            self.env.cr.commit()
+    
+    def _run_job(self, deadline):
+        """Run the background job of the session until done or ``deadline``; return whether it is done"""
+        self.ensure_one()
+        if self.job_type == 'extract':
+            if not self._extract_zip_contents(deadline=deadline):
+                return False
+            self.job_type = False
+            return True
+        
+        lines = self.env['document.bulk.upload.line'].search([
+            ('upload_id', '=', self.id),
+            ('id', '>', self.job_cursor),
+        ] + self._get_job_line_domain(self.job_type), order='id')
+        for chunk in split_every(BULK_UPLOAD_CHUNK_SIZE, lines.ids, lines.browse):
+            if time.monotonic() > deadline:
+                return False
+            if self.job_type == 'validate':
+                errors = chunk._validate_lines()
+            else:
+                errors = chunk._process_lines()
             self.write({
-                'error_log': '\n'.join(errors),
-                'state': 'ready' if self.pending_files > 0 else 'failed',
+                'job_done': self.job_done + len(chunk),
+                'job_cursor': chunk[-1].id,
+                'error_log': '\n'.join(filter(None, [self.error_log] + errors)) or False,
             })
+            self.env.cr.commit()
+        
+        if self.job_type == 'validate':
+            self._finish_validation()
+            self.job_type = False
+            if self.process_after_validation:
+                self.process_after_validation = False
+                if self.state == 'ready':
+                    self._start_processing_job()
+        else:
+            self._finish_processing()
+            self.job_type = False
+        return True
+    
+    def _start_processing_job(self):
+        """Queue the processing of the session's validated files"""
+        total = self.env['document.bulk.upload.line'].search_count(
+            [('upload_id', '=', self.id)] + self._get_job_line_domain('process'))
+        self.write({'state': 'processing', 'error_log': False})
+        self._start_job('process', total)
+    
+    @api.model
+    def _get_job_line_domain(self, job_type):
+        """Domain of the upload lines a job handles"""
+        if job_type == 'process':
+            return [('state', 'in', ('pending', 'validated'))]
+        return []
+    
+    # ==================== Validation & Processing ====================
+    
+    def action_validate(self):
+        """Validate all uploaded files"""
+        self.ensure_one()
+        
+        if self.job_type:
+            raise UserError(_('A background job is already running for this upload.'))
+        
+        self.write({'state': 'validating', 'error_log': False})
+        
+        if self._use_background(len(self.upload_line_ids) > BULK_UPLOAD_BACKGROUND_THRESHOLD):
+            self._start_job('validate', len(self.upload_line_ids))
+            return self._job_notification()
+        
+        errors = self.upload_line_ids._validate_lines()
+        self.error_log = '\n'.join(errors) if errors else False
+        self._finish_validation()
+    
+    def _finish_validation(self):
+        """Set the session state once all its files are validated"""
+        if self.error_log:
+            self.state = 'ready' if self.pending_files > 0 else 'failed'
         else:
-            self.write({'state': 'ready'})
+            self.state = 'ready'
     
     def action_process(self):
         """Process all validated files"""
@@ -176,49 +411,42 @@ class DocumentBulkUpload(models.Model):
         
         if self.state not in ['ready', 'partial']:
             raise UserError(_('Please validate files before processing.'))
+        if self.job_type:
+            raise UserError(_('A background job is already running for this upload.'))
         
-        self.write({'state': 'processing'})
+        self.write({'state': 'processing', 'error_log': False})
         
-        created_docs = []
-        errors = []
+        lines = self.upload_line_ids.filtered_domain(self._get_job_line_domain('process'))
+        if self._use_background(len(lines) > BULK_UPLOAD_BACKGROUND_THRESHOLD):
+            self._start_job('process', len(lines))
+            return self._job_notification()
         
-        for line in self.upload_line_ids.filtered(lambda l: l.state == 'pending'):
-            try:
-                doc = line.action_create_document()
-                if doc:
-                    created_docs.append(doc.id)
-            except Exception as e:
-                errors.append(f"{line.filename}: {str(e)}")
-                line.write({
-                    'state': 'failed',
-                    'error_message': str(e),
-                })
-        
-        # Update session
-        self.write({
-            'document_ids': [(6, 0, created_docs)],
-            'error_log': '\n'.join(errors) if errors else False,
-        })
-        
-        # Determine final state
-        if self.failed_files == 0:
-            self.write({'state': 'completed'})
-        elif self.processed_files > 0:
-            self.write({'state': 'partial'})
-        else:
-            self.write({'state': 'failed'})
+        documents = self.document_ids
+        errors = lines._process_lines()
+        self.error_log = '\n'.join(errors) if errors else False
+        self._finish_processing()
+        created_count = len(self.document_ids - documents)
         
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
                 'title': _('Bulk Upload Complete'),
-                'message': _('%d documents created, %d failed') % (len(created_docs), len(errors)),
+                'message': _('%d documents created, %d failed') % (created_count, len(errors)),
                 'type': 'success' if not errors else 'warning',
                 'sticky': False,
             }
         }
     
+    def _finish_processing(self):
+        """Set the session state once all its files are processed"""
+        if self.failed_files == 0:
+            self.state = 'completed'
+        elif self.processed_files > 0:
+            self.state = 'partial'
+        else:
+            self.state = 'failed'
+    
     def action_view_documents(self):
         """View created documents"""
         self.ensure_one()
@@ -238,6 +466,8 @@ class DocumentBulkUpload(models.Model):
             'state': 'draft',
             'error_log': False,
             'document_ids': [(5, 0, 0)],
+            'job_type': False,
+            'process_after_validation': False,
         })
 
 
@@ -283,12 +513,39 @@ class DocumentBulkUploadLine(models.Model):
     # Created Document
     document_id = fields.Many2one('document.center.unified', string='Created Document')
     
+    def _validate_lines(self):
+        """Validate the files and return the error messages"""
+        errors = []
+        for line in self:
+            try:
+                line.action_validate()
+            except Exception as e:
+                errors.append(f"{line.filename}: {str(e)}")
+        return errors
+    
+    def _process_lines(self):
+        """Create the documents of the files and return the error messages"""
+        errors = []
+        documents = self.env['document.center.unified']
+        for line in self:
+            try:
+                documents |= line.action_create_document() or documents.browse()
+            except Exception as e:
+                errors.append(f"{line.filename}: {str(e)}")
+                line.write({
+                    'state': 'failed',
+                    'error_message': str(e),
+                })
+        if documents:
+            self.upload_id.write({'document_ids': [(4, doc_id) for doc_id in documents.ids]})
+        return errors
+    
     def action_validate(self):
         """Validate this file"""
         self.ensure_one()
         
-        # Check file exists
-        if not self.file_content:
+        # Check file exists, without reading it
+        if not self.with_context(bin_size=True).file_content:
             raise ValidationError(_('No file content found.'))
         
         # Check file size (max 50MB)
@@ -447,17 +704,19 @@ class DocumentBulkUploadWizard(models.TransientModel):
         })
         
         # Create upload lines from attachments
-        for attachment in self.file_ids:
-            self.env['document.bulk.upload.line'].create({
-                'upload_id': upload.id,
-                'filename': attachment.name,
-                'file_content': attachment.datas,
-                'file_size': attachment.file_size,
-            })
+        self.env['document.bulk.upload.line'].create([{
+            'upload_id': upload.id,
+            'filename': attachment.name,
+            'file_content': attachment.datas,
+            'file_size': attachment.file_size,
+        } for attachment in self.file_ids])
         
         # Validate and process
         upload.action_validate()
-        if upload.state == 'ready':
+        if upload.job_type == 'validate':
+            # Large sessions are validated in the background, processing follows
+            upload.process_after_validation = True
+        elif upload.state == 'ready':
             upload.action_process()
         
         return {
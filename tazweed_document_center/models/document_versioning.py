@@ -6,8 +6,6 @@ Track document versions and changes with full history
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
-import base64
-import hashlib
 from datetime import datetime
 
 
@@ -30,7 +28,7 @@ class DocumentVersion(models.Model):
     file_content = fields.Binary(string='File Content', attachment=True)
     file_name = fields.Char(string='File Name')
     file_size = fields.Integer(string='File Size (bytes)')
-    file_hash = fields.Char(string='File Hash (MD5)')
+    file_hash = fields.Char(string='File Hash (SHA-256)')
     mime_type = fields.Char(string='MIME Type')
     
     # Metadata
@@ -87,25 +85,27 @@ class DocumentVersion(models.Model):
             else:
                 record.changes_from_previous = 'Initial version'
     
-    @api.model
-    def create(self, vals):
-        # Calculate file hash if content provided
-        if vals.get('file_content'):
-            content = base64.b64decode(vals['file_content'])
-            vals['file_hash'] = hashlib.md5(content).hexdigest()
-            vals['file_size'] = len(content)
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
         
-        record = super().create(vals)
+        # Hash and size of the content, from the attachments: a re-uploaded
+        # file shares its stored copy and digest with the earlier version
+        digests = self.env['ir.attachment']._get_field_digests(records, 'file_content')
+        for record in records:
+            if record.id in digests:
+                digest, size = digests[record.id]
+                record.write({'file_hash': digest, 'file_size': size})
         
         # If this is marked as current, unmark others
-        if record.is_current:
+        for record in records.filtered('is_current'):
             self.search([
                 ('document_id', '=', record.document_id.id),
                 ('id', '!=', record.id),
                 ('is_current', '=', True),
             ]).write({'is_current': False})
         
-        return record
+        return records
     
     def action_set_current(self):
         """Set this version as the current version"""
@@ -4,3 +4,4 @@ from . import portal_main
 from . import portal_leave
 from . import portal_attendance
 from . import portal_payslip
+from . import attendance_api
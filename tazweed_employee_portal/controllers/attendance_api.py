@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http, _
+from odoo.exceptions import AccessDenied, UserError
+from odoo.http import request
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class TazweedAttendanceDeviceApi(http.Controller):
+    """Attendance Device Punch Ingestion"""
+
+    def _json_response(self, data, status=200):
+        return request.make_response(
+            json.dumps(data),
+            headers=[('Content-Type', 'application/json')],
+            status=status,
+        )
+
+    def _authenticate_device(self):
+        """Switch to the user of the request's Bearer API key"""
+        header = request.httprequest.headers.get('Authorization') or ''
+        scheme, _sep, key = header.partition(' ')
+        if scheme.lower() != 'bearer' or not key.strip():
+            raise AccessDenied()
+        uid = request.env['res.users.apikeys']._check_credentials(scope='rpc', key=key.strip())
+        if not uid:
+            raise AccessDenied()
+        request.update_env(user=uid)
+
+    def _read_punches(self):
+        """Return (punches, tz, device) of a CSV or JSON request body"""
+        body = request.httprequest.get_data()
+        content_type = request.httprequest.content_type or ''
+        importer = request.env['tazweed.attendance.punch.importer']
+        params = request.httprequest.args
+
+        if 'csv' in content_type:
+            return importer.parse_csv(body.decode('utf-8-sig')), params.get('tz'), params.get('device')
+
+        data = json.loads(body or b'null')
+        if isinstance(data, list):
+            return data, params.get('tz'), params.get('device')
+        if not isinstance(data, dict) or not isinstance(data.get('punches'), list):
+            raise UserError(_('Expected a list of punches or an object with a "punches" list.'))
+        return data['punches'], data.get('tz') or params.get('tz'), data.get('device') or params.get('device')
+
+    @http.route('/api/attendance/punches', type='http', auth='public', methods=['POST'], csrf=False)
+    def attendance_punches(self, **kw):
+        """Ingest a batch of device punches.
+
+        Accepts a CSV export (badge, timestamp, type, device columns) or
+        JSON, either a list of punches or {"punches": [...], "tz": ...,
+        "device": ...}, and returns the import statistics.
+        """
+        try:
+            self._authenticate_device()
+        except AccessDenied:
+            return self._json_response({'error': 'Invalid API key'}, status=401)
+
+        if not request.env.user.has_group('tazweed_leave.group_leave_manager'):
+            return self._json_response({'error': 'Not allowed to import attendances'}, status=403)
+
+        try:
+            punches, tz, device = self._read_punches()
+            stats = request.env['tazweed.attendance.punch.importer'].import_punches(punches, tz=tz, device=device)
+        except (UnicodeDecodeError, ValueError) as e:
+            return self._json_response({'error': 'Malformed request body: %s' % e}, status=400)
+        except UserError as e:
+            return self._json_response({'error': str(e)}, status=400)
+
+        _logger.info('Attendance device import: %s', {key: value for key, value in stats.items() if key != 'errors'})
+        return self._json_response(stats)
@@ -181,11 +181,16 @@ class TazweedAttendancePortal(CustomerPortal):
             ('check_in', '<=', end_date),
         ])
         
-        # Calculate summary
-        total_hours = sum(att.worked_hours for att in attendances)
-        total_days = len(set(att.check_in.date() for att in attendances))
-        late_count = len([att for att in attendances if getattr(att, 'is_late', False)])
-        overtime_hours = sum(getattr(att, 'overtime_hours', 0) for att in attendances)
+        # Read the pre-aggregated monthly summary, building it on first access
+        Summary = request.env['hr.attendance.summary'].sudo()
+        summary = Summary.search([
+            ('employee_id', '=', employee.id),
+            ('year', '=', year),
+            ('month', '=', str(month)),
+        ], limit=1)
+        if not summary:
+            summary = request.env['tazweed.attendance.processor'].sudo().refresh_summaries(
+                [(employee.id, year, month)])
         
         # Generate month options
         months = [
@@ -204,10 +209,10 @@ class TazweedAttendancePortal(CustomerPortal):
             'months': months,
             'years': years,
             'summary': {
-                'total_hours': total_hours,
-                'total_days': total_days,
-                'late_count': late_count,
-                'overtime_hours': overtime_hours,
+                'total_hours': summary.worked_hours,
+                'total_days': summary.attended_days,
+                'late_count': summary.late_count,
+                'overtime_hours': summary.overtime_hours,
             },
         }
         
@@ -1,10 +1,24 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import split_every
 import base64
+import logging
 import secrets
+import time
 from datetime import datetime, timedelta
 
+_logger = logging.getLogger(__name__)
+
+# Batches with more items than this are sent in the background in 'auto' mode
+BULK_DISPATCH_THRESHOLD = 100
+
+# Items sent and committed together by the background dispatch
+BULK_DISPATCH_CHUNK_SIZE = 200
+
+# Seconds a dispatch cron run may spend before handing over to the next run
+BULK_DISPATCH_TIME_LIMIT = 240
+
 
 class BulkSigningBatch(models.Model):
     """Bulk Signing Batch - Manage multiple signature requests at once"""
@@ -127,6 +141,20 @@ class BulkSigningBatch(models.Model):
         ('cancelled', 'Cancelled'),
     ], string='Status', default='draft', tracking=True)
     
+    # Dispatch
+    dispatch_mode = fields.Selection([
+        ('auto', 'Automatic'),
+        ('immediate', 'Immediate'),
+        ('background', 'Background'),
+    ], string='Dispatch Mode', default='auto', required=True,
+        help='Automatic sends large batches in the background and small ones right away')
+    dispatch_total = fields.Integer(string='Items to Send', readonly=True, copy=False)
+    dispatch_done = fields.Integer(string='Items Processed', readonly=True, copy=False)
+    dispatch_progress = fields.Float(
+        string='Dispatch Progress (%)',
+        compute='_compute_dispatch_progress'
+    )
+    
     # Statistics
     total_count = fields.Integer(
         string='Total Requests',
@@ -209,6 +237,12 @@ class BulkSigningBatch(models.Model):
             batch.failed_count = len(items.filtered(lambda i: i.state == 'failed'))
             batch.progress = (batch.signed_count / batch.total_count * 100) if batch.total_count > 0 else 0
 
+    @api.depends('dispatch_total', 'dispatch_done')
+    def _compute_dispatch_progress(self):
+        """Compute the share of items processed by the current dispatch"""
+        for batch in self:
+            batch.dispatch_progress = (batch.dispatch_done / batch.dispatch_total * 100) if batch.dispatch_total else 0
+
     def action_generate_items(self):
         """Generate batch items based on configuration"""
         self.ensure_one()
@@ -226,14 +260,13 @@ class BulkSigningBatch(models.Model):
         self.item_ids.unlink()
         
         # Create items for each employee
-        for employee in employees:
-            self.env['bulk.signing.item'].create({
-                'batch_id': self.id,
-                'employee_id': employee.id,
-                'signer_name': employee.name,
-                'signer_email': employee.work_email,
-                'document_name': f"{self.document_type} - {employee.name}",
-            })
+        self.env['bulk.signing.item'].create([{
+            'batch_id': self.id,
+            'employee_id': employee.id,
+            'signer_name': employee.name,
+            'signer_email': employee.work_email,
+            'document_name': f"{self.document_type} - {employee.name}",
+        } for employee in employees])
         
         self.write({'state': 'ready'})
         
@@ -254,30 +287,31 @@ class BulkSigningBatch(models.Model):
         if not self.item_ids:
             raise UserError(_('No items in this batch. Please generate items first.'))
         
+        items = self.item_ids.filtered(lambda i: i.state == 'draft')
         self.write({
             'state': 'processing',
-            'sent_date': fields.Datetime.now()
+            'sent_date': fields.Datetime.now(),
+            'dispatch_total': len(items),
+            'dispatch_done': 0,
         })
         
-        success_count = 0
-        error_count = 0
-        
-        for item in self.item_ids.filtered(lambda i: i.state == 'draft'):
-            try:
-                item.action_create_and_send()
-                success_count += 1
-            except Exception as e:
-                item.write({
-                    'state': 'failed',
-                    'error_message': str(e)
-                })
-                error_count += 1
+        if self.dispatch_mode == 'background' or (
+            self.dispatch_mode == 'auto' and len(items) > BULK_DISPATCH_THRESHOLD
+        ):
+            self._trigger_dispatch()
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': _('Batch Queued'),
+                    'message': _('%d items will be sent in the background.') % len(items),
+                    'type': 'info',
+                }
+            }
         
-        # Update batch state
-        if error_count == 0:
-            self.write({'state': 'sent'})
-        else:
-            self.write({'state': 'partially_completed'})
+        success_count, error_count = items._dispatch()
+        self.dispatch_done = len(items)
+        self._finish_dispatch()
         
         return {
             'type': 'ir.actions.client',
@@ -289,6 +323,41 @@ class BulkSigningBatch(models.Model):
             }
         }
 
+    def _trigger_dispatch(self):
+        """Wake up the background dispatch cron"""
+        cron = self.env.ref('tazweed_esignature.cron_process_bulk_signing', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def _finish_dispatch(self):
+        """Set the batch state once all its draft items are processed"""
+        for batch in self:
+            if any(item.state == 'failed' for item in batch.item_ids):
+                batch.state = 'partially_completed'
+            else:
+                batch.state = 'sent'
+
+    @api.model
+    def cron_process_bulk_dispatch(self):
+        """Cron job: send the draft items of processing batches in committed chunks.
+        
+        Progress is committed after every chunk, so the batch form shows it
+        live. Work left when the time budget runs out is picked up by a new
+        run of the cron.
+        """
+        deadline = time.monotonic() + BULK_DISPATCH_TIME_LIMIT
+        for batch in self.search([('state', '=', 'processing')]):
+            items = batch.item_ids.filtered(lambda i: i.state == 'draft')
+            for chunk in split_every(BULK_DISPATCH_CHUNK_SIZE, items.ids, items.browse):
+                if time.monotonic() > deadline:
+                    batch._trigger_dispatch()
+                    return
+                chunk._dispatch()
+                batch.dispatch_done += len(chunk)
+                self.env.cr.commit()
+            batch._finish_dispatch()
+            self.env.cr.commit()
+
     def action_cancel(self):
         """Cancel the batch and all pending requests"""
         self.ensure_one()
@@ -401,44 +470,43 @@ class BulkSigningItem(models.Model):
     def action_create_and_send(self):
         """Create signature request and send for signing"""
         self.ensure_one()
-        batch = self.batch_id
-        
-        # Determine document to use
-        document = self.document_file or batch.master_document
-        filename = self.document_filename or batch.master_filename or 'document.pdf'
         
-        if not document:
+        if not (self.document_file or self.batch_id.master_document):
             raise UserError(_('No document available for this item.'))
         
-        # Create signature request
-        request_vals = {
+        self._dispatch(raise_on_error=True)
+        return self.signature_request_id
+
+    def _prepare_request_vals(self):
+        """Values of the signature request of the item"""
+        batch = self.batch_id
+        return {
             'document_name': self.document_name or f"{batch.document_type} - {self.signer_name}",
             'document_type': batch.document_type,
-            'document_file': document,
-            'document_filename': filename,
+            'document_file': self.document_file or batch.master_document,
+            'document_filename': self.document_filename or batch.master_filename or 'document.pdf',
             'employee_id': self.employee_id.id if self.employee_id else False,
             'signing_order': batch.signing_order,
             'expiry_date': fields.Date.today() + timedelta(days=batch.expiry_days),
             'reminder_enabled': batch.reminder_enabled,
             'reminder_days': batch.reminder_days,
         }
-        
-        request = self.env['signature.request'].create(request_vals)
-        
+
+    def _prepare_signer_vals(self, request):
+        """Values of the signers of the item's signature request"""
         # Add primary signer
-        self.env['signature.signer'].create({
+        vals_list = [{
             'request_id': request.id,
             'name': self.signer_name,
             'email': self.signer_email,
             'phone': self.signer_phone,
             'role': 'signer',
             'sequence': 1,
-        })
+        }]
         
         # Add additional signers from batch
-        sequence = 2
-        for user in batch.additional_signer_ids:
-            self.env['signature.signer'].create({
+        for sequence, user in enumerate(self.batch_id.additional_signer_ids, start=2):
+            vals_list.append({
                 'request_id': request.id,
                 'name': user.name,
                 'email': user.email,
@@ -446,19 +514,79 @@ class BulkSigningItem(models.Model):
                 'role': 'approver',
                 'sequence': sequence,
             })
-            sequence += 1
+        return vals_list
+
+    def _dispatch(self, raise_on_error=False):
+        """Create and send the signature requests of a set of items.
         
-        # Send for signature
-        request.action_send_for_signature()
+        Requests, signers and audit logs are created with one call each, and
+        the emails are queued for the mail queue instead of being sent
+        inline. If the set fails as a whole, items are retried one by one so
+        a single bad item only fails itself. Returns (sent, failed) counts.
+        """
+        items = self.filtered(lambda i: i.document_file or i.batch_id.master_document)
+        missing = self - items
+        missing.write({
+            'state': 'failed',
+            'error_message': _('No document available for this item.'),
+        })
+        if not items:
+            return 0, len(missing)
         
-        # Update item
-        self.write({
-            'signature_request_id': request.id,
+        try:
+            with self.env.cr.savepoint():
+                items._create_and_send_requests()
+            return len(items), len(missing)
+        except Exception as e:
+            if raise_on_error:
+                raise
+            if len(items) == 1:
+                items.write({'state': 'failed', 'error_message': str(e)})
+                return 0, len(self)
+            _logger.warning(f'Bulk signing chunk failed, sending items one by one: {e}')
+        
+        sent, failed = 0, len(missing)
+        for item in items:
+            item_sent, item_failed = item._dispatch()
+            sent += item_sent
+            failed += item_failed
+        return sent, failed
+
+    def _create_and_send_requests(self):
+        """Create the signature requests of the items and send them in bulk"""
+        now = fields.Datetime.now()
+        requests = self.env['signature.request'].create([
+            item._prepare_request_vals() for item in self
+        ])
+        
+        signer_vals = []
+        for item, request in zip(self, requests):
+            signer_vals += item._prepare_signer_vals(request)
+        signers = self.env['signature.signer'].create(signer_vals)
+        
+        # Send emails based on signing order
+        recipients = signers.filtered(
+            lambda s: s.request_id.signing_order == 'parallel' or s.sequence == 1
+        )
+        recipients._queue_signature_request_emails()
+        
+        requests.write({
             'state': 'sent',
-            'sent_date': fields.Datetime.now(),
+            'sent_date': now,
+            'current_signer_sequence': 1,
         })
+        self.env['signature.audit.log'].create([{
+            'request_id': request.id,
+            'action': 'sent',
+            'description': _('Document sent for signature'),
+        } for request in requests])
         
-        return request
+        for item, request in zip(self, requests):
+            item.signature_request_id = request
+        self.write({
+            'state': 'sent',
+            'sent_date': now,
+        })
 
     def action_view_request(self):
         """View the signature request"""
@@ -509,21 +637,22 @@ class BulkSigningImportWizard(models.TransientModel):
         csv_data = base64.b64decode(self.csv_file).decode('utf-8')
         reader = csv.DictReader(io.StringIO(csv_data), delimiter=self.delimiter)
         
-        created_count = 0
+        vals_list = []
         for row in reader:
             name = row.get(self.name_column, '')
             email = row.get(self.email_column, '')
             phone = row.get(self.phone_column, '')
             
             if name and email:
-                self.env['bulk.signing.item'].create({
+                vals_list.append({
                     'batch_id': self.batch_id.id,
                     'signer_name': name,
                     'signer_email': email,
                     'signer_phone': phone,
                     'document_name': f"{self.batch_id.document_type} - {name}",
                 })
-                created_count += 1
+        self.env['bulk.signing.item'].create(vals_list)
+        created_count = len(vals_list)
         
         return {
             'type': 'ir.actions.client',
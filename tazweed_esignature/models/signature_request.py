@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
-import base64
-import hashlib
 import secrets
+from collections import defaultdict
 from datetime import timedelta
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
@@ -298,20 +297,33 @@ class SignatureRequest(models.Model):
                 vals['name'] = self.env['ir.sequence'].next_by_code('signature.request') or _('New')
             if not vals.get('access_token'):
                 vals['access_token'] = secrets.token_urlsafe(32)
-            # Compute document hash and size
-            if vals.get('document_file'):
-                doc_bytes = base64.b64decode(vals['document_file'])
-                vals['document_hash'] = hashlib.sha256(doc_bytes).hexdigest()
-                vals['document_size'] = len(doc_bytes)
-        return super().create(vals_list)
+        requests = super().create(vals_list)
+        requests._update_document_hash()
+        return requests
 
     def write(self, vals):
         """Override write to update document hash if document changes."""
+        res = super().write(vals)
         if vals.get('document_file'):
-            doc_bytes = base64.b64decode(vals['document_file'])
-            vals['document_hash'] = hashlib.sha256(doc_bytes).hexdigest()
-            vals['document_size'] = len(doc_bytes)
-        return super().write(vals)
+            self._update_document_hash()
+        return res
+
+    def _update_document_hash(self):
+        """Store the hash and size of the documents, taken from their attachments.
+
+        The content hash service streams each distinct document once, so
+        requests sharing a master document do not hash it again.
+        """
+        digests = self.env['ir.attachment']._get_field_digests(self, 'document_file')
+        by_digest = defaultdict(list)
+        for request in self:
+            if request.id in digests:
+                by_digest[digests[request.id]].append(request.id)
+        for (digest, size), request_ids in by_digest.items():
+            self.browse(request_ids).write({
+                'document_hash': digest,
+                'document_size': size,
+            })
 
     def action_send_for_signature(self):
         """Send the document for signature."""
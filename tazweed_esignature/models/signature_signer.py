@@ -92,6 +92,24 @@ class SignatureSigner(models.Model):
         if self.request_id:
             self.request_id._log_audit('sent', f'Signature request sent to {self.name}', self)
 
+    def _queue_signature_request_emails(self):
+        """Queue the signature request emails of several signers.
+
+        Emails go to the mail queue and are sent by its cron in batches; sent
+        dates and audit logs are written with one call each.
+        """
+        template = self.env.ref('tazweed_esignature.email_signature_request', raise_if_not_found=False)
+        if template:
+            for signer in self:
+                template.send_mail(signer.id, force_send=False)
+        self.write({'sent_date': fields.Datetime.now()})
+        self.env['signature.audit.log'].create([{
+            'request_id': signer.request_id.id,
+            'signer_id': signer.id,
+            'action': 'sent',
+            'description': f'Signature request sent to {signer.name}',
+        } for signer in self if signer.request_id])
+
     def _send_reminder_email(self):
         """Send reminder email to the signer."""
         self.ensure_one()
@@ -137,8 +137,12 @@ class SignatureVerification(models.Model):
     @api.depends('document_file')
     def _compute_document_hash(self):
         """Compute SHA-256 hash of the document"""
+        # Stored documents are hashed from the filestore, in constant memory
+        digests = self.env['ir.attachment']._get_field_digests(self, 'document_file')
         for record in self:
-            if record.document_file:
+            if record.id in digests:
+                record.document_hash = digests[record.id][0]
+            elif record.document_file:
                 doc_bytes = base64.b64decode(record.document_file)
                 record.document_hash = hashlib.sha256(doc_bytes).hexdigest()
             else:
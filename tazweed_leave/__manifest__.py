@@ -60,12 +60,14 @@ Website: https://tazweedjobs.ae
         'data/leave_type_data.xml',
         'data/public_holiday_data.xml',
         'data/leave_sequence_data.xml',
+        'data/leave_ledger_data.xml',
         # Views
         'views/hr_leave_type_views.xml',
         'views/hr_leave_views.xml',
         'views/hr_leave_allocation_views.xml',
         'views/hr_attendance_views.xml',
         'views/public_holiday_views.xml',
+        'views/leave_ledger_views.xml',
         'views/dashboard_views.xml',
         'views/menu.xml',
         # Wizards
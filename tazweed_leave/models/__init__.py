@@ -3,6 +3,10 @@
 from . import hr_leave_type
 from . import hr_leave
 from . import hr_leave_allocation
+from . import leave_ledger
 from . import hr_attendance
 from . import public_holiday
+from . import working_calendar
+from . import attendance_processor
+from . import attendance_punch_import
 from . import res_config_settings
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from collections import defaultdict
+from datetime import date, timedelta
+
+
+class TazweedAttendanceProcessor(models.AbstractModel):
+    """Batch Attendance Processing"""
+    _name = 'tazweed.attendance.processor'
+    _description = 'Attendance Processor'
+
+    @api.model
+    def _get_weekday_schedules(self, calendar_ids):
+        """Return {calendar id: {weekday: (first hour_from, last hour_to)}} with one query"""
+        calendar_ids = [calendar_id for calendar_id in set(calendar_ids) if calendar_id]
+        if not calendar_ids:
+            return {}
+        lines = self.env['resource.calendar.attendance'].sudo().search_read([
+            ('calendar_id', 'in', calendar_ids),
+            ('display_type', '=', False),
+        ], ['calendar_id', 'dayofweek', 'hour_from', 'hour_to'], load=False)
+
+        schedules = defaultdict(dict)
+        for line in lines:
+            day_schedules = schedules[line['calendar_id']]
+            weekday = int(line['dayofweek'])
+            start_hour, end_hour = day_schedules.get(weekday, (line['hour_from'], line['hour_to']))
+            day_schedules[weekday] = (min(start_hour, line['hour_from']), max(end_hour, line['hour_to']))
+        return schedules
+
+    # ============================================================
+    # Monthly Summaries
+    # ============================================================
+
+    @api.model
+    def _get_summary_keys(self, attendances):
+        """Return the (employee id, year, month) summaries the attendances count in"""
+        return {
+            (attendance.employee_id.id, attendance.check_in.year, attendance.check_in.month)
+            for attendance in attendances
+            if attendance.employee_id and attendance.check_in
+        }
+
+    @api.model
+    def _read_attendance_totals(self, keys):
+        """Return {(employee id, year, month): totals} of the attendances, with one grouped query"""
+        self.env['hr.attendance'].flush_model()
+        keys = list(keys)
+        self.env.cr.execute("""
+            WITH keys AS (
+                SELECT * FROM unnest(%s::int[], %s::int[], %s::int[]) AS k(employee_id, year, month)
+            ), days AS (
+                SELECT k.employee_id, k.year, k.month, a.check_in::date AS day,
+                       bool_or(a.attendance_status = 'present') AS present,
+                       bool_or(a.attendance_status = 'half_day') AS half,
+                       MAX(a.scheduled_hours) AS scheduled_hours,
+                       SUM(a.worked_hours) AS worked_hours,
+                       SUM(a.overtime_hours) AS overtime_hours,
+                       COUNT(*) FILTER (WHERE a.is_late) AS late_count,
+                       COUNT(*) FILTER (WHERE a.is_early_leave) AS early_leave_count,
+                       SUM(a.late_minutes) AS late_minutes,
+                       SUM(a.early_leave_minutes) AS early_leave_minutes
+                FROM keys k
+                JOIN hr_attendance a
+                  ON a.employee_id = k.employee_id
+                 AND a.check_in >= make_date(k.year, k.month, 1)
+                 AND a.check_in < make_date(k.year, k.month, 1) + interval '1 month'
+                GROUP BY k.employee_id, k.year, k.month, a.check_in::date
+            )
+            SELECT employee_id, year, month,
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE present),
+                   COUNT(*) FILTER (WHERE half AND NOT present),
+                   COALESCE(SUM(scheduled_hours), 0),
+                   COALESCE(SUM(worked_hours), 0),
+                   COALESCE(SUM(overtime_hours), 0),
+                   SUM(late_count), SUM(early_leave_count),
+                   COALESCE(SUM(late_minutes), 0), COALESCE(SUM(early_leave_minutes), 0)
+            FROM days
+            GROUP BY employee_id, year, month
+        """, (
+            [key[0] for key in keys],
+            [key[1] for key in keys],
+            [key[2] for key in keys],
+        ))
+        columns = [
+            'attended_days', 'present_days', 'half_days',
+            'scheduled_hours', 'worked_hours', 'overtime_hours',
+            'late_count', 'early_leave_count', 'total_late_minutes', 'total_early_leave_minutes',
+        ]
+        return {tuple(row[:3]): dict(zip(columns, row[3:])) for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _read_leave_days(self, keys):
+        """Return {(employee id, year, month): validated leave days starting in the month}"""
+        self.env['hr.leave'].flush_model(['employee_id', 'state', 'date_from', 'number_of_days'])
+        keys = list(keys)
+        self.env.cr.execute("""
+            SELECT k.employee_id, k.year, k.month, SUM(l.number_of_days)
+            FROM unnest(%s::int[], %s::int[], %s::int[]) AS k(employee_id, year, month)
+            JOIN hr_leave l
+              ON l.employee_id = k.employee_id
+             AND l.state = 'validate'
+             AND l.date_from >= make_date(k.year, k.month, 1)
+             AND l.date_from < make_date(k.year, k.month, 1) + interval '1 month'
+            GROUP BY k.employee_id, k.year, k.month
+        """, (
+            [key[0] for key in keys],
+            [key[1] for key in keys],
+            [key[2] for key in keys],
+        ))
+        return {tuple(row[:3]): row[3] or 0 for row in self.env.cr.fetchall()}
+
+    @api.model
+    def refresh_summaries(self, keys):
+        """Rebuild the monthly summaries of (employee id, year, month) keys.
+
+        Attendance totals come from one grouped query, calendar days from
+        the cached working calendar, and the summaries are written with a
+        single upsert, whatever the number of keys.
+        """
+        keys = list(set(keys))
+        if not keys:
+            return self.env['hr.attendance.summary']
+
+        totals = self._read_attendance_totals(keys)
+        leave_days = self._read_leave_days(keys)
+        employees = self.env['hr.employee'].sudo().browse({key[0] for key in keys})
+        company_ids = {employee.id: employee.company_id.id or self.env.company.id for employee in employees}
+
+        # Days not yet elapsed are neither worked nor missed
+        today = fields.Date.context_today(self)
+        ranges = []
+        for employee_id, year, month in keys:
+            start = date(year, month, 1)
+            end = min(date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1), today)
+            ranges.append((company_ids[employee_id], start, end))
+        day_counts = self.env['tazweed.working.calendar'].count_days_many(ranges)
+
+        rows = []
+        for key, counts in zip(keys, day_counts):
+            values = totals.get(key) or defaultdict(int)
+            leaves = int(round(leave_days.get(key, 0)))
+            absent = max(counts.working - values['present_days'] - values['half_days'] - leaves, 0)
+            percentage = (
+                (values['present_days'] + values['half_days'] * 0.5) / counts.working * 100
+                if counts.working else 0
+            )
+            rows.append(key + (
+                counts.working, values['attended_days'], values['present_days'], absent,
+                values['half_days'], leaves, counts.holidays, counts.weekends,
+                values['scheduled_hours'], values['worked_hours'], values['overtime_hours'],
+                values['late_count'], values['early_leave_count'],
+                values['total_late_minutes'], values['total_early_leave_minutes'], percentage,
+            ))
+
+        Summary = self.env['hr.attendance.summary']
+        Summary.flush_model()
+        self.env.cr.execute("""
+            INSERT INTO hr_attendance_summary AS s (
+                employee_id, year, month,
+                working_days, attended_days, present_days, absent_days, half_days,
+                leave_days, holiday_days, weekend_days,
+                scheduled_hours, worked_hours, overtime_hours,
+                late_count, early_leave_count, total_late_minutes, total_early_leave_minutes,
+                attendance_percentage,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT r.*, %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+            FROM unnest(
+                %(employee_ids)s::int[], %(years)s::int[], %(months)s::varchar[],
+                %(working_days)s::int[], %(attended_days)s::int[], %(present_days)s::int[],
+                %(absent_days)s::int[], %(half_days)s::int[], %(leave_days)s::int[],
+                %(holiday_days)s::int[], %(weekend_days)s::int[],
+                %(scheduled_hours)s::float8[], %(worked_hours)s::float8[], %(overtime_hours)s::float8[],
+                %(late_count)s::int[], %(early_leave_count)s::int[],
+                %(total_late_minutes)s::int[], %(total_early_leave_minutes)s::int[],
+                %(attendance_percentage)s::float8[]
+            ) AS r
+            ON CONFLICT (employee_id, year, month) DO UPDATE SET
+                working_days = EXCLUDED.working_days,
+                attended_days = EXCLUDED.attended_days,
+                present_days = EXCLUDED.present_days,
+                absent_days = EXCLUDED.absent_days,
+                half_days = EXCLUDED.half_days,
+                leave_days = EXCLUDED.leave_days,
+                holiday_days = EXCLUDED.holiday_days,
+                weekend_days = EXCLUDED.weekend_days,
+                scheduled_hours = EXCLUDED.scheduled_hours,
+                worked_hours = EXCLUDED.worked_hours,
+                overtime_hours = EXCLUDED.overtime_hours,
+                late_count = EXCLUDED.late_count,
+                early_leave_count = EXCLUDED.early_leave_count,
+                total_late_minutes = EXCLUDED.total_late_minutes,
+                total_early_leave_minutes = EXCLUDED.total_early_leave_minutes,
+                attendance_percentage = EXCLUDED.attendance_percentage,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+            RETURNING s.id
+        """, {
+            'uid': self.env.uid,
+            'employee_ids': [row[0] for row in rows],
+            'years': [row[1] for row in rows],
+            'months': [str(row[2]) for row in rows],
+            'working_days': [row[3] for row in rows],
+            'attended_days': [row[4] for row in rows],
+            'present_days': [row[5] for row in rows],
+            'absent_days': [row[6] for row in rows],
+            'half_days': [row[7] for row in rows],
+            'leave_days': [row[8] for row in rows],
+            'holiday_days': [row[9] for row in rows],
+            'weekend_days': [row[10] for row in rows],
+            'scheduled_hours': [row[11] for row in rows],
+            'worked_hours': [row[12] for row in rows],
+            'overtime_hours': [row[13] for row in rows],
+            'late_count': [row[14] for row in rows],
+            'early_leave_count': [row[15] for row in rows],
+            'total_late_minutes': [row[16] for row in rows],
+            'total_early_leave_minutes': [row[17] for row in rows],
+            'attendance_percentage': [row[18] for row in rows],
+        })
+        summary_ids = [row[0] for row in self.env.cr.fetchall()]
+        Summary.invalidate_model()
+        return Summary.browse(summary_ids)
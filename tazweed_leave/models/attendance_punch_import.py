@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api, _
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import groupby
+import csv
+import io
+import logging
+
+import pytz
+
+_logger = logging.getLogger(__name__)
+
+# Punches of one employee closer than this to the previous one are repeats
+PUNCH_DEDUP_SECONDS = 60
+
+# Employees whose attendances are written together in one savepoint
+PUNCH_IMPORT_CHUNK_SIZE = 500
+
+# Accepted spellings of the punch direction
+PUNCH_TYPES = {
+    'in': 'in', 'check_in': 'in', 'checkin': 'in', 'i': 'in', '0': 'in',
+    'out': 'out', 'check_out': 'out', 'checkout': 'out', 'o': 'out', '1': 'out',
+}
+
+
+class TazweedAttendancePunchImporter(models.AbstractModel):
+    """Bulk Attendance Punch Ingestion"""
+    _name = 'tazweed.attendance.punch.importer'
+    _description = 'Attendance Punch Importer'
+
+    # ============================================================
+    # Parsing
+    # ============================================================
+
+    @api.model
+    def parse_csv(self, text):
+        """Return the punches of a terminal CSV export.
+
+        Columns: badge, timestamp, and optionally type (in/out) and device.
+        """
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or not {'badge', 'timestamp'} <= {name.strip().lower() for name in reader.fieldnames}:
+            raise UserError(_('The punch file needs "badge" and "timestamp" columns.'))
+        return [
+            {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+            for row in reader
+        ]
+
+    @api.model
+    def _parse_timestamp(self, value, tz):
+        """Return a punch timestamp as a naive UTC datetime"""
+        if isinstance(value, (int, float)):
+            return datetime.utcfromtimestamp(value)
+        value = str(value).strip()
+        if value.isdigit():
+            return datetime.utcfromtimestamp(int(value))
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        stamp = datetime.fromisoformat(value)
+        if stamp.tzinfo is None:
+            stamp = tz.localize(stamp)
+        return stamp.astimezone(pytz.utc).replace(tzinfo=None, microsecond=0)
+
+    @api.model
+    def _normalize_punches(self, punches, tz, device, stats):
+        """Return the valid punches as (employee id, timestamp, type, device) tuples"""
+        badges = {str(punch.get('badge') or '').strip() for punch in punches if isinstance(punch, dict)} - {''}
+        badge_map = self._get_badge_map(badges)
+
+        normalized = []
+        for punch in punches:
+            if not isinstance(punch, dict):
+                stats['invalid'] += 1
+                continue
+            employee_id = badge_map.get(str(punch.get('badge') or '').strip())
+            if not employee_id:
+                stats['unknown_badge'] += 1
+                continue
+            try:
+                stamp = self._parse_timestamp(punch.get('timestamp'), tz)
+            except (TypeError, ValueError, OverflowError):
+                stats['invalid'] += 1
+                continue
+            punch_type = PUNCH_TYPES.get(str(punch.get('type') or '').strip().lower())
+            normalized.append((employee_id, stamp, punch_type, punch.get('device') or device))
+        return normalized
+
+    @api.model
+    def _get_badge_map(self, badges):
+        """Return {badge: employee id} for the badges, read with one query"""
+        if not badges:
+            return {}
+        employees = self.env['hr.employee'].sudo().with_context(active_test=False).search_read(
+            [('barcode', 'in', list(badges))], ['barcode'])
+        return {employee['barcode']: employee['id'] for employee in employees}
+
+    # ============================================================
+    # Pairing
+    # ============================================================
+
+    @api.model
+    def _get_last_attendances(self, employee_ids):
+        """Return {employee id: (attendance id, check_in, check_out)} of the latest attendance"""
+        self.env['hr.attendance'].flush_model(['employee_id', 'check_in', 'check_out'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (employee_id) employee_id, id, check_in, check_out
+            FROM hr_attendance
+            WHERE employee_id = ANY(%s)
+            ORDER BY employee_id, check_in DESC, id DESC
+        """, (list(employee_ids),))
+        return {row[0]: row[1:] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _pair_punches(self, punches, stats):
+        """Pair sorted punches into attendances in one streaming pass.
+
+        Returns {employee id: (closings, new attendance vals)} where closings
+        are (attendance id, vals) check-outs of attendances already open.
+        Punches not after the employee's last recorded punch, or repeated
+        within PUNCH_DEDUP_SECONDS, are duplicates; a check-in while checked
+        in and a check-out while checked out are anomalies. Untyped punches
+        toggle between check-in and check-out.
+        """
+        punches.sort(key=lambda punch: (punch[0], punch[1]))
+        last_attendances = self._get_last_attendances({punch[0] for punch in punches})
+        dedup_window = timedelta(seconds=PUNCH_DEDUP_SECONDS)
+
+        operations = {}
+        for employee_id, employee_punches in groupby(punches, key=lambda punch: punch[0]):
+            closings = []
+            new_vals = []
+            open_attendance = None
+            last_stamp = None
+            last_attendance = last_attendances.get(employee_id)
+            if last_attendance:
+                attendance_id, check_in, check_out = last_attendance
+                last_stamp = check_out or check_in
+                if not check_out:
+                    open_attendance = {'id': attendance_id}
+
+            for _employee_id, stamp, punch_type, device in employee_punches:
+                if last_stamp and stamp <= last_stamp + dedup_window:
+                    stats['duplicate'] += 1
+                    continue
+                punch_type = punch_type or ('out' if open_attendance else 'in')
+                if punch_type == 'in':
+                    if open_attendance:
+                        stats['anomaly'] += 1
+                        continue
+                    open_attendance = {
+                        'employee_id': employee_id,
+                        'check_in': stamp,
+                        'check_in_method': 'biometric',
+                        'check_in_device': device,
+                    }
+                else:
+                    if not open_attendance:
+                        stats['anomaly'] += 1
+                        continue
+                    out_vals = {
+                        'check_out': stamp,
+                        'check_out_method': 'biometric',
+                        'check_out_device': device,
+                    }
+                    if open_attendance.get('id'):
+                        closings.append((open_attendance['id'], out_vals))
+                    else:
+                        new_vals.append(dict(open_attendance, **out_vals))
+                    open_attendance = None
+                last_stamp = stamp
+
+            if open_attendance and not open_attendance.get('id'):
+                new_vals.append(open_attendance)
+            if closings or new_vals:
+                operations[employee_id] = (closings, new_vals)
+        return operations
+
+    # ============================================================
+    # Ingestion
+    # ============================================================
+
+    @api.model
+    def import_punches(self, punches, tz=None, device=None):
+        """Ingest a batch of punches and return import statistics.
+
+        Badges are resolved with one query, punches are paired per employee
+        in memory, and attendances are written by chunks of employees, each
+        in one savepoint with a per-employee fallback, so a bad record only
+        rejects its own employee's punches. Monthly summaries are refreshed
+        once at the end.
+        """
+        stats = Counter()
+        stats['received'] = len(punches)
+        try:
+            timezone = pytz.timezone(tz or 'UTC')
+        except pytz.UnknownTimeZoneError:
+            raise UserError(_('Unknown time zone: %s') % tz)
+
+        normalized = self._normalize_punches(punches, timezone, device, stats)
+        operations = self._pair_punches(normalized, stats)
+
+        Attendance = self.env['hr.attendance'].sudo().with_context(defer_attendance_summary=True)
+        written = Attendance
+        errors = []
+        for employee_ids in split_every(PUNCH_IMPORT_CHUNK_SIZE, list(operations)):
+            chunk = [operations[employee_id] for employee_id in employee_ids]
+            try:
+                with self.env.cr.savepoint():
+                    written |= self._write_attendances(Attendance, chunk)
+                self._count_written(chunk, stats)
+            except Exception:
+                for employee_id, operation in zip(employee_ids, chunk):
+                    try:
+                        with self.env.cr.savepoint():
+                            written |= self._write_attendances(Attendance, [operation])
+                        self._count_written([operation], stats)
+                    except Exception as e:
+                        stats['rejected'] += len(operation[0]) + len(operation[1])
+                        errors.append({'employee_id': employee_id, 'error': str(e)})
+
+        self.env['tazweed.attendance.processor'].refresh_summaries(
+            self.env['tazweed.attendance.processor']._get_summary_keys(written.filtered('check_out')))
+        if errors:
+            _logger.warning('Punch import: %d employees rejected', len(errors))
+        return dict(stats, errors=errors)
+
+    @api.model
+    def _write_attendances(self, Attendance, operations):
+        """Apply the check-outs and create the new attendances of employees"""
+        written = Attendance
+        for closings, new_vals in operations:
+            for attendance_id, vals in closings:
+                attendance = Attendance.browse(attendance_id)
+                attendance.write(vals)
+                written |= attendance
+        return written | Attendance.create([vals for closings, new_vals in operations for vals in new_vals])
+
+    @api.model
+    def _count_written(self, operations, stats):
+        stats['closed'] += sum(len(closings) for closings, new_vals in operations)
+        stats['created'] += sum(len(new_vals) for closings, new_vals in operations)
@@ -4,6 +4,9 @@ from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 from datetime import datetime, timedelta, time
 
+# Fields whose change alters the monthly attendance summaries
+SUMMARY_FIELDS = {'employee_id', 'check_in', 'check_out'}
+
 
 class HrAttendance(models.Model):
     """Extended Attendance with UAE-specific features"""
@@ -137,50 +140,59 @@ class HrAttendance(models.Model):
     )
     approval_date = fields.Datetime(string='Approval Date')
 
-    @api.model
-    def create(self, vals):
+    @api.model_create_multi
+    def create(self, vals_list):
         """Generate sequence on create"""
-        vals['reference'] = self.env['ir.sequence'].next_by_code('hr.attendance') or '/'
-        return super().create(vals)
+        for vals in vals_list:
+            vals['reference'] = self.env['ir.sequence'].next_by_code('hr.attendance') or '/'
+        attendances = super().create(vals_list)
+        if not self.env.context.get('defer_attendance_summary'):
+            attendances.filtered('check_out')._refresh_summaries()
+        return attendances
+
+    def write(self, vals):
+        if not SUMMARY_FIELDS & set(vals) or self.env.context.get('defer_attendance_summary'):
+            return super().write(vals)
+        processor = self.env['tazweed.attendance.processor']
+        keys = processor._get_summary_keys(self)
+        res = super().write(vals)
+        processor.refresh_summaries(keys | processor._get_summary_keys(self))
+        return res
+
+    def unlink(self):
+        processor = self.env['tazweed.attendance.processor']
+        keys = processor._get_summary_keys(self)
+        res = super().unlink()
+        processor.refresh_summaries(keys)
+        return res
+
+    def _refresh_summaries(self):
+        """Bring the monthly summaries of the attendances up to date"""
+        processor = self.env['tazweed.attendance.processor']
+        return processor.refresh_summaries(processor._get_summary_keys(self))
 
     @api.depends('employee_id', 'check_in')
     def _compute_scheduled_times(self):
         """Compute scheduled work times from resource calendar"""
+        # Weekday schedules of all the calendars involved, read once
+        schedules = self.env['tazweed.attendance.processor']._get_weekday_schedules(
+            self.employee_id.resource_calendar_id.ids)
         for attendance in self:
-            if attendance.employee_id and attendance.check_in:
-                # Get employee's work schedule
-                calendar = attendance.employee_id.resource_calendar_id
-                if calendar:
-                    check_in_date = attendance.check_in.date()
-                    day_of_week = check_in_date.weekday()
-                    
-                    # Find work hours for this day
-                    work_hours = calendar.attendance_ids.filtered(
-                        lambda a: int(a.dayofweek) == day_of_week
-                    )
-                    
-                    if work_hours:
-                        # Get first and last work hour
-                        start_hour = min(work_hours.mapped('hour_from'))
-                        end_hour = max(work_hours.mapped('hour_to'))
-                        
-                        attendance.scheduled_check_in = datetime.combine(
-                            check_in_date,
-                            time(int(start_hour), int((start_hour % 1) * 60))
-                        )
-                        attendance.scheduled_check_out = datetime.combine(
-                            check_in_date,
-                            time(int(end_hour), int((end_hour % 1) * 60))
-                        )
-                        attendance.scheduled_hours = end_hour - start_hour
-                    else:
-                        attendance.scheduled_check_in = False
-                        attendance.scheduled_check_out = False
-                        attendance.scheduled_hours = 0
-                else:
-                    attendance.scheduled_check_in = False
-                    attendance.scheduled_check_out = False
-                    attendance.scheduled_hours = 0
+            calendar = attendance.employee_id.resource_calendar_id
+            work_hours = attendance.check_in and schedules.get(calendar.id, {}).get(attendance.check_in.weekday())
+            if work_hours:
+                check_in_date = attendance.check_in.date()
+                start_hour, end_hour = work_hours
+                
+                attendance.scheduled_check_in = datetime.combine(
+                    check_in_date,
+                    time(int(start_hour), int((start_hour % 1) * 60))
+                )
+                attendance.scheduled_check_out = datetime.combine(
+                    check_in_date,
+                    time(int(end_hour), int((end_hour % 1) * 60))
+                )
+                attendance.scheduled_hours = end_hour - start_hour
             else:
                 attendance.scheduled_check_in = False
                 attendance.scheduled_check_out = False
@@ -212,7 +224,13 @@ class HrAttendance(models.Model):
     @api.depends('check_in', 'check_out', 'scheduled_hours', 'worked_hours')
     def _compute_overtime(self):
         """Compute overtime hours"""
-        for attendance in self:
+        # Holiday and weekend lookups come from the cached working calendar
+        day_kinds = self.env['tazweed.working.calendar'].get_day_kinds([
+            (attendance.employee_id.company_id.id or self.env.company.id,
+             attendance.check_in.date() if attendance.check_in else False)
+            for attendance in self
+        ])
+        for attendance, day_kind in zip(self, day_kinds):
             attendance.overtime_hours = 0
             attendance.overtime_type = 'none'
             
@@ -221,21 +239,12 @@ class HrAttendance(models.Model):
                     attendance.overtime_hours = attendance.worked_hours - attendance.scheduled_hours
                     
                     # Determine overtime type
-                    if attendance.check_in:
-                        day_of_week = attendance.check_in.weekday()
-                        
-                        # Check if it's a public holiday
-                        holiday = self.env['tazweed.public.holiday'].search([
-                            ('date', '=', attendance.check_in.date()),
-                            ('state', '=', 'confirmed'),
-                        ], limit=1)
-                        
-                        if holiday:
-                            attendance.overtime_type = 'holiday'
-                        elif day_of_week in [4, 5]:  # Friday, Saturday (UAE weekend)
-                            attendance.overtime_type = 'weekend'
-                        else:
-                            attendance.overtime_type = 'regular'
+                    if day_kind == 'holiday':
+                        attendance.overtime_type = 'holiday'
+                    elif day_kind == 'weekend':
+                        attendance.overtime_type = 'weekend'
+                    elif day_kind:
+                        attendance.overtime_type = 'regular'
 
     @api.depends('worked_hours', 'scheduled_hours')
     def _compute_attendance_status(self):
@@ -302,6 +311,7 @@ class HrAttendanceSummary(models.Model):
     
     # Days
     working_days = fields.Integer(string='Working Days')
+    attended_days = fields.Integer(string='Days Attended')
     present_days = fields.Integer(string='Present Days')
     absent_days = fields.Integer(string='Absent Days')
     half_days = fields.Integer(string='Half Days')
@@ -327,6 +337,11 @@ class HrAttendanceSummary(models.Model):
         store=True,
     )
 
+    _sql_constraints = [
+        ('employee_month_uniq', 'unique(employee_id, year, month)',
+         'There is already an attendance summary for this employee and month.'),
+    ]
+
     @api.depends('working_days', 'present_days', 'half_days')
     def _compute_attendance_percentage(self):
         """Compute attendance percentage"""
@@ -2,8 +2,12 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
+from collections import defaultdict
 from datetime import date, timedelta
 
+# Fields whose change moves the leave ledger
+LEDGER_FIELDS = {'state', 'active', 'employee_id', 'holiday_status_id', 'number_of_days', 'date_from', 'date_to'}
+
 
 class HrLeave(models.Model):
     """Extended Leave Request with UAE-specific features"""
@@ -147,12 +151,27 @@ class HrLeave(models.Model):
         default=False,
     )
 
-    @api.model
-    def create(self, vals):
+    @api.model_create_multi
+    def create(self, vals_list):
         """Generate sequence on create"""
-        if vals.get('reference', '/') == '/':
-            vals['reference'] = self.env['ir.sequence'].next_by_code('hr.leave') or '/'
-        return super().create(vals)
+        for vals in vals_list:
+            if vals.get('reference', '/') == '/':
+                vals['reference'] = self.env['ir.sequence'].next_by_code('hr.leave') or '/'
+        leaves = super().create(vals_list)
+        validated = leaves.filtered(lambda l: l.state == 'validate')
+        if validated:
+            self.env['tazweed.leave.ledger']._sync_records(validated)
+        return leaves
+
+    def write(self, vals):
+        res = super().write(vals)
+        if LEDGER_FIELDS & set(vals):
+            self.env['tazweed.leave.ledger']._sync_records(self)
+        return res
+
+    def unlink(self):
+        self.env['tazweed.leave.ledger']._sync_records(self, unlinked=True)
+        return super().unlink()
 
     @api.depends('date_to')
     def _compute_return_date(self):
@@ -166,32 +185,70 @@ class HrLeave(models.Model):
 
     @api.depends('employee_id', 'holiday_status_id', 'number_of_days')
     def _compute_leave_balance(self):
-        """Compute leave balance before and after"""
+        """Compute leave balance before and after from the leave ledger"""
+        leaves = self.filtered(lambda l: l.employee_id and l.holiday_status_id)
+        balances = self.env['tazweed.leave.balance']._get_balances(
+            leaves.employee_id.ids, leaves.holiday_status_id.ids)
+        totals = defaultdict(float)
+        for key, balance in balances.items():
+            totals[key[:2]] += balance['balance_days']
+        # The leave's own days are not part of its balance before
+        posted = self.env['tazweed.leave.ledger']._get_posted(leaves._origin)
+        
         for leave in self:
-            if leave.employee_id and leave.holiday_status_id:
-                # Get current balance
-                allocations = self.env['hr.leave.allocation'].search([
-                    ('employee_id', '=', leave.employee_id.id),
-                    ('holiday_status_id', '=', leave.holiday_status_id.id),
-                    ('state', '=', 'validate'),
-                ])
-                total_allocated = sum(allocations.mapped('number_of_days'))
-                
-                # Get used leaves (excluding current)
-                used_leaves = self.search([
-                    ('employee_id', '=', leave.employee_id.id),
-                    ('holiday_status_id', '=', leave.holiday_status_id.id),
-                    ('state', '=', 'validate'),
-                    ('id', '!=', leave.id),
-                ])
-                total_used = sum(used_leaves.mapped('number_of_days'))
-                
-                leave.leave_balance_before = total_allocated - total_used
+            if leave in leaves:
+                own_days = sum(
+                    days for (key, movement_type), days in posted.get(leave._origin.id, {}).items()
+                    if movement_type == 'leave'
+                )
+                leave.leave_balance_before = totals[(leave.employee_id.id, leave.holiday_status_id.id)] + own_days
                 leave.leave_balance_after = leave.leave_balance_before - leave.number_of_days
             else:
                 leave.leave_balance_before = 0
                 leave.leave_balance_after = 0
 
+    def _get_ledger_windows(self, posted):
+        """Return {leave id: (start, end)} of the allocation window each leave is booked in.
+        
+        A leave stays in the window it was posted to while it still fits,
+        otherwise it goes to the first validated allocation window covering
+        it, or to the open window when none does.
+        """
+        allocations = self.env['hr.leave.allocation'].sudo().search_read([
+            ('employee_id', 'in', self.employee_id.ids),
+            ('holiday_status_id', 'in', self.holiday_status_id.ids),
+            ('state', '=', 'validate'),
+        ], ['employee_id', 'holiday_status_id', 'validity_start', 'validity_end'],
+            order='validity_end, id', load=False)
+        windows_by_pair = defaultdict(list)
+        for allocation in allocations:
+            windows_by_pair[(allocation['employee_id'], allocation['holiday_status_id'])].append(
+                (allocation['validity_start'] or None, allocation['validity_end'] or None))
+
+        def fits(window, start, end):
+            return (not window[0] or window[0] <= start) and (not window[1] or end <= window[1])
+
+        windows = {}
+        for leave in self:
+            pair = (leave.employee_id.id, leave.holiday_status_id.id)
+            start, end = leave.date_from.date(), leave.date_to.date()
+            candidates = [key[2:] for key, movement_type in posted.get(leave.id, {}) if key[:2] == pair]
+            candidates += windows_by_pair[pair]
+            windows[leave.id] = next((w for w in candidates if fits(w, start, end)), (None, None))
+        return windows
+
+    def _get_ledger_contributions(self, posted):
+        """Return {leave id: {(balance key, movement type): days}} the leaves should have posted"""
+        leaves = self.filtered(
+            lambda l: l.state == 'validate' and l.active and l.employee_id and l.date_from and l.date_to)
+        windows = leaves._get_ledger_windows(posted)
+        return {
+            leave.id: {
+                ((leave.employee_id.id, leave.holiday_status_id.id) + windows[leave.id], 'leave'): leave.number_of_days,
+            }
+            for leave in leaves
+        }
+
     @api.depends('number_of_days', 'salary_impact', 'salary_percentage', 'employee_id')
     def _compute_salary_deduction(self):
         """Compute salary deduction amount"""
@@ -227,42 +284,23 @@ class HrLeave(models.Model):
     @api.depends('date_from', 'date_to', 'holiday_status_id')
     def _compute_public_holidays(self):
         """Compute public holidays and weekends within leave period"""
-        for leave in self:
-            if leave.date_from and leave.date_to:
-                date_from = leave.date_from.date() if hasattr(leave.date_from, 'date') else leave.date_from
-                date_to = leave.date_to.date() if hasattr(leave.date_to, 'date') else leave.date_to
-                
-                # Count weekends (Friday, Saturday for UAE)
-                weekends = 0
-                current = date_from
-                while current <= date_to:
-                    if current.weekday() in [4, 5]:
-                        weekends += 1
-                    current += timedelta(days=1)
-                
-                # Count public holidays
-                holidays = self.env['tazweed.public.holiday'].search([
-                    ('date', '>=', date_from),
-                    ('date', '<=', date_to),
-                    ('state', '=', 'confirmed'),
-                ])
-                
-                leave.weekends_count = weekends
-                leave.public_holidays_count = len(holidays)
-                
-                # Calculate working days
-                total_days = (date_to - date_from).days + 1
-                if leave.holiday_status_id:
-                    if leave.holiday_status_id.exclude_weekends:
-                        total_days -= weekends
-                    if leave.holiday_status_id.exclude_public_holidays:
-                        total_days -= len(holidays)
-                
-                leave.working_days = max(0, total_days)
+        leaves = self.filtered(lambda l: l.date_from and l.date_to)
+        all_counts = self.env['tazweed.working.calendar'].count_days_many([
+            (leave.employee_id.company_id.id or self.env.company.id, leave.date_from.date(), leave.date_to.date())
+            for leave in leaves
+        ])
+        for leave, day_counts in zip(leaves, all_counts):
+            leave.weekends_count = day_counts.weekends
+            leave.public_holidays_count = day_counts.holidays
+            if leave.holiday_status_id:
+                leave.working_days = leave.holiday_status_id._get_leave_days(day_counts)
             else:
-                leave.weekends_count = 0
-                leave.public_holidays_count = 0
-                leave.working_days = 0
+                leave.working_days = day_counts.days
+        
+        for leave in self - leaves:
+            leave.weekends_count = 0
+            leave.public_holidays_count = 0
+            leave.working_days = 0
 
     @api.constrains('date_from', 'date_to', 'holiday_status_id')
     def _check_advance_notice(self):
@@ -335,8 +373,7 @@ class HrLeave(models.Model):
             start_date = today - timedelta(days=365)
         
         # Get employees
-        employees = self.env['hr.employee'].search([('active', '=', True)])
-        total_employees = len(employees)
+        total_employees = self.env['hr.employee'].search_count([('active', '=', True)])
         
         # Get leaves on today
         on_leave_today = self.search_count([
@@ -357,52 +394,36 @@ class HrLeave(models.Model):
         ])
         
         # Calculate average leave days
-        approved_leaves = self.search([
+        period_domain = [
             ('state', '=', 'validate'),
             ('date_from', '>=', start_date),
-        ])
-        avg_leave_days = round(sum(approved_leaves.mapped('number_of_days')) / max(len(approved_leaves), 1), 1)
+        ]
+        period_days = self.read_group(period_domain, ['number_of_days:sum'], [])[0]['number_of_days'] or 0
+        avg_leave_days = round(period_days / max(approved_this_period, 1), 1)
         
-        # Calculate leave utilization (simplified)
-        total_allocated = sum(self.env['hr.leave.allocation'].search([
-            ('state', '=', 'validate'),
-        ]).mapped('number_of_days'))
-        total_used = sum(self.search([
-            ('state', '=', 'validate'),
-        ]).mapped('number_of_days'))
+        # Calculate leave utilization from the leave ledger
+        balance_totals = self.env['tazweed.leave.balance'].sudo().read_group(
+            [], ['allocated_days:sum', 'used_days:sum'], [])[0]
+        total_allocated = balance_totals['allocated_days'] or 0
+        total_used = balance_totals['used_days'] or 0
         leave_utilization = round((total_used / max(total_allocated, 1)) * 100, 1)
         
-        # Leave by type
-        leave_types = self.env['hr.leave.type'].search([])
-        leave_by_type = []
-        for lt in leave_types[:8]:  # Top 8 types
-            count = self.search_count([
-                ('holiday_status_id', '=', lt.id),
-                ('state', '=', 'validate'),
-                ('date_from', '>=', start_date),
-            ])
-            if count > 0:
-                leave_by_type.append({
-                    'name': lt.name,
-                    'count': count,
-                })
+        # Leave by type (top 8)
+        type_groups = self.read_group(period_domain, ['holiday_status_id'], ['holiday_status_id'])
+        type_groups.sort(key=lambda g: g['holiday_status_id_count'], reverse=True)
+        leave_by_type = [{
+            'name': group['holiday_status_id'][1],
+            'count': group['holiday_status_id_count'],
+        } for group in type_groups[:8] if group['holiday_status_id']]
         
-        # Leave by department
-        departments = self.env['hr.department'].search([], limit=10)
-        leave_by_department = []
-        for dept in departments:
-            dept_employees = employees.filtered(lambda e: e.department_id.id == dept.id)
-            dept_leaves = self.search([
-                ('employee_id', 'in', dept_employees.ids),
-                ('state', '=', 'validate'),
-                ('date_from', '>=', start_date),
-            ])
-            total_days = sum(dept_leaves.mapped('number_of_days'))
-            if total_days > 0:
-                leave_by_department.append({
-                    'name': dept.name,
-                    'days': total_days,
-                })
+        # Leave by department (top 8 by days)
+        department_groups = self.read_group(
+            period_domain + [('employee_id.active', '=', True)],
+            ['number_of_days:sum'], ['department_id'])
+        leave_by_department = [{
+            'name': group['department_id'][1],
+            'days': group['number_of_days'],
+        } for group in department_groups if group['department_id'] and group['number_of_days'] > 0]
         
         # Sort by days descending
         leave_by_department.sort(key=lambda x: x['days'], reverse=True)
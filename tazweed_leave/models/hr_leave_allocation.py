@@ -5,6 +5,12 @@ from odoo.exceptions import ValidationError
 from datetime import date
 from dateutil.relativedelta import relativedelta
 
+# Fields whose change moves the leave ledger
+LEDGER_FIELDS = {
+    'state', 'active', 'employee_id', 'holiday_status_id', 'number_of_days',
+    'encashed_days', 'allocation_type', 'validity_start', 'validity_end',
+}
+
 
 class HrLeaveAllocation(models.Model):
     """Extended Leave Allocation with UAE-specific features"""
@@ -104,12 +110,60 @@ class HrLeaveAllocation(models.Model):
         store=True,
     )
 
-    @api.model
-    def create(self, vals):
+    @api.model_create_multi
+    def create(self, vals_list):
         """Generate sequence on create"""
-        if vals.get('reference', '/') == '/':
-            vals['reference'] = self.env['ir.sequence'].next_by_code('hr.leave.allocation') or '/'
-        return super().create(vals)
+        for vals in vals_list:
+            if vals.get('reference', '/') == '/':
+                vals['reference'] = self.env['ir.sequence'].next_by_code('hr.leave.allocation') or '/'
+        allocations = super().create(vals_list)
+        validated = allocations.filtered(lambda a: a.state == 'validate')
+        if validated:
+            self.env['tazweed.leave.ledger']._sync_records(validated)
+        return allocations
+
+    def write(self, vals):
+        res = super().write(vals)
+        if LEDGER_FIELDS & set(vals):
+            self.env['tazweed.leave.ledger']._sync_records(self)
+        return res
+
+    def unlink(self):
+        self.env['tazweed.leave.ledger']._sync_records(self, unlinked=True)
+        return super().unlink()
+
+    def _get_ledger_key(self):
+        return (
+            self.employee_id.id,
+            self.holiday_status_id.id,
+            self.validity_start or None,
+            self.validity_end or None,
+        )
+
+    def _get_ledger_contributions(self, posted):
+        """Return {allocation id: {(balance key, movement type): days}} the allocations should have posted"""
+        contributions = {}
+        for allocation in self:
+            if allocation.state != 'validate' or not allocation.active or not allocation.employee_id:
+                continue
+            key = allocation._get_ledger_key()
+            movement_type = 'carry_forward' if allocation.allocation_type == 'carry_forward' else 'allocation'
+            values = {(key, movement_type): allocation.number_of_days}
+            if allocation.encashed_days:
+                values[(key, 'encashment')] = allocation.encashed_days
+            contributions[allocation.id] = values
+        return contributions
+
+    @api.model
+    def _mark_balance_changed(self, keys):
+        """Recompute the used and remaining days of the allocations of changed balances"""
+        pairs = {key[:2] for key in keys}
+        allocations = self.sudo().search([
+            ('employee_id', 'in', [pair[0] for pair in pairs]),
+            ('holiday_status_id', 'in', [pair[1] for pair in pairs]),
+        ]).filtered(lambda a: (a.employee_id.id, a.holiday_status_id.id) in pairs)
+        for field_name in ('used_days', 'remaining_days'):
+            self.env.add_to_compute(self._fields[field_name], allocations)
 
     @api.depends('employee_id', 'holiday_status_id', 'validity_start')
     def _compute_accrued_days(self):
@@ -131,23 +185,12 @@ class HrLeaveAllocation(models.Model):
 
     @api.depends('employee_id', 'holiday_status_id', 'validity_start', 'validity_end')
     def _compute_used_days(self):
-        """Compute used days from approved leaves"""
+        """Compute used days from the leave ledger balance of the validity window"""
+        balances = self.env['tazweed.leave.balance']._get_balances(
+            self.employee_id.ids, self.holiday_status_id.ids)
         for allocation in self:
-            if allocation.employee_id and allocation.holiday_status_id:
-                domain = [
-                    ('employee_id', '=', allocation.employee_id.id),
-                    ('holiday_status_id', '=', allocation.holiday_status_id.id),
-                    ('state', '=', 'validate'),
-                ]
-                if allocation.validity_start:
-                    domain.append(('date_from', '>=', allocation.validity_start))
-                if allocation.validity_end:
-                    domain.append(('date_to', '<=', allocation.validity_end))
-                
-                leaves = self.env['hr.leave'].search(domain)
-                allocation.used_days = sum(leaves.mapped('number_of_days'))
-            else:
-                allocation.used_days = 0
+            balance = balances.get(allocation._get_ledger_key())
+            allocation.used_days = balance['used_days'] if balance else 0
 
     @api.depends('number_of_days', 'used_days', 'encashed_days')
     def _compute_remaining_days(self):
@@ -183,25 +183,18 @@ class HrLeaveType(models.Model):
         """Calculate leave days considering exclusions"""
         self.ensure_one()
         
-        total_days = (date_to - date_from).days + 1
-        
+        employee = self.env['hr.employee'].browse(employee_id)
+        day_counts = self.env['tazweed.working.calendar'].count_days(
+            employee.company_id.id or self.env.company.id, date_from, date_to)
+        return self._get_leave_days(day_counts)
+
+    def _get_leave_days(self, day_counts):
+        """Days of a range counted as leave, given its working-calendar DayCounts"""
+        self.ensure_one()
+        if self.exclude_weekends and self.exclude_public_holidays:
+            return day_counts.working
         if self.exclude_weekends:
-            # Count weekends
-            weekends = 0
-            current = date_from
-            while current <= date_to:
-                if current.weekday() in [4, 5]:  # Friday, Saturday (UAE weekend)
-                    weekends += 1
-                current += timedelta(days=1)
-            total_days -= weekends
-        
+            return day_counts.days - day_counts.weekends
         if self.exclude_public_holidays:
-            # Count public holidays
-            holidays = self.env['tazweed.public.holiday'].search([
-                ('date', '>=', date_from),
-                ('date', '<=', date_to),
-                ('state', '=', 'confirmed'),
-            ])
-            total_days -= len(holidays)
-        
-        return max(0, total_days)
+            return day_counts.days - day_counts.holidays
+        return day_counts.days
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import float_is_zero
+from collections import defaultdict
+
+# Balance column moved by each movement type
+MOVEMENT_COLUMNS = {
+    'allocation': 'allocated_days',
+    'carry_forward': 'allocated_days',
+    'leave': 'used_days',
+    'encashment': 'encashed_days',
+}
+
+# Ledger field linking a movement to its source document, per source model
+SOURCE_FIELDS = {
+    'hr.leave': 'leave_id',
+    'hr.leave.allocation': 'allocation_id',
+}
+
+
+class TazweedLeaveLedger(models.Model):
+    """Append-only Leave Balance Movements"""
+    _name = 'tazweed.leave.ledger'
+    _description = 'Leave Ledger Movement'
+    _order = 'id desc'
+
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Employee',
+        required=True,
+        index=True,
+        ondelete='cascade',
+    )
+    holiday_status_id = fields.Many2one(
+        'hr.leave.type',
+        string='Leave Type',
+        required=True,
+        ondelete='cascade',
+    )
+    validity_start = fields.Date(string='Valid From')
+    validity_end = fields.Date(string='Valid Until')
+
+    movement_type = fields.Selection([
+        ('allocation', 'Allocation'),
+        ('carry_forward', 'Carry Forward'),
+        ('leave', 'Leave'),
+        ('encashment', 'Encashment'),
+    ], string='Movement Type', required=True)
+    days = fields.Float(
+        string='Days',
+        required=True,
+        help='Change of the movement type total, negative for reversals',
+    )
+
+    leave_id = fields.Many2one(
+        'hr.leave',
+        string='Leave',
+        index=True,
+        ondelete='set null',
+    )
+    allocation_id = fields.Many2one(
+        'hr.leave.allocation',
+        string='Allocation',
+        index=True,
+        ondelete='set null',
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Apply the new movements to the materialized balances"""
+        movements = super().create(vals_list)
+        self.env['tazweed.leave.balance']._apply_movements(movements)
+        return movements
+
+    def write(self, vals):
+        raise UserError(_('Leave ledger movements cannot be modified.'))
+
+    def unlink(self):
+        raise UserError(_('Leave ledger movements cannot be deleted.'))
+
+    @api.model
+    def _get_posted(self, records):
+        """Return {record id: {(balance key, movement type): days}} posted for source records"""
+        source_field = SOURCE_FIELDS[records._name]
+        record_ids = [record_id for record_id in records.ids if isinstance(record_id, int)]
+        posted = defaultdict(dict)
+        if not record_ids:
+            return posted
+        self.flush_model()
+        self.env.cr.execute(f"""
+            SELECT {source_field}, employee_id, holiday_status_id, validity_start, validity_end,
+                   movement_type, SUM(days)
+            FROM tazweed_leave_ledger
+            WHERE {source_field} = ANY(%s)
+            GROUP BY {source_field}, employee_id, holiday_status_id, validity_start, validity_end, movement_type
+        """, (record_ids,))
+        for record_id, employee_id, type_id, start, end, movement_type, days in self.env.cr.fetchall():
+            if not float_is_zero(days, precision_digits=4):
+                posted[record_id][((employee_id, type_id, start, end), movement_type)] = days
+        return posted
+
+    @api.model
+    def _sync_records(self, records, unlinked=False):
+        """Post the movements bringing the ledger in line with leaves or allocations.
+
+        What a record has already posted is read back from the ledger, so
+        only differences are appended and syncing twice posts nothing.
+        Unlinked records have their whole contribution reversed.
+        """
+        source_field = SOURCE_FIELDS[records._name]
+        posted = self._get_posted(records)
+        if unlinked:
+            wanted = {}
+        else:
+            wanted = records._get_ledger_contributions(posted)
+
+        vals_list = []
+        for record in records:
+            current = posted.get(record.id, {})
+            target = wanted.get(record.id, {})
+            for key, movement_type in set(current) | set(target):
+                days = target.get((key, movement_type), 0.0) - current.get((key, movement_type), 0.0)
+                if float_is_zero(days, precision_digits=4):
+                    continue
+                employee_id, type_id, start, end = key
+                vals_list.append({
+                    'employee_id': employee_id,
+                    'holiday_status_id': type_id,
+                    'validity_start': start,
+                    'validity_end': end,
+                    'movement_type': movement_type,
+                    'days': days,
+                    source_field: record.id,
+                })
+        if vals_list:
+            self.sudo().create(vals_list)
+
+    @api.model
+    def _reconcile(self):
+        """Sync the ledger with every leave and allocation, e.g. after an upgrade"""
+        posted_leaves = self.search([('leave_id', '!=', False)]).leave_id
+        leaves = self.env['hr.leave'].with_context(active_test=False).search([('state', '=', 'validate')])
+        self._sync_records(leaves | posted_leaves)
+
+        posted_allocations = self.search([('allocation_id', '!=', False)]).allocation_id
+        allocations = self.env['hr.leave.allocation'].with_context(active_test=False).search([('state', '=', 'validate')])
+        self._sync_records(allocations | posted_allocations)
+
+
+class TazweedLeaveBalance(models.Model):
+    """Leave Balance per Employee, Leave Type and Validity Window"""
+    _name = 'tazweed.leave.balance'
+    _description = 'Leave Balance'
+    _order = 'employee_id, holiday_status_id, validity_start desc'
+    _rec_name = 'employee_id'
+
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Employee',
+        required=True,
+        readonly=True,
+        ondelete='cascade',
+    )
+    holiday_status_id = fields.Many2one(
+        'hr.leave.type',
+        string='Leave Type',
+        required=True,
+        readonly=True,
+        ondelete='cascade',
+    )
+    validity_start = fields.Date(string='Valid From', readonly=True)
+    validity_end = fields.Date(string='Valid Until', readonly=True)
+
+    allocated_days = fields.Float(string='Allocated', readonly=True)
+    used_days = fields.Float(string='Used', readonly=True)
+    encashed_days = fields.Float(string='Encashed', readonly=True)
+    balance_days = fields.Float(string='Balance', readonly=True)
+
+    def init(self):
+        """One balance per employee, leave type and validity window, open ends included."""
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS tazweed_leave_balance_key_uniq
+            ON tazweed_leave_balance (
+                employee_id, holiday_status_id,
+                (COALESCE(validity_start, '-infinity'::date)),
+                (COALESCE(validity_end, 'infinity'::date))
+            )
+        """)
+
+    @api.model
+    def _apply_movements(self, movements):
+        """Add ledger movements to their balances with one upsert"""
+        totals = defaultdict(lambda: defaultdict(float))
+        for movement in movements:
+            key = (
+                movement.employee_id.id,
+                movement.holiday_status_id.id,
+                movement.validity_start or None,
+                movement.validity_end or None,
+            )
+            totals[key][MOVEMENT_COLUMNS[movement.movement_type]] += movement.days
+        if not totals:
+            return
+
+        keys = list(totals)
+        self.flush_model()
+        self.env.cr.execute("""
+            INSERT INTO tazweed_leave_balance AS b (
+                employee_id, holiday_status_id, validity_start, validity_end,
+                allocated_days, used_days, encashed_days, balance_days,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT m.employee_id, m.type_id, m.start, m.stop,
+                   m.allocated, m.used, m.encashed, m.allocated - m.used - m.encashed,
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+            FROM unnest(%(employees)s::int[], %(types)s::int[], %(starts)s::date[], %(stops)s::date[],
+                        %(allocated)s::float8[], %(used)s::float8[], %(encashed)s::float8[])
+                 AS m(employee_id, type_id, start, stop, allocated, used, encashed)
+            ON CONFLICT (
+                employee_id, holiday_status_id,
+                (COALESCE(validity_start, '-infinity'::date)),
+                (COALESCE(validity_end, 'infinity'::date))
+            ) DO UPDATE SET
+                allocated_days = b.allocated_days + EXCLUDED.allocated_days,
+                used_days = b.used_days + EXCLUDED.used_days,
+                encashed_days = b.encashed_days + EXCLUDED.encashed_days,
+                balance_days = b.balance_days + EXCLUDED.balance_days,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+        """, {
+            'uid': self.env.uid,
+            'employees': [key[0] for key in keys],
+            'types': [key[1] for key in keys],
+            'starts': [key[2] for key in keys],
+            'stops': [key[3] for key in keys],
+            'allocated': [totals[key]['allocated_days'] for key in keys],
+            'used': [totals[key]['used_days'] for key in keys],
+            'encashed': [totals[key]['encashed_days'] for key in keys],
+        })
+        self.invalidate_model()
+        self.env['hr.leave.allocation']._mark_balance_changed(keys)
+
+    @api.model
+    def _get_balances(self, employee_ids, type_ids=None):
+        """Return {(employee id, leave type id, start, end): balance row} with one query"""
+        domain = [('employee_id', 'in', list(employee_ids))]
+        if type_ids is not None:
+            domain.append(('holiday_status_id', 'in', list(type_ids)))
+        rows = self.sudo().search_read(domain, [
+            'employee_id', 'holiday_status_id', 'validity_start', 'validity_end',
+            'allocated_days', 'used_days', 'encashed_days', 'balance_days',
+        ], load=False)
+        return {
+            (row['employee_id'], row['holiday_status_id'],
+             row['validity_start'] or None, row['validity_end'] or None): row
+            for row in rows
+        }
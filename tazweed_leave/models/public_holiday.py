@@ -4,6 +4,9 @@ from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 from datetime import date
 
+# Fields whose change alters the working calendar
+CALENDAR_FIELDS = {'state', 'date', 'date_to', 'company_id'}
+
 
 class TazweedPublicHoliday(models.Model):
     """UAE Public Holidays"""
@@ -55,6 +58,24 @@ class TazweedPublicHoliday(models.Model):
         default=lambda self: self.env.company,
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        holidays = super().create(vals_list)
+        if any(holiday.state == 'confirmed' for holiday in holidays):
+            self.env['tazweed.working.calendar']._invalidate()
+        return holidays
+
+    def write(self, vals):
+        res = super().write(vals)
+        if CALENDAR_FIELDS & set(vals):
+            self.env['tazweed.working.calendar']._invalidate()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['tazweed.working.calendar']._invalidate()
+        return res
+
     @api.depends('date')
     def _compute_year(self):
         """Compute year from date"""
@@ -95,13 +116,8 @@ class TazweedPublicHoliday(models.Model):
     @api.model
     def is_holiday(self, check_date, company_id=None):
         """Check if a date is a holiday"""
-        domain = [
-            ('date', '=', check_date),
-            ('state', '=', 'confirmed'),
-        ]
-        if company_id:
-            domain.append(('company_id', '=', company_id))
-        return bool(self.search(domain, limit=1))
+        return self.env['tazweed.working.calendar'].is_holiday(
+            company_id or self.env.company.id, fields.Date.to_date(check_date))
 
 
 class TazweedPublicHolidayYear(models.Model):
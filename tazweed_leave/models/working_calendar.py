@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api, tools
+from collections import namedtuple
+from datetime import date, timedelta
+
+# Friday and Saturday, when the weekend is not configured
+DEFAULT_WEEKEND_DAYS = (4, 5)
+
+# Bitsets of one company year, bit n being day n of the year (0 = January 1st),
+# with prefix counts so that any range is counted in constant time
+CalendarYear = namedtuple('CalendarYear', [
+    'start', 'weekend_bits', 'holiday_bits',
+    'weekend_counts', 'holiday_counts', 'off_counts',
+])
+
+# Day counts of a date range
+DayCounts = namedtuple('DayCounts', ['days', 'weekends', 'holidays', 'working'])
+
+
+class TazweedWorkingCalendar(models.AbstractModel):
+    """Working-day Calendar Service"""
+    _name = 'tazweed.working.calendar'
+    _description = 'Working-day Calendar'
+
+    @api.model
+    def _get_weekend_days(self):
+        """Return the configured weekend days, as weekday numbers"""
+        params = self.env['ir.config_parameter'].sudo()
+        days = {
+            params.get_param('tazweed_leave.weekend_day_1'),
+            params.get_param('tazweed_leave.weekend_day_2'),
+        } - {False, None, ''}
+        return tuple(sorted(int(day) for day in days)) or DEFAULT_WEEKEND_DAYS
+
+    @api.model
+    @tools.ormcache('company_id', 'year', 'weekend_days')
+    def _get_year(self, company_id, year, weekend_days):
+        """Build the bitsets of a company year from its confirmed public holidays.
+
+        The year lives in the registry cache; confirming, cancelling or
+        editing a holiday clears it in every worker.
+        """
+        start = date(year, 1, 1)
+        end = date(year, 12, 31)
+        size = (end - start).days + 1
+
+        holidays = self.env['tazweed.public.holiday'].sudo().search_read([
+            ('state', '=', 'confirmed'),
+            ('date', '<=', end),
+            '|', ('date_to', '>=', start), '&', ('date_to', '=', False), ('date', '>=', start),
+            '|', ('company_id', '=', False), ('company_id', '=', company_id),
+        ], ['date', 'date_to'])
+        holiday_bits = 0
+        for holiday in holidays:
+            first = max((holiday['date'] - start).days, 0)
+            last = min(((holiday['date_to'] or holiday['date']) - start).days, size - 1)
+            if last >= first:
+                holiday_bits |= ((1 << (last - first + 1)) - 1) << first
+
+        weekend_bits = 0
+        first_weekday = start.weekday()
+        for day in range(size):
+            if (first_weekday + day) % 7 in weekend_days:
+                weekend_bits |= 1 << day
+
+        weekend_counts = [0]
+        holiday_counts = [0]
+        off_counts = [0]
+        for day in range(size):
+            weekend = weekend_bits >> day & 1
+            holiday = holiday_bits >> day & 1
+            weekend_counts.append(weekend_counts[-1] + weekend)
+            holiday_counts.append(holiday_counts[-1] + holiday)
+            off_counts.append(off_counts[-1] + (weekend | holiday))
+
+        return CalendarYear(
+            start, weekend_bits, holiday_bits,
+            tuple(weekend_counts), tuple(holiday_counts), tuple(off_counts),
+        )
+
+    @api.model
+    def _invalidate(self):
+        """Drop the cached calendar years in every worker"""
+        self.clear_caches()
+
+    @api.model
+    def _get_calendar_year(self, company_id, year, weekend_days=None):
+        return self._get_year(company_id or False, year, weekend_days or self._get_weekend_days())
+
+    @api.model
+    def count_days(self, company_id, date_from, date_to, weekend_days=None):
+        """Return the DayCounts of the range [date_from, date_to] for a company.
+
+        Each calendar year spanned costs a constant number of lookups.
+        """
+        weekend_days = weekend_days or self._get_weekend_days()
+        days = weekends = holidays = off = 0
+        current = date_from
+        while current <= date_to:
+            year = self._get_calendar_year(company_id, current.year, weekend_days)
+            last = min(date_to, date(current.year, 12, 31))
+            first_index = (current - year.start).days
+            last_index = (last - year.start).days + 1
+            days += last_index - first_index
+            weekends += year.weekend_counts[last_index] - year.weekend_counts[first_index]
+            holidays += year.holiday_counts[last_index] - year.holiday_counts[first_index]
+            off += year.off_counts[last_index] - year.off_counts[first_index]
+            current = last + timedelta(days=1)
+        return DayCounts(days, weekends, holidays, days - off)
+
+    @api.model
+    def count_days_many(self, ranges):
+        """Return the DayCounts of many (company id, date_from, date_to) ranges."""
+        weekend_days = self._get_weekend_days()
+        return [
+            self.count_days(company_id, date_from, date_to, weekend_days)
+            if date_from and date_to and date_from <= date_to else DayCounts(0, 0, 0, 0)
+            for company_id, date_from, date_to in ranges
+        ]
+
+    @api.model
+    def is_holiday(self, company_id, day, weekend_days=None):
+        """Whether ``day`` is a confirmed public holiday of the company"""
+        year = self._get_calendar_year(company_id, day.year, weekend_days)
+        return bool(year.holiday_bits >> (day - year.start).days & 1)
+
+    @api.model
+    def is_weekend(self, company_id, day, weekend_days=None):
+        """Whether ``day`` is a weekend day"""
+        return day.weekday() in (weekend_days or self._get_weekend_days())
+
+    @api.model
+    def get_day_kinds(self, days):
+        """Return the kind of many (company id, day) pairs: 'holiday', 'weekend' or 'working'."""
+        weekend_days = self._get_weekend_days()
+        kinds = []
+        for company_id, day in days:
+            if not day:
+                kinds.append(False)
+            elif self.is_holiday(company_id, day, weekend_days):
+                kinds.append('holiday')
+            elif day.weekday() in weekend_days:
+                kinds.append('weekend')
+            else:
+                kinds.append('working')
+        return kinds
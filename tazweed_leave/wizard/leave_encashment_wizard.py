@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import ValidationError, UserError
+from odoo.addons.base.models.res_partner import _tz_get
+import base64
 
 
 class LeaveEncashmentWizard(models.TransientModel):
@@ -206,33 +208,19 @@ class AttendanceSummaryWizard(models.TransientModel):
         self.ensure_one()
         
         employees = self.employee_ids or self.env['hr.employee'].search([])
-        summaries = self.env['hr.attendance.summary']
+        keys = {(employee.id, self.year, int(self.month)) for employee in employees}
         
-        for employee in employees:
-            # Check if summary exists
-            existing = self.env['hr.attendance.summary'].search([
-                ('employee_id', '=', employee.id),
+        if not self.regenerate:
+            # Keep the existing summaries as they are
+            existing = self.env['hr.attendance.summary'].search_read([
+                ('employee_id', 'in', employees.ids),
                 ('month', '=', self.month),
                 ('year', '=', self.year),
-            ], limit=1)
-            
-            if existing and not self.regenerate:
-                continue
-            
-            if existing and self.regenerate:
-                existing.unlink()
-            
-            # Calculate summary data
-            # This is a simplified version - actual implementation would calculate from attendance records
-            summary = self.env['hr.attendance.summary'].create({
-                'employee_id': employee.id,
-                'month': self.month,
-                'year': self.year,
-                'working_days': 22,  # Placeholder
-                'present_days': 20,  # Placeholder
-                'absent_days': 2,  # Placeholder
-            })
-            summaries |= summary
+            ], ['employee_id'], load=False)
+            keys -= {(row['employee_id'], self.year, int(self.month)) for row in existing}
+        
+        # Calculate summary data from the attendance records, in one batch
+        summaries = self.env['tazweed.attendance.processor'].refresh_summaries(keys)
         
         return {
             'name': _('Attendance Summaries'),
@@ -241,3 +229,61 @@ class AttendanceSummaryWizard(models.TransientModel):
             'view_mode': 'tree,form',
             'domain': [('id', 'in', summaries.ids)],
         }
+
+
+class AttendancePunchImportWizard(models.TransientModel):
+    """Attendance Punch Import Wizard"""
+    _name = 'tazweed.attendance.punch.import.wizard'
+    _description = 'Attendance Punch Import Wizard'
+
+    punch_file = fields.Binary(
+        string='Punch File',
+        required=True,
+        help='CSV export of the attendance terminal: badge, timestamp, type, device',
+    )
+    punch_filename = fields.Char(string='Filename')
+    tz = fields.Selection(
+        _tz_get,
+        string='Terminal Time Zone',
+        default=lambda self: self.env.user.tz or 'UTC',
+        help='Time zone of the timestamps without an explicit offset',
+    )
+    device = fields.Char(string='Device')
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], default='draft')
+    result = fields.Text(string='Result', readonly=True)
+
+    def action_import(self):
+        """Import the punches of the file"""
+        self.ensure_one()
+        
+        try:
+            text = base64.b64decode(self.punch_file).decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise UserError(_('The punch file must be a UTF-8 CSV file.'))
+        
+        importer = self.env['tazweed.attendance.punch.importer']
+        stats = importer.import_punches(importer.parse_csv(text), tz=self.tz, device=self.device)
+        
+        lines = [
+            _('Punches received: %d') % stats.get('received', 0),
+            _('Attendances created: %d') % stats.get('created', 0),
+            _('Attendances checked out: %d') % stats.get('closed', 0),
+            _('Duplicates skipped: %d') % stats.get('duplicate', 0),
+            _('Unknown badges: %d') % stats.get('unknown_badge', 0),
+            _('Invalid punches: %d') % stats.get('invalid', 0),
+            _('Unpaired punches: %d') % stats.get('anomaly', 0),
+            _('Rejected punches: %d') % stats.get('rejected', 0),
+        ]
+        lines += ['%s: %s' % (error['employee_id'], error['error']) for error in stats.get('errors', [])]
+        self.write({'state': 'done', 'result': '\n'.join(lines)})
+        
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
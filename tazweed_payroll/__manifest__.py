@@ -57,6 +57,7 @@ Website: https://tazweedjobs.ae
         'data/salary_rule_category_data.xml',
         'data/salary_structure_data.xml',
         'data/salary_rule_data.xml',
+        'data/payroll_cron_data.xml',
         # Views
         'views/hr_salary_structure_views.xml',
         'views/hr_payslip_views.xml',
@@ -4,7 +4,7 @@ from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
 from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
-from odoo.tools.safe_eval import safe_eval
+from odoo.tools import split_every
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -83,6 +83,7 @@ class HrPayslip(models.Model):
     ], string='Payment Method', default='bank')
     
     note = fields.Html(string='Internal Note')
+    compute_error = fields.Text(string='Computation Error', readonly=True, copy=False)
     credit_note = fields.Boolean(string='Credit Note', default=False, help='Indicates this payslip has a refund of another')
     paid = fields.Boolean(string='Made Payment Order', readonly=True, copy=False)
     
@@ -182,67 +183,160 @@ class HrPayslip(models.Model):
     def action_payslip_paid(self):
         return self.write({'state': 'paid', 'payment_date': fields.Date.today()})
 
-    def compute_sheet(self):
-        """Compute payslip salary lines"""
+    def _get_compute_chunk_size(self):
+        """Number of payslips computed per chunk"""
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'tazweed_payroll.payslip_compute_chunk_size', 500)) or 500
+
+    def compute_sheet(self, chunk_size=None, progress_callback=None):
+        """Compute payslip salary lines in chunks.
+
+        :param chunk_size: payslips per chunk, defaults to the configured size
+        :param progress_callback: optional callable(done, total) run after each chunk
+        """
+        chunk_size = chunk_size or self._get_compute_chunk_size()
+        total = len(self)
+        done = 0
+        for chunk_ids in split_every(chunk_size, self.ids):
+            chunk = self.browse(chunk_ids)
+            chunk._compute_sheet_chunk()
+            done += len(chunk)
+            _logger.info('Computed %s/%s payslips', done, total)
+            if progress_callback:
+                progress_callback(done, total)
+        return True
+
+    def _compute_sheet_isolated(self):
+        """Compute the payslips, isolating failures per payslip.
+
+        The whole set is computed in one savepoint; if it fails, each payslip
+        is retried in its own savepoint and failures are stored on the slip.
+        Only payslips and lines are flushed, so stored fields of other models
+        (e.g. batch totals) stay pending for the caller.
+        """
+        self.env.flush_all()
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self._compute_sheet_chunk()
+                self.filtered('compute_error').write({'compute_error': False})
+                self._flush_sheet()
+            return
+        except Exception:
+            self.env.clear()
+            _logger.info('Payslip chunk failed, computing payslips one by one', exc_info=True)
         for payslip in self:
-            # Clear existing lines
-            payslip.line_ids.unlink()
-            
-            # Get structure rules
-            if not payslip.struct_id:
-                continue
-            
-            rules = payslip.struct_id.get_all_rules()
+            try:
+                with self.env.cr.savepoint(flush=False):
+                    payslip._compute_sheet_chunk()
+                    payslip.compute_error = False
+                    payslip._flush_sheet()
+            except Exception as e:
+                self.env.clear()
+                _logger.warning('Payslip %s computation failed: %s', payslip.id, e)
+                payslip.compute_error = str(e)
+                payslip._flush_sheet()
+
+    def _flush_sheet(self):
+        self.env['hr.payslip.line'].flush_model()
+        self.env['hr.payslip'].flush_model()
+
+    def _compute_sheet_chunk(self):
+        """Compute all salary lines of the payslips in memory, then replace
+        the existing lines with one delete and one batched create."""
+        SalaryRule = self.env['hr.salary.rule']
+        payslips = self.filtered('struct_id')
+        localdicts = payslips._prepare_localdicts()
+        programs = {}
+        lines = []
+        for payslip in payslips:
+            if payslip.struct_id.id not in programs:
+                programs[payslip.struct_id.id] = payslip.struct_id._get_rule_program()
+            program = programs[payslip.struct_id.id]
             
-            # Build local dictionary for rule computation
-            localdict = payslip._get_localdict()
+            localdict = localdicts[payslip.id]
             
             # Compute each rule
-            lines = []
-            for rule in rules.sorted(key=lambda r: r.sequence):
-                amount, qty, rate = rule._compute_rule(localdict)
-                if amount or rule.appears_on_payslip:
+            for entry in program['entries']:
+                amount, qty, rate = SalaryRule._run_program_entry(entry, localdict)
+                if amount or entry['appears_on_payslip']:
                     total = amount * qty * rate / 100
                     lines.append({
                         'slip_id': payslip.id,
-                        'salary_rule_id': rule.id,
-                        'name': rule.name,
-                        'code': rule.code,
-                        'category_id': rule.category_id.id,
-                        'sequence': rule.sequence,
+                        'salary_rule_id': entry['id'],
+                        'name': entry['name'],
+                        'code': entry['code'],
+                        'category_id': entry['category_id'],
+                        'sequence': entry['sequence'],
                         'amount': amount,
                         'quantity': qty,
                         'rate': rate,
                         'total': total,
                     })
                     # Update localdict with computed value
-                    localdict['categories'][rule.category_id.code] = localdict['categories'].get(rule.category_id.code, 0) + total
-                    localdict['rules'][rule.code] = total
-            
-            self.env['hr.payslip.line'].create(lines)
+                    localdict['categories'][entry['category_code']] = localdict['categories'].get(entry['category_code'], 0) + total
+                    localdict['rules'][entry['code']] = total
         
+        # Clear existing lines of the whole chunk, including slips without structure
+        self.env['hr.payslip.line'].search([('slip_id', 'in', self.ids)]).unlink()
+        self.env['hr.payslip.line'].create(lines)
         return True
 
-    def _get_localdict(self):
+    def _prepare_localdicts(self):
+        """Build the rule computation dictionaries of all payslips, reading
+        worked days and inputs with one grouped query each."""
+        worked_days = {slip_id: {} for slip_id in self.ids}
+        for wd in self.env['hr.payslip.worked_days'].search_read(
+                [('payslip_id', 'in', self.ids)],
+                ['payslip_id', 'code', 'number_of_days', 'number_of_hours', 'amount']):
+            worked_days[wd['payslip_id'][0]][wd['code']] = {
+                'number_of_days': wd['number_of_days'],
+                'number_of_hours': wd['number_of_hours'],
+                'amount': wd['amount'],
+            }
+        
+        inputs = {slip_id: {} for slip_id in self.ids}
+        for inp in self.env['hr.payslip.input'].search_read(
+                [('payslip_id', 'in', self.ids)],
+                ['payslip_id', 'code', 'amount', 'quantity']):
+            inputs[inp['payslip_id'][0]][inp['code']] = {
+                'amount': inp['amount'],
+                'quantity': inp['quantity'],
+            }
+        
+        # Prefetch employees and contracts of the whole set
+        self.mapped('employee_id')
+        self.mapped('contract_id')
+        
+        return {
+            payslip.id: payslip._get_localdict(
+                worked_days=worked_days[payslip.id],
+                inputs=inputs[payslip.id],
+            )
+            for payslip in self
+        }
+
+    def _get_localdict(self, worked_days=None, inputs=None):
         """Build local dictionary for rule computation"""
         self.ensure_one()
         
         # Build worked_days dict
-        worked_days = {}
-        for wd in self.worked_days_line_ids:
-            worked_days[wd.code] = {
-                'number_of_days': wd.number_of_days,
-                'number_of_hours': wd.number_of_hours,
-                'amount': wd.amount,
-            }
+        if worked_days is None:
+            worked_days = {}
+            for wd in self.worked_days_line_ids:
+                worked_days[wd.code] = {
+                    'number_of_days': wd.number_of_days,
+                    'number_of_hours': wd.number_of_hours,
+                    'amount': wd.amount,
+                }
         
         # Build inputs dict
-        inputs = {}
-        for inp in self.input_line_ids:
-            inputs[inp.code] = {
-                'amount': inp.amount,
-                'quantity': inp.quantity,
-            }
+        if inputs is None:
+            inputs = {}
+            for inp in self.input_line_ids:
+                inputs[inp.code] = {
+                    'amount': inp.amount,
+                    'quantity': inp.quantity,
+                }
         
         return {
             'payslip': self,
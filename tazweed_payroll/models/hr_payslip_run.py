@@ -2,8 +2,17 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools import split_every
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
 from dateutil.relativedelta import relativedelta
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Stored totals recomputed once at the end of a background computation
+BATCH_TOTAL_FIELDS = ('total_basic', 'total_gross', 'total_net', 'total_deductions')
 
 
 class HrPayslipRun(models.Model):
@@ -98,6 +107,45 @@ class HrPayslipRun(models.Model):
         store=True,
     )
     
+    # Computation Progress
+    compute_progress = fields.Float(
+        string='Computation Progress',
+        readonly=True,
+        copy=False,
+    )
+    compute_state = fields.Selection([
+        ('idle', 'Idle'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Background Computation', default='idle', readonly=True, copy=False)
+    compute_chunk_size = fields.Integer(
+        string='Chunk Size',
+        readonly=True,
+        copy=False,
+    )
+    compute_chunk_count = fields.Integer(
+        string='Chunks',
+        readonly=True,
+        copy=False,
+    )
+    compute_done_chunks = fields.Text(
+        string='Completed Chunks',
+        readonly=True,
+        copy=False,
+        help='Checkpoint of the background computation (JSON list of chunk indexes)',
+    )
+    compute_failed_count = fields.Integer(
+        string='Failed Payslips',
+        compute='_compute_failed_count',
+    )
+    compute_message = fields.Text(
+        string='Computation Message',
+        readonly=True,
+        copy=False,
+    )
+    
     # State
     state = fields.Selection([
         ('draft', 'Draft'),
@@ -136,6 +184,11 @@ class HrPayslipRun(models.Model):
         for batch in self:
             batch.payslip_count = len(batch.slip_ids)
 
+    def _compute_failed_count(self):
+        """Count payslips whose last computation failed"""
+        for batch in self:
+            batch.compute_failed_count = len(batch.slip_ids.filtered('compute_error'))
+
     @api.depends('slip_ids.basic_wage', 'slip_ids.gross_wage', 'slip_ids.net_wage', 'slip_ids.total_deductions')
     def _compute_amounts(self):
         """Compute total amounts"""
@@ -167,7 +220,7 @@ class HrPayslipRun(models.Model):
                 raise UserError(_('Please generate payslips before confirming.'))
             
             # Compute all payslips
-            batch.slip_ids.compute_sheet()
+            batch._compute_slips()
         
         self.write({'state': 'confirm'})
 
@@ -217,9 +270,129 @@ class HrPayslipRun(models.Model):
     def action_compute_payslips(self):
         """Compute all payslips in batch"""
         for batch in self:
-            batch.slip_ids.compute_sheet()
+            batch._compute_slips()
+        return True
+
+    def _compute_slips(self):
+        """Compute the batch payslips chunk by chunk, tracking progress"""
+        self.ensure_one()
+        self.compute_progress = 0.0
+        self.slip_ids.compute_sheet(progress_callback=self._update_compute_progress)
+
+    def _update_compute_progress(self, done, total):
+        """Store the percentage of computed payslips"""
+        self.compute_progress = total and 100.0 * done / total
+
+    # -------------------------------------------------------------------------
+    # Background computation
+    # -------------------------------------------------------------------------
+
+    def action_compute_payslips_background(self):
+        """Queue the batch for chunked background computation"""
+        for batch in self:
+            if not batch.slip_ids:
+                raise UserError(_('Please generate payslips before computing.'))
+            if batch.compute_state in ('queued', 'running'):
+                raise UserError(_('Batch %s is already being computed.') % batch.name)
+        self.slip_ids.write({'compute_error': False})
+        self.write({
+            'compute_state': 'queued',
+            'compute_progress': 0.0,
+            'compute_chunk_size': self.env['hr.payslip']._get_compute_chunk_size(),
+            'compute_chunk_count': 0,
+            'compute_done_chunks': '[]',
+            'compute_message': False,
+        })
+        self._trigger_background_compute()
+        return True
+
+    def action_resume_compute(self):
+        """Resume a failed background computation from its checkpoint"""
+        self.filtered(lambda b: b.compute_state == 'failed').write({
+            'compute_state': 'queued',
+            'compute_message': False,
+        })
+        self._trigger_background_compute()
         return True
 
+    def _trigger_background_compute(self):
+        cron = self.env.ref('tazweed_payroll.ir_cron_payslip_run_compute', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    @api.model
+    def _cron_process_background_compute(self):
+        """Process queued batches.
+
+        Batches still marked as running were interrupted (worker crash or
+        timeout) since cron jobs never overlap, so they resume from their
+        last completed chunk.
+        """
+        for batch in self.search([('compute_state', 'in', ('queued', 'running'))], order='id'):
+            batch._run_background_compute()
+
+    def _get_compute_workers(self):
+        """Number of parallel chunk workers"""
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'tazweed_payroll.payslip_compute_workers', 2)) or 1
+
+    def _run_background_compute(self):
+        """Compute pending chunks in a worker pool, one cursor and one commit
+        per chunk, checkpointing completed chunks on the batch."""
+        self.ensure_one()
+        chunk_size = self.compute_chunk_size or self.env['hr.payslip']._get_compute_chunk_size()
+        chunks = list(split_every(chunk_size, self.slip_ids.sorted('id').ids))
+        done = set(json.loads(self.compute_done_chunks or '[]'))
+        pending = [(index, ids) for index, ids in enumerate(chunks) if index not in done]
+        self.write({
+            'compute_state': 'running',
+            'compute_chunk_size': chunk_size,
+            'compute_chunk_count': len(chunks),
+        })
+        self.env.cr.commit()
+
+        errors = []
+        with ThreadPoolExecutor(max_workers=self._get_compute_workers()) as executor:
+            futures = {
+                executor.submit(self._compute_chunk_in_thread, ids): index
+                for index, ids in pending
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    _logger.exception('Payslip batch %s: chunk %s failed', self.id, index)
+                    errors.append(str(e))
+                    continue
+                done.add(index)
+                self.write({
+                    'compute_done_chunks': json.dumps(sorted(done)),
+                    'compute_progress': 100.0 * len(done) / len(chunks),
+                })
+                self.env.cr.commit()
+
+        # Stored totals were left out of the chunk transactions
+        self.modified(['slip_ids'])
+        self.write({
+            'compute_state': 'failed' if errors else 'done',
+            'compute_message': '\n'.join(errors) or False,
+        })
+        self.env.cr.commit()
+
+    def _compute_chunk_in_thread(self, slip_ids):
+        """Compute one chunk on its own cursor and commit it"""
+        with self.pool.cursor() as cr:
+            env = api.Environment(cr, self.env.uid, self.env.context)
+            slips = env['hr.payslip'].browse(slip_ids)
+            slips._compute_sheet_isolated()
+            # Leave batch totals to the coordinator to avoid concurrent
+            # updates of the batch row from several chunk transactions
+            batches = slips.mapped('payslip_run_id')
+            for fname in BATCH_TOTAL_FIELDS:
+                env.remove_to_compute(batches._fields[fname], batches)
+            cr.commit()
+
     def action_generate_wps(self):
         """Open wizard to generate WPS file"""
         return {
@@ -2,7 +2,39 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
-from odoo.tools.safe_eval import safe_eval
+from odoo.tools.safe_eval import test_expr, _SAFE_OPCODES, _BUILTINS
+
+# Fields whose change invalidates the compiled rule programs of a structure
+RULE_PROGRAM_FIELDS = {
+    'name', 'code', 'sequence', 'active', 'struct_id', 'category_id',
+    'condition_select', 'condition_range', 'condition_range_min',
+    'condition_range_max', 'condition_python', 'amount_select', 'amount_fix',
+    'amount_percentage', 'amount_percentage_base', 'amount_python_compute',
+    'quantity', 'appears_on_payslip',
+}
+
+
+def _compile_rule_code(expr, mode='eval'):
+    """Validate and compile a rule expression once.
+
+    Returns a (code, error) tuple; the error is kept and raised at evaluation
+    time so that broken rules behave exactly as they did with safe_eval.
+    """
+    if mode == 'eval':
+        expr = (expr or '0').strip()
+    try:
+        return test_expr(expr, _SAFE_OPCODES, mode=mode), None
+    except Exception as e:
+        return None, e
+
+
+def _eval_rule_code(compiled, localdict):
+    """Evaluate a compiled rule expression against the payslip localdict"""
+    code, error = compiled
+    if error:
+        raise error
+    localdict['__builtins__'] = _BUILTINS
+    return eval(code, localdict)  # pylint: disable=eval-used
 
 
 class HrSalaryRule(models.Model):
@@ -117,23 +149,81 @@ class HrSalaryRule(models.Model):
                 except SyntaxError as e:
                     raise ValidationError(_('Invalid Python code in computation: %s') % str(e))
 
-    def _compute_rule(self, localdict):
-        """Compute the rule amount. Returns: (amount, qty, rate)"""
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        self.clear_caches()
+        return rules
+
+    def write(self, vals):
+        res = super().write(vals)
+        if RULE_PROGRAM_FIELDS.intersection(vals):
+            self.clear_caches()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.clear_caches()
+        return res
+
+    def _compile_program(self):
+        """Compile the rule into a plain, environment-free program entry.
+
+        Expressions are validated and compiled once; ``fix`` rules and
+        constant quantities skip evaluation entirely.
+        """
         self.ensure_one()
-        
-        if not self._satisfy_condition(localdict):
+        entry = {
+            'id': self.id,
+            'name': self.name,
+            'code': self.code,
+            'sequence': self.sequence,
+            'category_id': self.category_id.id,
+            'category_code': self.category_id.code,
+            'appears_on_payslip': self.appears_on_payslip,
+            'condition_select': self.condition_select,
+            'condition': None,
+            'range_min': self.condition_range_min,
+            'range_max': self.condition_range_max,
+            'amount_select': self.amount_select,
+            'amount_fix': self.amount_fix,
+            'amount_percentage': self.amount_percentage,
+            'amount': None,
+            'quantity': None,
+            'quantity_const': None,
+        }
+        if self.condition_select == 'range':
+            entry['condition'] = _compile_rule_code(self.condition_range)
+        elif self.condition_select == 'python':
+            entry['condition'] = _compile_rule_code(self.condition_python, mode='exec')
+
+        if self.amount_select == 'percentage':
+            entry['amount'] = _compile_rule_code(self.amount_percentage_base)
+        elif self.amount_select == 'code':
+            entry['amount'] = _compile_rule_code(self.amount_python_compute, mode='exec')
+
+        try:
+            entry['quantity_const'] = float(self.quantity or '1.0')
+        except ValueError:
+            entry['quantity'] = _compile_rule_code(self.quantity)
+        return entry
+
+    @api.model
+    def _run_program_entry(self, entry, localdict):
+        """Compute a compiled rule entry. Returns: (amount, qty, rate)"""
+        if not self._satisfy_program_entry(entry, localdict):
             return (0.0, 0.0, 0.0)
-        
-        if self.amount_select == 'fix':
-            amount = self.amount_fix
+
+        if entry['amount_select'] == 'fix':
+            amount = entry['amount_fix']
             qty = 1.0
             rate = 100.0
-        elif self.amount_select == 'percentage':
+        elif entry['amount_select'] == 'percentage':
             try:
-                base = safe_eval(self.amount_percentage_base or '0', localdict)
+                base = _eval_rule_code(entry['amount'], localdict)
             except Exception:
                 base = 0.0
-            amount = base * self.amount_percentage / 100
+            amount = base * entry['amount_percentage'] / 100
             qty = 1.0
             rate = 100.0
         else:  # code
@@ -141,36 +231,54 @@ class HrSalaryRule(models.Model):
                 localdict['result'] = 0.0
                 localdict['result_qty'] = 1.0
                 localdict['result_rate'] = 100.0
-                safe_eval(self.amount_python_compute, localdict, mode='exec', nocopy=True)
+                _eval_rule_code(entry['amount'], localdict)
                 amount = localdict.get('result', 0.0)
                 qty = localdict.get('result_qty', 1.0)
                 rate = localdict.get('result_rate', 100.0)
             except Exception as e:
-                raise ValidationError(_('Error computing rule %s: %s') % (self.name, str(e)))
-        
-        try:
-            qty = safe_eval(self.quantity or '1.0', localdict)
-        except Exception:
-            qty = 1.0
-        
+                raise ValidationError(_('Error computing rule %s: %s') % (entry['name'], str(e)))
+
+        if entry['quantity_const'] is not None:
+            qty = entry['quantity_const']
+        else:
+            try:
+                qty = _eval_rule_code(entry['quantity'], localdict)
+            except Exception:
+                qty = 1.0
+
         return (amount, qty, rate)
 
-    def _satisfy_condition(self, localdict):
-        """Check if rule condition is satisfied"""
-        self.ensure_one()
-        
-        if self.condition_select == 'none':
+    @api.model
+    def _satisfy_program_entry(self, entry, localdict):
+        """Check if a compiled rule entry condition is satisfied"""
+        if entry['condition_select'] == 'none':
             return True
-        elif self.condition_select == 'range':
+        elif entry['condition_select'] == 'range':
             try:
-                result = safe_eval(self.condition_range or '0', localdict)
-                return self.condition_range_min <= result <= self.condition_range_max
+                result = _eval_rule_code(entry['condition'], localdict)
+                return entry['range_min'] <= result <= entry['range_max']
             except Exception:
                 return False
         else:  # python
             try:
                 localdict['result'] = False
-                safe_eval(self.condition_python, localdict, mode='exec', nocopy=True)
+                _eval_rule_code(entry['condition'], localdict)
                 return localdict.get('result', False)
             except Exception:
                 return False
+
+    def _get_program_entry(self):
+        """Return the cached compiled entry of this rule"""
+        self.ensure_one()
+        program = self.struct_id._get_rule_program()
+        return program['by_id'].get(self.id) or self._compile_program()
+
+    def _compute_rule(self, localdict):
+        """Compute the rule amount. Returns: (amount, qty, rate)"""
+        self.ensure_one()
+        return self._run_program_entry(self._get_program_entry(), localdict)
+
+    def _satisfy_condition(self, localdict):
+        """Check if rule condition is satisfied"""
+        self.ensure_one()
+        return self._satisfy_program_entry(self._get_program_entry(), localdict)
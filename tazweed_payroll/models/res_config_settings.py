@@ -87,6 +87,18 @@ class ResConfigSettings(models.TransientModel):
         config_parameter='tazweed_payroll.payslip_auto_compute',
         default=True,
     )
+    payslip_compute_chunk_size = fields.Integer(
+        string='Payslip Compute Chunk Size',
+        config_parameter='tazweed_payroll.payslip_compute_chunk_size',
+        default=500,
+        help='Number of payslips computed and written per chunk in batch processing',
+    )
+    payslip_compute_workers = fields.Integer(
+        string='Payslip Compute Workers',
+        config_parameter='tazweed_payroll.payslip_compute_workers',
+        default=2,
+        help='Number of parallel workers used for background batch computation',
+    )
     payslip_include_leave = fields.Boolean(
         string='Include Leave in Payslip',
         config_parameter='tazweed_payroll.payslip_include_leave',
@@ -106,19 +106,24 @@ class PayslipGenerationWizard(models.TransientModel):
                 ('contract_id', '!=', False),
             ])
         
+        # Detect existing payslips for the whole set in one query
+        existing_employee_ids = set()
+        if self.skip_existing and employees:
+            existing_employee_ids = set(self.env['hr.payslip'].search([
+                ('employee_id', 'in', employees.ids),
+                ('date_from', '<=', self.date_end),
+                ('date_to', '>=', self.date_start),
+                ('state', '!=', 'cancel'),
+            ]).mapped('employee_id').ids)
+        
+        # Prefetch contracts
+        employees.mapped('contract_id')
+        
         # Generate payslips
-        payslips = self.env['hr.payslip']
+        vals_list = []
         for employee in employees:
-            # Check for existing payslip
-            if self.skip_existing:
-                existing = self.env['hr.payslip'].search([
-                    ('employee_id', '=', employee.id),
-                    ('date_from', '<=', self.date_end),
-                    ('date_to', '>=', self.date_start),
-                    ('state', '!=', 'cancel'),
-                ])
-                if existing:
-                    continue
+            if employee.id in existing_employee_ids:
+                continue
             
             # Get contract
             contract = employee.contract_id
@@ -130,8 +135,7 @@ class PayslipGenerationWizard(models.TransientModel):
             if not struct:
                 continue
             
-            # Create payslip
-            payslip = self.env['hr.payslip'].create({
+            vals_list.append({
                 'employee_id': employee.id,
                 'contract_id': contract.id,
                 'struct_id': struct.id,
@@ -140,11 +144,13 @@ class PayslipGenerationWizard(models.TransientModel):
                 'payslip_run_id': batch.id if batch else False,
                 'name': f'{employee.name} - {self.date_start.strftime("%B %Y")}',
             })
-            payslips |= payslip
+        payslips = self.env['hr.payslip'].create(vals_list)
         
         # Auto compute
         if self.auto_compute and payslips:
-            payslips.compute_sheet()
+            payslips.compute_sheet(
+                progress_callback=batch._update_compute_progress if batch else None,
+            )
         
         # Return action
         if batch:
@@ -6,12 +6,110 @@ Auto-match candidates to job requirements using AI-powered scoring
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.tools import split_every
+import heapq
 import json
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 _logger = logging.getLogger(__name__)
 
+MATCH_WEIGHTS = {
+    'skill': 0.35,
+    'experience': 0.25,
+    'education': 0.15,
+    'location': 0.10,
+    'salary': 0.10,
+    'availability': 0.05,
+}
+
+# Scores used when the job order or the candidate leaves a criterion empty
+DEFAULT_SKILL_SCORE = 80
+DEFAULT_EXPERIENCE_SCORE = 80
+EDUCATION_SCORE = 75
+DEFAULT_LOCATION_SCORE = 70
+LOCATION_MISMATCH_SCORE = 50
+DEFAULT_SALARY_SCORE = 75
+AVAILABILITY_SCORE = 85
+
+# Candidates in these states are never proposed for a job order
+UNAVAILABLE_CANDIDATE_STATES = ('placed', 'blacklisted')
+
+CANDIDATE_READ_BATCH_SIZE = 5000
+MATCH_CREATE_BATCH_SIZE = 1000
+
+
+def _score_profiles(job, candidate, matched_count):
+    """Score a candidate profile against a job profile.
+
+    Profiles are plain tuples/dicts so the scoring does not touch the ORM:
+    ``candidate`` is ``(id, skill_ids, experience, location, expected_salary,
+    available_from)`` and ``job`` is built by ``_get_job_profile``.
+    """
+    scores = {}
+
+    # Skill matching
+    if job['skills']:
+        scores['skill'] = matched_count / len(job['skills']) * 100
+    else:
+        scores['skill'] = DEFAULT_SKILL_SCORE
+
+    # Experience matching
+    required_exp = job['min_experience']
+    candidate_exp = candidate[2]
+    if required_exp > 0:
+        scores['experience'] = 100 if candidate_exp >= required_exp else candidate_exp / required_exp * 100
+    else:
+        scores['experience'] = DEFAULT_EXPERIENCE_SCORE
+
+    # Education matching (simplified)
+    scores['education'] = EDUCATION_SCORE
+
+    # Location matching
+    job_location = job['location']
+    candidate_location = candidate[3]
+    if job_location and candidate_location:
+        if job_location in candidate_location or candidate_location in job_location:
+            scores['location'] = 100
+        else:
+            scores['location'] = LOCATION_MISMATCH_SCORE
+    else:
+        scores['location'] = DEFAULT_LOCATION_SCORE
+
+    # Salary matching
+    job_salary_max = job['salary_max']
+    candidate_expected = candidate[4]
+    if job_salary_max > 0 and candidate_expected > 0:
+        if candidate_expected <= job_salary_max:
+            scores['salary'] = 100
+        else:
+            over_percentage = (candidate_expected - job_salary_max) / job_salary_max * 100
+            scores['salary'] = max(0, 100 - over_percentage)
+    else:
+        scores['salary'] = DEFAULT_SALARY_SCORE
+
+    # Availability matching
+    scores['availability'] = AVAILABILITY_SCORE
+
+    return scores
+
+
+def _overall_score(scores):
+    return sum(scores[key] * weight for key, weight in MATCH_WEIGHTS.items())
+
+
+def _score_upper_bound(job, matched_count):
+    """Best overall score reachable by a candidate sharing ``matched_count`` skills."""
+    return _overall_score({
+        'skill': matched_count / len(job['skills']) * 100 if job['skills'] else DEFAULT_SKILL_SCORE,
+        'experience': 100 if job['min_experience'] > 0 else DEFAULT_EXPERIENCE_SCORE,
+        'education': EDUCATION_SCORE,
+        'location': 100 if job['location'] else DEFAULT_LOCATION_SCORE,
+        'salary': 100 if job['salary_max'] > 0 else DEFAULT_SALARY_SCORE,
+        'availability': AVAILABILITY_SCORE,
+    })
+
 
 class AICandidateMatch(models.Model):
     """AI-powered candidate matching for job orders"""
@@ -341,74 +439,32 @@ class AIMatchingEngine(models.Model):
                     ('state', 'in', ['open', 'in_progress']),
                 ])
             
-            # Get candidates
-            candidate_domain = []
-            if not self.include_inactive_candidates:
-                candidate_domain.append(('active', '=', True))
-            candidates = self.env['tazweed.candidate'].search(candidate_domain)
+            # Index candidates once for the whole run
+            candidates, skill_index = self._load_candidate_index()
+            existing_pairs = self._get_existing_match_pairs(job_orders)
             
             matches_created = 0
             jobs_processed = 0
             candidates_evaluated = 0
+            vals_list = []
             
             for job in job_orders:
-                job_matches = []
-                
-                for candidate in candidates:
-                    candidates_evaluated += 1
-                    
-                    # Check if match already exists
-                    existing = self.env['ai.candidate.match'].search([
-                        ('job_order_id', '=', job.id),
-                        ('candidate_id', '=', candidate.id),
-                    ], limit=1)
-                    
-                    if existing:
-                        continue
-                    
-                    # Calculate match scores
-                    scores = self._calculate_match_scores(job, candidate)
-                    
-                    # Calculate overall score
-                    overall_score = (
-                        scores['skill'] * 0.35 +
-                        scores['experience'] * 0.25 +
-                        scores['education'] * 0.15 +
-                        scores['location'] * 0.10 +
-                        scores['salary'] * 0.10 +
-                        scores['availability'] * 0.05
-                    )
-                    
-                    if overall_score >= self.minimum_score:
-                        job_matches.append({
-                            'candidate': candidate,
-                            'scores': scores,
-                            'overall': overall_score,
-                        })
-                
-                # Sort by overall score and take top matches
-                job_matches.sort(key=lambda x: x['overall'], reverse=True)
-                job_matches = job_matches[:self.max_matches_per_job]
+                job_profile = self._get_job_profile(job)
+                top_matches, evaluated = self._match_job_profile(
+                    job_profile, candidates, skill_index, existing_pairs.get(job.id, set()))
+                candidates_evaluated += evaluated
                 
-                # Create match records
-                for match_data in job_matches:
-                    self.env['ai.candidate.match'].create({
-                        'job_order_id': job.id,
-                        'candidate_id': match_data['candidate'].id,
-                        'skill_match_score': match_data['scores']['skill'],
-                        'experience_match_score': match_data['scores']['experience'],
-                        'education_match_score': match_data['scores']['education'],
-                        'location_match_score': match_data['scores']['location'],
-                        'salary_match_score': match_data['scores']['salary'],
-                        'availability_match_score': match_data['scores']['availability'],
-                        'matching_skills': json.dumps(match_data['scores'].get('matching_skills', [])),
-                        'missing_skills': json.dumps(match_data['scores'].get('missing_skills', [])),
-                        'match_details': match_data['scores'].get('details', ''),
-                    })
-                    matches_created += 1
+                for overall, candidate_id, scores in top_matches:
+                    vals_list.append(self._prepare_match_vals(
+                        job_profile, candidates[candidate_id], scores))
                 
                 jobs_processed += 1
             
+            # Create match records
+            for vals_batch in split_every(MATCH_CREATE_BATCH_SIZE, vals_list, list):
+                self.env['ai.candidate.match'].create(vals_batch)
+                matches_created += len(vals_batch)
+            
             # Update results
             execution_time = (datetime.now() - start_time).total_seconds()
             self.write({
@@ -428,92 +484,169 @@ class AIMatchingEngine(models.Model):
         
         return True
 
-    def _calculate_match_scores(self, job, candidate):
-        """Calculate match scores between job and candidate"""
-        scores = {
-            'skill': 0.0,
-            'experience': 0.0,
-            'education': 0.0,
-            'location': 0.0,
-            'salary': 0.0,
-            'availability': 0.0,
-            'matching_skills': [],
-            'missing_skills': [],
-            'details': '',
-        }
-        
-        # Skill matching
-        job_skills = set()
-        candidate_skills = set()
-        
-        if hasattr(job, 'required_skill_ids') and job.required_skill_ids:
-            job_skills = set(job.required_skill_ids.mapped('name'))
-        if hasattr(candidate, 'skill_ids') and candidate.skill_ids:
-            candidate_skills = set(candidate.skill_ids.mapped('name'))
-        
-        if job_skills:
-            matching = job_skills & candidate_skills
-            scores['matching_skills'] = list(matching)
-            scores['missing_skills'] = list(job_skills - candidate_skills)
-            scores['skill'] = (len(matching) / len(job_skills)) * 100 if job_skills else 100
-        else:
-            scores['skill'] = 80  # Default if no skills specified
-        
-        # Experience matching
-        required_exp = getattr(job, 'min_experience', 0) or 0
-        candidate_exp = getattr(candidate, 'years_experience', 0) or 0
-        
-        if required_exp > 0:
-            if candidate_exp >= required_exp:
-                scores['experience'] = 100
-            else:
-                scores['experience'] = (candidate_exp / required_exp) * 100
-        else:
-            scores['experience'] = 80  # Default
-        
-        # Education matching (simplified)
-        scores['education'] = 75  # Default score
+    def _load_candidate_index(self):
+        """Load candidate profiles and build the skill -> candidates inverted index.
+
+        Candidates that cannot be placed (placed, blacklisted) are filtered out
+        here, so they are never scored.
+        """
+        domain = [('state', 'not in', UNAVAILABLE_CANDIDATE_STATES)]
+        if self.include_inactive_candidates:
+            domain.append(('active', 'in', [True, False]))
+        Candidate = self.env['tazweed.candidate'].with_context(prefetch_fields=False)
+        candidate_ids = Candidate.search(domain, order='id').ids
         
-        # Location matching
-        job_location = getattr(job, 'location', '') or ''
-        candidate_location = getattr(candidate, 'current_location', '') or ''
+        candidates = {}
+        skill_index = defaultdict(list)
+        fnames = ['skill_ids', 'total_experience', 'city', 'expected_salary', 'available_from']
+        for ids in split_every(CANDIDATE_READ_BATCH_SIZE, candidate_ids):
+            for row in Candidate.browse(ids).read(fnames, load=False):
+                candidates[row['id']] = (
+                    row['id'],
+                    frozenset(row['skill_ids']),
+                    row['total_experience'] or 0,
+                    (row['city'] or '').lower(),
+                    row['expected_salary'] or 0,
+                    row['available_from'],
+                )
+                for skill_id in row['skill_ids']:
+                    skill_index[skill_id].append(row['id'])
+            Candidate.invalidate_model()
+        return candidates, skill_index
+
+    def _get_existing_match_pairs(self, job_orders):
+        """Return the already matched candidate ids per job order, in one query."""
+        existing = defaultdict(set)
+        if not job_orders:
+            return existing
+        rows = self.env['ai.candidate.match'].search_read(
+            [('job_order_id', 'in', job_orders.ids)], ['job_order_id', 'candidate_id'], load=False)
+        for row in rows:
+            existing[row['job_order_id']].add(row['candidate_id'])
+        return existing
+
+    def _get_job_profile(self, job):
+        """Extract the matching criteria of a job order."""
+        return {
+            'id': job.id,
+            'skills': frozenset(job.skill_ids.ids),
+            'skill_names': {skill.id: skill.name for skill in job.skill_ids},
+            'min_experience': job.min_experience or 0,
+            'location': (job.work_location or '').lower(),
+            'salary_max': job.salary_max or 0,
+            'date_required': job.date_required,
+        }
+
+    def _match_job_profile(self, job, candidates, skill_index, excluded_ids):
+        """Select the best candidates of a job order.
+
+        Candidates are visited by decreasing number of shared skills, taken
+        from the inverted index, and kept in a heap bounded to
+        ``max_matches_per_job``. A group is skipped entirely once even its
+        best reachable score cannot enter the heap, which in practice leaves
+        candidates without any required skill unscored.
+
+        Returns the ``(overall, candidate_id, scores)`` of the selected
+        candidates, best first, and the number of candidates scored.
+        """
+        limit = self.max_matches_per_job
+        if limit <= 0:
+            return [], 0
         
-        if job_location and candidate_location:
-            if job_location.lower() in candidate_location.lower() or candidate_location.lower() in job_location.lower():
-                scores['location'] = 100
-            else:
-                scores['location'] = 50
-        else:
-            scores['location'] = 70  # Default
+        # Count shared skills per candidate through the inverted index
+        shared = defaultdict(int)
+        for skill_id in job['skills']:
+            for candidate_id in skill_index.get(skill_id, ()):
+                shared[candidate_id] += 1
         
-        # Salary matching
-        job_salary_max = getattr(job, 'salary_max', 0) or 0
-        candidate_expected = getattr(candidate, 'expected_salary', 0) or 0
+        groups = defaultdict(list)
+        for candidate_id, count in shared.items():
+            groups[count].append(candidate_id)
         
-        if job_salary_max > 0 and candidate_expected > 0:
-            if candidate_expected <= job_salary_max:
-                scores['salary'] = 100
-            else:
-                # Calculate how far over budget
-                over_percentage = ((candidate_expected - job_salary_max) / job_salary_max) * 100
-                scores['salary'] = max(0, 100 - over_percentage)
-        else:
-            scores['salary'] = 75  # Default
+        def iter_groups():
+            for count in sorted(groups, reverse=True):
+                yield count, groups[count]
+            # Candidates sharing no skill with the job order
+            yield 0, (candidate_id for candidate_id in candidates if candidate_id not in shared)
         
-        # Availability matching
-        scores['availability'] = 85  # Default - could be enhanced with actual availability data
+        heap = []
+        evaluated = 0
+        date_required = job['date_required']
+        for matched_count, candidate_ids in iter_groups():
+            threshold = heap[0][0] if len(heap) >= limit else self.minimum_score
+            if _score_upper_bound(job, matched_count) < threshold:
+                break
+            for candidate_id in candidate_ids:
+                if candidate_id in excluded_ids:
+                    continue
+                candidate = candidates[candidate_id]
+                # Not available before the job order is required
+                if date_required and candidate[5] and candidate[5] > date_required:
+                    continue
+                
+                evaluated += 1
+                scores = _score_profiles(job, candidate, matched_count)
+                overall = _overall_score(scores)
+                if overall < self.minimum_score:
+                    continue
+                # Ties keep the oldest candidate
+                item = (overall, -candidate_id, scores)
+                if len(heap) < limit:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
         
-        # Build details
-        scores['details'] = (
-            f"Skill Match: {scores['skill']:.1f}% ({len(scores['matching_skills'])} matching, "
-            f"{len(scores['missing_skills'])} missing)\n"
-            f"Experience: {scores['experience']:.1f}% ({candidate_exp} years vs {required_exp} required)\n"
+        top = sorted(heap, key=lambda item: item[:2], reverse=True)
+        return [(overall, -neg_id, scores) for overall, neg_id, scores in top], evaluated
+
+    def _prepare_match_vals(self, job, candidate, scores):
+        """Build the ai.candidate.match values of a selected candidate."""
+        matching = job['skills'] & candidate[1]
+        matching_skills = [job['skill_names'][skill_id] for skill_id in matching]
+        missing_skills = [job['skill_names'][skill_id] for skill_id in job['skills'] - matching]
+        details = (
+            f"Skill Match: {scores['skill']:.1f}% ({len(matching_skills)} matching, "
+            f"{len(missing_skills)} missing)\n"
+            f"Experience: {scores['experience']:.1f}% ({candidate[2]} years vs {job['min_experience']} required)\n"
             f"Education: {scores['education']:.1f}%\n"
             f"Location: {scores['location']:.1f}%\n"
             f"Salary: {scores['salary']:.1f}%\n"
             f"Availability: {scores['availability']:.1f}%"
         )
-        
+        return {
+            'job_order_id': job['id'],
+            'candidate_id': candidate[0],
+            'engine_run_id': self.id,
+            'skill_match_score': scores['skill'],
+            'experience_match_score': scores['experience'],
+            'education_match_score': scores['education'],
+            'location_match_score': scores['location'],
+            'salary_match_score': scores['salary'],
+            'availability_match_score': scores['availability'],
+            'matching_skills': json.dumps(matching_skills),
+            'missing_skills': json.dumps(missing_skills),
+            'match_details': details,
+        }
+
+    def _calculate_match_scores(self, job, candidate):
+        """Calculate match scores between job and candidate"""
+        job_profile = self._get_job_profile(job)
+        candidate_profile = (
+            candidate.id,
+            frozenset(candidate.skill_ids.ids),
+            candidate.total_experience or 0,
+            (candidate.city or '').lower(),
+            candidate.expected_salary or 0,
+            candidate.available_from,
+        )
+        matched_count = len(job_profile['skills'] & candidate_profile[1])
+        scores = _score_profiles(job_profile, candidate_profile, matched_count)
+        vals = self._prepare_match_vals(job_profile, candidate_profile, scores)
+        scores.update({
+            'matching_skills': json.loads(vals['matching_skills']),
+            'missing_skills': json.loads(vals['missing_skills']),
+            'details': vals['match_details'],
+        })
         return scores
 
 
@@ -2,12 +2,41 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools import split_every
 from datetime import date, datetime
-import base64
+from dateutil.relativedelta import relativedelta
+import io
 import logging
+import os
+import shutil
+import tempfile
 
 _logger = logging.getLogger(__name__)
 
+# Number of WPS lines read per batch when streaming the SIF file
+SIF_READ_BATCH_SIZE = 2000
+
+# Number of WPS lines created per batch
+LINE_CREATE_BATCH_SIZE = 1000
+
+# Payslip fields mapped to WPS line salary components
+PAYSLIP_LINE_FIELDS = {
+    'basic_wage': 'basic_salary',
+    'housing_allowance': 'housing_allowance',
+    'transport_allowance': 'transport_allowance',
+    'other_allowances': 'other_allowance',
+    'overtime_amount': 'overtime',
+    'total_deductions': 'deductions',
+}
+
+# Line fields needed to write SDR records
+SIF_LINE_FIELDS = [
+    'employee_eid', 'labour_card_no', 'bank_code', 'account_number', 'iban',
+    'days_worked', 'net_salary', 'basic_salary', 'housing_allowance',
+    'transport_allowance', 'other_allowance', 'overtime', 'leave_salary',
+    'deductions',
+]
+
 
 class WPSFile(models.Model):
     """WPS (Wage Protection System) File Generation"""
@@ -218,9 +247,10 @@ class WPSFile(models.Model):
 
     def action_generate_lines(self):
         """Generate WPS lines from employees with contracts"""
+        Line = self.env['tazweed.wps.file.line']
         for wps in self:
             # Clear existing lines
-            wps.line_ids.unlink()
+            Line.search([('wps_file_id', '=', wps.id)]).unlink()
             
             # Get employees with active contracts
             employees = self.env['hr.employee'].search([
@@ -232,85 +262,200 @@ class WPSFile(models.Model):
             if not employees:
                 raise UserError(_('No employees with active contracts found.'))
             
-            lines = []
-            for emp in employees:
-                # Get bank account
-                bank_account = emp.bank_account_id if hasattr(emp, 'bank_account_id') else False
-                
-                # Get WPS bank
-                wps_bank = False
-                if bank_account and bank_account.bank_id:
-                    wps_bank = self.env['tazweed.wps.bank'].search([
-                        ('swift_code', '=', bank_account.bank_id.bic)
-                    ], limit=1)
-                
-                contract = emp.contract_id
-                
-                lines.append({
-                    'wps_file_id': wps.id,
-                    'employee_id': emp.id,
-                    'employee_eid': getattr(emp, 'emirates_id', '') or '',
-                    'labour_card_no': getattr(emp, 'labour_card_no', '') or '',
-                    'bank_id': wps_bank.id if wps_bank else False,
-                    'bank_code': wps_bank.routing_code if wps_bank else (bank_account.bank_id.bic if bank_account and bank_account.bank_id else ''),
-                    'account_number': bank_account.acc_number if bank_account else '',
-                    'iban': getattr(bank_account, 'iban', '') if bank_account else '',
-                    'basic_salary': contract.wage if contract else 0,
-                    'housing_allowance': getattr(contract, 'housing_allowance', 0) or 0,
-                    'transport_allowance': getattr(contract, 'transport_allowance', 0) or 0,
-                    'other_allowance': getattr(contract, 'other_allowance', 0) or 0,
-                    'overtime': 0,
-                    'deductions': 0,
-                    'leave_salary': 0,
-                })
-            
-            self.env['tazweed.wps.file.line'].create(lines)
+            vals_list = wps._prepare_line_vals_list(employees)
+            for batch in split_every(LINE_CREATE_BATCH_SIZE, vals_list):
+                Line.create(list(batch))
         
         return True
 
+    def _get_period_dates(self):
+        """Return the first and last day of the WPS period"""
+        self.ensure_one()
+        date_from = date(int(self.period_year), int(self.period_month), 1)
+        return date_from, date_from + relativedelta(months=1, days=-1)
+
+    @api.model
+    def _read_by_id(self, model_name, ids, fnames):
+        """Read the existing fields of the given records, indexed by id"""
+        Model = self.env[model_name]
+        fnames = [fname for fname in fnames if fname in Model._fields]
+        ids = list(set(filter(None, ids)))
+        return {values['id']: values for values in Model.browse(ids).read(fnames, load=False)}
+
+    @api.model
+    def _get_wps_banks_by_swift(self):
+        """Index WPS banks by SWIFT code, first bank by name winning"""
+        banks = {}
+        for bank in self.env['tazweed.wps.bank'].search_read(
+                [('swift_code', '!=', False)], ['swift_code', 'routing_code']):
+            banks.setdefault(bank['swift_code'], bank)
+        return banks
+
+    def _get_period_payslips(self, employee_ids):
+        """Return the done payslips of the period indexed by employee"""
+        self.ensure_one()
+        if 'hr.payslip' not in self.env:
+            return {}
+        date_from, date_to = self._get_period_dates()
+        payslips = {}
+        for payslip in self.env['hr.payslip'].search_read([
+            ('employee_id', 'in', employee_ids),
+            ('date_from', '<=', date_to),
+            ('date_to', '>=', date_from),
+            ('state', 'in', ['done', 'paid']),
+        ], ['employee_id'] + list(PAYSLIP_LINE_FIELDS), order='date_to desc, id desc', load=False):
+            payslips.setdefault(payslip['employee_id'], payslip)
+        return payslips
+
+    def _prepare_line_vals_list(self, employees):
+        """Build the WPS line values of all employees with grouped reads.
+
+        Salary amounts come from the period's done payslips when payroll is
+        installed, otherwise from the contract.
+        """
+        self.ensure_one()
+        employee_data = self._read_by_id(
+            'hr.employee', employees.ids,
+            ['contract_id', 'bank_account_id', 'emirates_id', 'labour_card_no'])
+        contracts = self._read_by_id(
+            'hr.contract', [emp['contract_id'] for emp in employee_data.values()],
+            ['wage', 'housing_allowance', 'transport_allowance', 'other_allowance'])
+        bank_accounts = self._read_by_id(
+            'res.partner.bank', [emp['bank_account_id'] for emp in employee_data.values()],
+            ['acc_number', 'iban', 'bank_id'])
+        bics = self._read_by_id(
+            'res.bank', [acc['bank_id'] for acc in bank_accounts.values()], ['bic'])
+        wps_banks = self._get_wps_banks_by_swift()
+        payslips = self._get_period_payslips(employees.ids)
+        
+        vals_list = []
+        for emp_id in employees.ids:
+            emp = employee_data[emp_id]
+            bank_account = bank_accounts.get(emp['bank_account_id']) or {}
+            bic = bics.get(bank_account.get('bank_id'), {}).get('bic') or ''
+            wps_bank = wps_banks.get(bic) if bic else None
+            contract = contracts.get(emp['contract_id']) or {}
+            
+            vals = {
+                'wps_file_id': self.id,
+                'employee_id': emp_id,
+                'employee_eid': emp.get('emirates_id') or '',
+                'labour_card_no': emp.get('labour_card_no') or '',
+                'bank_id': wps_bank['id'] if wps_bank else False,
+                'bank_code': wps_bank['routing_code'] if wps_bank else bic,
+                'account_number': bank_account.get('acc_number') or '',
+                'iban': bank_account.get('iban') or '',
+                'overtime': 0,
+                'deductions': 0,
+                'leave_salary': 0,
+            }
+            payslip = payslips.get(emp_id)
+            if payslip:
+                vals['payslip_id'] = payslip['id']
+                for payslip_field, line_field in PAYSLIP_LINE_FIELDS.items():
+                    vals[line_field] = payslip[payslip_field] or 0
+            else:
+                vals.update({
+                    'basic_salary': contract.get('wage') or 0,
+                    'housing_allowance': contract.get('housing_allowance') or 0,
+                    'transport_allowance': contract.get('transport_allowance') or 0,
+                    'other_allowance': contract.get('other_allowance') or 0,
+                })
+            vals_list.append(vals)
+        return vals_list
+
     def action_generate_sif(self):
         """Generate SIF file"""
+        Line = self.env['tazweed.wps.file.line']
         for wps in self:
-            if not wps.line_ids:
+            if not Line.search_count([('wps_file_id', '=', wps.id)]):
                 raise UserError(_('Please generate employee lines first.'))
             
             # Validate lines
-            invalid_lines = wps.line_ids.filtered(lambda l: not l.is_valid)
-            if invalid_lines:
+            if Line.search_count([('wps_file_id', '=', wps.id), ('is_valid', '=', False)]):
                 raise UserError(_('Some employee lines have validation errors. Please fix them before generating SIF.'))
             
-            # Generate SIF content
-            sif_content = wps._generate_sif_content()
-            
-            # Encode and save
-            wps.sif_file = base64.b64encode(sif_content.encode('utf-8'))
-            wps.sif_filename = f'WPS_{wps.employer_eid}_{wps.period_year}{wps.period_month}.SIF'
+            # Stream SIF content to the attachment
+            filename = f'WPS_{wps.employer_eid}_{wps.period_year}{wps.period_month}.SIF'
+            wps._store_sif_file(filename)
+            wps.sif_filename = filename
             wps.state = 'generated'
             
             wps.message_post(body=_('SIF file generated successfully.'))
         
         return True
 
+    def _store_sif_file(self, filename):
+        """Write the SIF file to a temporary file and store it as the sif_file
+        attachment, so memory stays flat whatever the number of lines."""
+        self.ensure_one()
+        tmpdir = tempfile.mkdtemp(prefix='wps_sif_')
+        try:
+            body_path = os.path.join(tmpdir, 'body')
+            sif_path = os.path.join(tmpdir, filename)
+            with open(body_path, 'w', encoding='utf-8', newline='') as body:
+                record_count, total_net = self._write_sif_records(body)
+            with open(sif_path, 'w', encoding='utf-8', newline='') as sif:
+                sif.write(self._generate_header_record(record_count, total_net))
+                with open(body_path, 'r', encoding='utf-8', newline='') as body:
+                    shutil.copyfileobj(body, sif)
+            
+            self.sif_file = False
+            self.env['ir.attachment'].sudo()._create_from_file(sif_path, {
+                'name': filename,
+                'res_model': self._name,
+                'res_id': self.id,
+                'res_field': 'sif_file',
+                'mimetype': 'text/plain',
+            })
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def _iter_sif_line_values(self, batch_size=SIF_READ_BATCH_SIZE):
+        """Yield the SDR values of the lines, read in batches"""
+        self.ensure_one()
+        Line = self.env['tazweed.wps.file.line']
+        line_ids = Line.search([('wps_file_id', '=', self.id)]).ids
+        for ids in split_every(batch_size, line_ids):
+            batch = Line.browse(ids)
+            yield from batch.read(SIF_LINE_FIELDS)
+            # Drop the batch from the cache to keep memory flat
+            batch.invalidate_recordset()
+
+    def _write_sif_records(self, stream):
+        """Write the SDR records to the stream, each preceded by a newline.
+
+        Returns: (record_count, total_net) computed in the same pass
+        """
+        record_count = 0
+        total_net = 0.0
+        for values in self._iter_sif_line_values():
+            stream.write('\n')
+            stream.write(self._generate_employee_record(values))
+            record_count += 1
+            total_net += values['net_salary']
+        return record_count, total_net
+
     def _generate_sif_content(self):
         """Generate SIF file content according to UAE WPS format"""
         self.ensure_one()
-        lines = []
-        
-        # Header Record (EDR - Employer Details Record)
-        header = self._generate_header_record()
-        lines.append(header)
+        body = io.StringIO()
         
         # Employee Records (SDR - Salary Details Record)
-        for line in self.line_ids:
-            sdr = self._generate_employee_record(line)
-            lines.append(sdr)
+        record_count, total_net = self._write_sif_records(body)
         
-        return '\n'.join(lines)
+        # Header Record (EDR - Employer Details Record)
+        return self._generate_header_record(record_count, total_net) + body.getvalue()
 
-    def _generate_header_record(self):
+    def _generate_header_record(self, record_count=None, total_net=None):
         """Generate EDR (Employer Details Record)"""
         self.ensure_one()
         
+        if record_count is None:
+            record_count = len(self.line_ids)
+        if total_net is None:
+            total_net = self.total_net
+        
         # EDR Format:
         # Field 1: Record Type (3) - "EDR"
         # Field 2: Employer EID (15)
@@ -328,14 +473,17 @@ class WPSFile(models.Model):
         edr += (self.employer_account or '').ljust(34)[:34]
         edr += self.period_month
         edr += self.period_year[:4]
-        edr += str(len(self.line_ids)).zfill(6)
-        edr += str(int(self.total_net * 100)).zfill(15)
+        edr += str(record_count).zfill(6)
+        edr += str(int(total_net * 100)).zfill(15)
         edr += 'AED'
         
         return edr
 
     def _generate_employee_record(self, line):
-        """Generate SDR (Salary Details Record)"""
+        """Generate SDR (Salary Details Record)
+
+        :param line: a ``tazweed.wps.file.line`` record or its read() values
+        """
         
         # SDR Format:
         # Field 1: Record Type (3) - "SDR"
@@ -353,17 +501,17 @@ class WPSFile(models.Model):
         # Field 13: Currency (3) - "AED"
         
         sdr = 'SDR'
-        sdr += (line.employee_eid or line.labour_card_no or '').ljust(15)[:15]
-        sdr += (line.bank_code or '').ljust(9)[:9]
-        sdr += (line.account_number or line.iban or '').ljust(34)[:34]
+        sdr += (line['employee_eid'] or line['labour_card_no'] or '').ljust(15)[:15]
+        sdr += (line['bank_code'] or '').ljust(9)[:9]
+        sdr += (line['account_number'] or line['iban'] or '').ljust(34)[:34]
         sdr += self.salary_date.strftime('%Y%m%d')
         sdr += 'M'  # Monthly
-        sdr += str(line.days_worked or 30).zfill(2)
-        sdr += str(int(line.net_salary * 100)).zfill(15)
-        sdr += str(int(line.basic_salary * 100)).zfill(15)
-        sdr += str(int(line.housing_allowance * 100)).zfill(15)
-        sdr += str(int((line.transport_allowance + line.other_allowance + line.overtime + line.leave_salary) * 100)).zfill(15)
-        sdr += str(int(line.deductions * 100)).zfill(15)
+        sdr += str(line['days_worked'] or 30).zfill(2)
+        sdr += str(int(line['net_salary'] * 100)).zfill(15)
+        sdr += str(int(line['basic_salary'] * 100)).zfill(15)
+        sdr += str(int(line['housing_allowance'] * 100)).zfill(15)
+        sdr += str(int((line['transport_allowance'] + line['other_allowance'] + line['overtime'] + line['leave_salary']) * 100)).zfill(15)
+        sdr += str(int(line['deductions'] * 100)).zfill(15)
         sdr += 'AED'
         
         return sdr
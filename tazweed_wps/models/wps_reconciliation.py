@@ -7,10 +7,30 @@ Auto-reconcile WPS payments with bank statements
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
 from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from psycopg2.extras import execute_values
 import logging
+import re
 
 _logger = logging.getLogger(__name__)
 
+# Relative tolerance of the amount-only matching pass (1%)
+MATCH_TOLERANCE = 0.01
+
+# Splits bank references into searchable tokens
+TOKEN_SPLIT_RE = re.compile(r'[^0-9a-z]+')
+
+
+def _tokenize(text):
+    """Lowercase alphanumeric tokens of a reference"""
+    return {token for token in TOKEN_SPLIT_RE.split((text or '').lower()) if token}
+
+
+def _normalize_account(account):
+    """Account number or IBAN without spaces, lowercased"""
+    return re.sub(r'\s+', '', account or '').lower()
+
 
 class WPSReconciliation(models.Model):
     """WPS Payment Reconciliation"""
@@ -99,14 +119,13 @@ class WPSReconciliation(models.Model):
         ])
         
         # Create reconciliation lines from WPS data
-        for wps_line in wps_lines:
-            self.env['wps.reconciliation.line'].create({
-                'reconciliation_id': self.id,
-                'employee_id': wps_line.employee_id.id,
-                'wps_file_line_id': wps_line.id,
-                'wps_amount': wps_line.net_salary,
-                'bank_account': wps_line.iban or wps_line.account_number,
-            })
+        self.env['wps.reconciliation.line'].create([{
+            'reconciliation_id': self.id,
+            'employee_id': wps_line.employee_id.id,
+            'wps_file_line_id': wps_line.id,
+            'wps_amount': wps_line.net_salary,
+            'bank_account': wps_line.iban or wps_line.account_number,
+        } for wps_line in wps_lines])
         
         # Auto-match with bank statements
         self._auto_match_payments()
@@ -117,50 +136,153 @@ class WPSReconciliation(models.Model):
         return True
     
     def _auto_match_payments(self):
-        """Auto-match WPS payments with bank statement lines"""
-        # Get bank statement lines for the period
-        bank_lines = []
-        if 'account.bank.statement.line' in self.env:
-            bank_lines = self.env['account.bank.statement.line'].search([
-                ('statement_id', 'in', self.bank_statement_ids.ids),
-            ])
+        """Auto-match WPS payments with bank statement lines.
         
-        for rec_line in self.line_ids:
-            # Try to find matching bank transaction
-            matched = False
-            
-            for bank_line in bank_lines:
-                # Match by amount and reference
-                if abs(bank_line.amount) == abs(rec_line.wps_amount):
-                    # Check if reference contains employee info
-                    ref = (bank_line.ref or '').lower()
-                    emp_name = (rec_line.employee_id.name or '').lower()
-                    
-                    if emp_name in ref or str(rec_line.bank_account) in ref:
-                        rec_line.write({
-                            'bank_statement_line_id': bank_line.id,
-                            'bank_amount': abs(bank_line.amount),
-                            'bank_reference': bank_line.ref,
-                            'bank_date': bank_line.date,
-                            'state': 'matched',
-                        })
-                        matched = True
-                        break
-            
-            if not matched:
-                # Try fuzzy matching by amount only (within tolerance)
-                tolerance = 0.01  # 1% tolerance
-                for bank_line in bank_lines:
-                    if abs(abs(bank_line.amount) - rec_line.wps_amount) <= rec_line.wps_amount * tolerance:
-                        rec_line.write({
-                            'bank_statement_line_id': bank_line.id,
-                            'bank_amount': abs(bank_line.amount),
-                            'bank_reference': bank_line.ref,
-                            'bank_date': bank_line.date,
-                            'state': 'partial',
-                            'difference_reason': 'Amount mismatch within tolerance',
-                        })
+        Bank lines are indexed by rounded amount and by reference tokens for
+        the exact pass, and sorted by amount for the tolerance pass, so each
+        reconciliation line only looks at a few candidates. A bank line is
+        assigned to at most one reconciliation line.
+        """
+        if 'account.bank.statement.line' not in self.env:
+            return
+        BankLine = self.env['account.bank.statement.line']
+        bank_fields = ['amount', 'ref', 'date']
+        if 'account_number' in BankLine._fields:
+            bank_fields.append('account_number')
+        bank_lines = BankLine.search_read(
+            [('statement_id', 'in', self.bank_statement_ids.ids)], bank_fields, order='id')
+        if not bank_lines:
+            return
+        
+        # Index bank lines
+        by_amount = defaultdict(list)
+        by_token = defaultdict(set)
+        by_account = defaultdict(set)
+        for index, bank_line in enumerate(bank_lines):
+            bank_line['abs_amount'] = abs(bank_line['amount'])
+            bank_line['ref_lower'] = (bank_line['ref'] or '').lower()
+            by_amount[round(bank_line['abs_amount'], 2)].append(index)
+            for token in _tokenize(bank_line['ref']):
+                by_token[token].add(index)
+            account = _normalize_account(bank_line.get('account_number'))
+            if account:
+                by_account[account].add(index)
+        
+        rec_lines = self.line_ids
+        rec_data = {line['id']: line for line in rec_lines.read(['wps_amount', 'bank_account'], load=False)}
+        employee_names = {emp.id: (emp.name or '').lower() for emp in rec_lines.mapped('employee_id')}
+        
+        used = set()
+        updates = []
+        unmatched = []
+        
+        # Exact pass: same amount and reference mentioning the employee or account
+        for rec_line in rec_lines:
+            data = rec_data[rec_line.id]
+            amount = abs(data['wps_amount'])
+            bucket = by_amount.get(round(amount, 2), ())
+            emp_name = employee_names.get(rec_line.employee_id.id, '')
+            account = (data['bank_account'] or '').lower()
+            match = None
+            if bucket:
+                candidates = self._get_reference_candidates(
+                    bucket, emp_name, account, by_token, by_account)
+                for index in sorted(candidates):
+                    if index in used:
+                        continue
+                    bank_line = bank_lines[index]
+                    if bank_line['abs_amount'] != amount:
+                        continue
+                    ref = bank_line['ref_lower']
+                    if (emp_name and emp_name in ref) or (account and account in ref) \
+                            or index in by_account.get(_normalize_account(account), ()):
+                        match = index
                         break
+            if match is None:
+                unmatched.append(rec_line.id)
+                continue
+            used.add(match)
+            updates.append(self._prepare_match_values(rec_line.id, bank_lines[match], 'matched'))
+        
+        # Tolerance pass: closest unused amount within the tolerance
+        remaining = sorted(
+            (bank_line['abs_amount'], index)
+            for index, bank_line in enumerate(bank_lines) if index not in used
+        )
+        amounts = [amount for amount, __ in remaining]
+        for rec_id in unmatched:
+            wps_amount = rec_data[rec_id]['wps_amount']
+            tolerance = wps_amount * MATCH_TOLERANCE
+            if tolerance < 0:
+                continue
+            low = bisect_left(amounts, wps_amount - tolerance)
+            high = bisect_right(amounts, wps_amount + tolerance)
+            if low >= high:
+                continue
+            # The closest amount sits right around the insertion point
+            pivot = bisect_left(amounts, wps_amount)
+            best = min(
+                (pos for pos in (pivot - 1, pivot) if low <= pos < high),
+                key=lambda pos: (abs(amounts[pos] - wps_amount), remaining[pos][1]),
+            )
+            index = remaining[best][1]
+            del amounts[best]
+            del remaining[best]
+            updates.append(self._prepare_match_values(
+                rec_id, bank_lines[index], 'partial', _('Amount mismatch within tolerance')))
+        
+        self._write_match_values(updates)
+    
+    @api.model
+    def _get_reference_candidates(self, bucket, emp_name, account, by_token, by_account):
+        """Narrow an amount bucket down with the reference token index.
+        
+        Applied to every bucket, whatever its size, so that a bank line
+        matches the same way however many lines share its amount.
+        """
+        candidates = set()
+        name_tokens = _tokenize(emp_name)
+        if name_tokens and all(token in by_token for token in name_tokens):
+            postings = sorted((by_token[token] for token in name_tokens), key=len)
+            candidates |= set.intersection(*postings)
+        if account:
+            for token in _tokenize(account) | {_normalize_account(account)}:
+                candidates |= by_token.get(token, set())
+            candidates |= by_account.get(_normalize_account(account), set())
+        return candidates.intersection(bucket)
+    
+    @api.model
+    def _prepare_match_values(self, rec_id, bank_line, state, reason=None):
+        return (
+            rec_id, bank_line['id'], bank_line['abs_amount'], bank_line['ref'] or None,
+            bank_line['date'], state, reason,
+        )
+    
+    def _write_match_values(self, updates):
+        """Write all match results with a single UPDATE"""
+        if not updates:
+            return
+        fnames = ['bank_statement_line_id', 'bank_amount', 'bank_reference', 'bank_date',
+                  'state', 'difference_reason']
+        lines = self.env['wps.reconciliation.line'].browse([values[0] for values in updates])
+        lines.flush_recordset()
+        execute_values(self.env.cr._obj, """
+            UPDATE wps_reconciliation_line AS l
+               SET bank_statement_line_id = v.bank_statement_line_id,
+                   bank_amount = v.bank_amount,
+                   bank_reference = v.bank_reference,
+                   bank_date = v.bank_date,
+                   state = v.state,
+                   difference_reason = COALESCE(v.difference_reason, l.difference_reason),
+                   write_uid = %s,
+                   write_date = (now() at time zone 'UTC')
+              FROM (VALUES %%s) AS v(id, bank_statement_line_id, bank_amount, bank_reference,
+                                    bank_date, state, difference_reason)
+             WHERE l.id = v.id
+        """ % int(self.env.uid), updates,
+            template='(%s, %s, %s::float8, %s::varchar, %s::date, %s::varchar, %s::varchar)')
+        lines.invalidate_recordset(fnames)
+        lines.modified(fnames)
     
     def _update_reconciliation_state(self):
         """Update reconciliation state based on line states"""
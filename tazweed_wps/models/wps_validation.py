@@ -6,12 +6,16 @@ Pre-submission validation checks for WPS compliance
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import split_every
 from datetime import datetime, timedelta
 import re
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Number of WPS lines read per batch when building the validation snapshot
+SNAPSHOT_BATCH_SIZE = 5000
+
 
 class WPSValidationRule(models.Model):
     """WPS Validation Rule Definition"""
@@ -174,6 +178,90 @@ class WPSValidationRule(models.Model):
         """Validate calculations"""
         return result
     
+    # -------------------------------------------------------------------------
+    # Batch validation
+    # -------------------------------------------------------------------------
+    
+    def _compile_batch_check(self, model):
+        """Compile the rule once into a predicate over a columnar snapshot.
+        
+        The returned callable takes a snapshot ``{'ids': [...], 'columns':
+        {field: [...]}}`` of ``model`` records and returns the ids of the
+        records failing the rule. Semantics match :meth:`validate`.
+        """
+        self.ensure_one()
+        field_name = self.field_name
+        if self.rule_type not in ('format', 'range', 'required', 'unique', 'reference') or not field_name:
+            return lambda snapshot: []
+        
+        def values(snapshot):
+            column = snapshot['columns'].get(field_name) or [None] * len(snapshot['ids'])
+            return zip(snapshot['ids'], column)
+        
+        if self.rule_type == 'format':
+            if not self.regex_pattern:
+                return lambda snapshot: []
+            try:
+                match = re.compile(self.regex_pattern).match
+            except re.error:
+                # Mirror validate(): an invalid pattern fails every checked value
+                return lambda snapshot: [rec_id for rec_id, value in values(snapshot) if value]
+            return lambda snapshot: [
+                rec_id for rec_id, value in values(snapshot) if value and not match(str(value))
+            ]
+        
+        if self.rule_type == 'range':
+            min_value, max_value = self.min_value, self.max_value
+            
+            def out_of_range(value):
+                try:
+                    return bool((min_value and value < min_value) or (max_value and value > max_value))
+                except TypeError:
+                    return True
+            return lambda snapshot: [
+                rec_id for rec_id, value in values(snapshot) if value is not None and out_of_range(value)
+            ]
+        
+        if self.rule_type == 'required':
+            return lambda snapshot: [rec_id for rec_id, value in values(snapshot) if not value]
+        
+        if self.rule_type == 'unique':
+            Model = self.env[model]
+            
+            def duplicates(snapshot):
+                checked = [(rec_id, value) for rec_id, value in values(snapshot) if value]
+                if not checked:
+                    return []
+                field = Model._fields.get(field_name)
+                if field and field.store and field.type not in ('one2many', 'many2many'):
+                    # One GROUP BY over the whole table, as validate() searches globally
+                    counts = {}
+                    for group in Model.read_group(
+                            [(field_name, 'in', list({value for __, value in checked}))],
+                            [field_name], [field_name], lazy=False):
+                        key = group[field_name]
+                        counts[key[0] if isinstance(key, tuple) else key] = group['__count']
+                    return [rec_id for rec_id, value in checked if counts.get(value, 0) > 1]
+                return [
+                    rec_id for rec_id, value in checked
+                    if Model.search_count([(field_name, '=', value), ('id', '!=', rec_id)])
+                ]
+            return duplicates
+        
+        # reference
+        if not self.reference_model:
+            return lambda snapshot: []
+        reference_model = self.reference_model
+        
+        def missing_references(snapshot):
+            checked = [(rec_id, value) for rec_id, value in values(snapshot) if value]
+            if not checked:
+                return []
+            existing = set(self.env[reference_model].search(
+                [('id', 'in', list({value for __, value in checked}))]).ids)
+            return [rec_id for rec_id, value in checked if value not in existing]
+        return missing_references
+    
     def _validate_business(self, record, result, context):
         """Validate business rules"""
         return result
@@ -338,24 +426,7 @@ class WPSFileValidation(models.Model):
             })
         
         # Validate line-level rules
-        for line in self.line_ids:
-            for rule in line_rules:
-                rule_result = rule.validate(line)
-                if not rule_result.get('passed'):
-                    self.env['wps.validation.result.line'].create({
-                        'result_id': result.id,
-                        'rule_id': rule.id,
-                        'rule_code': rule_result.get('rule_code'),
-                        'rule_name': rule_result.get('rule_name'),
-                        'field_name': rule_result.get('field'),
-                        'passed': rule_result.get('passed'),
-                        'severity': rule_result.get('severity'),
-                        'message': rule_result.get('message'),
-                        'help_text': rule_result.get('help'),
-                        'record_model': 'tazweed.wps.file.line',
-                        'record_id': line.id,
-                        'record_name': line.employee_id.name if line.employee_id else '',
-                    })
+        self._validate_lines_batch(result, line_rules)
         
         # Return result view
         return {
@@ -366,3 +437,59 @@ class WPSFileValidation(models.Model):
             'view_mode': 'form',
             'target': 'current',
         }
+    
+    def _get_validation_snapshot(self, fnames):
+        """Read the given line fields of all lines into columns"""
+        self.ensure_one()
+        Line = self.env['tazweed.wps.file.line']
+        stored = [fname for fname in fnames if fname in Line._fields]
+        snapshot = {
+            'ids': [],
+            'columns': {fname: [] for fname in stored},
+            'names': [],
+        }
+        line_ids = Line.search([('wps_file_id', '=', self.id)]).ids
+        for ids in split_every(SNAPSHOT_BATCH_SIZE, line_ids):
+            batch = Line.browse(ids)
+            for values in batch.read(stored + ['employee_name'], load=False):
+                snapshot['ids'].append(values['id'])
+                snapshot['names'].append(values['employee_name'] or '')
+                for fname in stored:
+                    snapshot['columns'][fname].append(values[fname])
+            batch.invalidate_recordset()
+        return snapshot
+    
+    def _validate_lines_batch(self, result, rules):
+        """Run line rules over a columnar snapshot of the file lines and
+        bulk-insert the failures."""
+        self.ensure_one()
+        snapshot = self._get_validation_snapshot(
+            list({rule.field_name for rule in rules if rule.field_name}))
+        names = dict(zip(snapshot['ids'], snapshot['names']))
+        
+        result_vals = []
+        for rule in rules:
+            failed_ids = rule._compile_batch_check('tazweed.wps.file.line')(snapshot)
+            rule.write({
+                'total_checks': rule.total_checks + len(snapshot['ids']),
+                'failed_checks': rule.failed_checks + len(failed_ids),
+            })
+            for line_id in failed_ids:
+                result_vals.append({
+                    'result_id': result.id,
+                    'rule_id': rule.id,
+                    'rule_code': rule.code,
+                    'rule_name': rule.name,
+                    'field_name': rule.field_name,
+                    'passed': False,
+                    'severity': rule.severity,
+                    'message': rule.error_message,
+                    'help_text': rule.help_text,
+                    'record_model': 'tazweed.wps.file.line',
+                    'record_id': line_id,
+                    'record_name': names[line_id],
+                })
+        
+        ResultLine = self.env['wps.validation.result.line']
+        for batch in split_every(SNAPSHOT_BATCH_SIZE, result_vals):
+            ResultLine.create(list(batch))